@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of LangGraph state-passing overhead per node.
+
+Compares the two ways the retrieval pipeline has passed state between nodes:
+
+- copy:  ``StateGraph(dict)`` where every node returns the whole state, copying the
+         dict plus the observation and timing lists before appending to them.
+- delta: ``StateGraph(PipelineState)`` with ``Annotated`` append reducers, where every
+         node returns only the keys it changed.
+
+Nodes do no work besides state handling, so the time per node is pure overhead.
+The payload mimics preparation mode: a few hundred evidence chunks in the state and
+two observations plus one timing entry added per node.
+
+Two numbers are reported per mode:
+
+- state: the node bodies plus merging their output into the accumulated state, i.e.
+         the part the node code controls.
+- graph: a full ``graph.invoke`` divided by the node count, which adds LangGraph's own
+         per-step bookkeeping.
+
+Usage:
+    python backend/scripts/benchmark_graph_state.py [--nodes 12] [--evidence 200] [--runs 200]
+"""
+
+import argparse
+import operator
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Annotated, Dict, List, Tuple, TypedDict
+
+from langgraph.graph import END, StateGraph
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from metabolic_backend.ingestion.models import Chunk  # noqa: E402
+
+
+_REDUCED = {"observations", "_timing_entries"}
+
+
+class _DeltaState(TypedDict, total=False):
+    evidence: List[Chunk]
+    observations: Annotated[List[Dict[str, str]], operator.add]
+    _timing_entries: Annotated[List[Tuple[str, float]], operator.add]
+
+
+def _copy_node(name: str):
+    def node(state: dict) -> dict:
+        base = dict(state)
+        observations = list(state.get("observations", []))
+        observations.append({"role": "action", "title": name, "content": "start"})
+        observations = list(observations)
+        observations.append({"role": "observation", "title": name, "content": "done"})
+        entries = list(state.get("_timing_entries", []))
+        entries.append((name, 0.0))
+        base["observations"] = observations
+        base["_timing_entries"] = entries
+        return base
+
+    return node
+
+
+def _delta_node(name: str):
+    def node(state: _DeltaState) -> _DeltaState:
+        return {
+            "observations": [
+                {"role": "action", "title": name, "content": "start"},
+                {"role": "observation", "title": name, "content": "done"},
+            ],
+            "_timing_entries": [(name, 0.0)],
+        }
+
+    return node
+
+
+def _build(schema, factory, nodes: int):
+    graph = StateGraph(schema)
+    names = [f"node_{idx}" for idx in range(nodes)]
+    for name in names:
+        graph.add_node(name, factory(name))
+    graph.set_entry_point(names[0])
+    for current, following in zip(names, names[1:]):
+        graph.add_edge(current, following)
+    graph.add_edge(names[-1], END)
+    return graph.compile()
+
+
+def _state_only(factory, nodes: int, initial: dict, *, reduce: bool) -> None:
+    """Run the node bodies in sequence and fold their outputs like the graph would."""
+    state = dict(initial)
+    for idx in range(nodes):
+        update = factory(f"node_{idx}")(state)
+        if not reduce:
+            state = update
+            continue
+        for key, value in update.items():
+            state[key] = operator.add(state[key], value) if key in _REDUCED else value
+
+
+def _measure_state(factory, nodes: int, initial: dict, runs: int, *, reduce: bool) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _state_only(factory, nodes, initial, reduce=reduce)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _measure(graph, initial: dict, runs: int) -> List[float]:
+    graph.invoke(initial)  # Warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        graph.invoke(initial)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=12, help="Nodes in the chain")
+    parser.add_argument("--evidence", type=int, default=200, help="Chunks held in state")
+    parser.add_argument("--runs", type=int, default=200, help="Timed invocations per mode")
+    args = parser.parse_args()
+
+    evidence = [
+        Chunk(
+            chunk_id=f"doc:{idx}",
+            document_id="doc",
+            section_path=["section"],
+            source_path="doc.md",
+            text="걷기 운동은 혈당 관리에 도움이 됩니다. " * 10,
+            token_count=80,
+        )
+        for idx in range(args.evidence)
+    ]
+    initial = {"evidence": evidence, "observations": [], "_timing_entries": []}
+
+    print(f"nodes={args.nodes} evidence={args.evidence} runs={args.runs} (median us/node)")
+    for label, schema, factory, reduce in (
+        ("copy", dict, _copy_node, False),
+        ("delta", _DeltaState, _delta_node, True),
+    ):
+        state_cost = _measure_state(factory, args.nodes, initial, args.runs, reduce=reduce)
+        graph = _build(schema, factory, args.nodes)
+        graph_cost = statistics.median(_measure(graph, initial, args.runs))
+        print(
+            f"  {label:<6} state {state_cost / args.nodes * 1e6:8.2f}"
+            f"   graph {graph_cost / args.nodes * 1e6:8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
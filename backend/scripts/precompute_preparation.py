@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Precompute preparation reports for scheduled patients.
+
+Builds each patient's context from test.sqlite and survey.sqlite, runs the preparation
+graph on a worker pool and stores the reports for GET /v1/preparation/{patient_id}.
+Patients whose stored report is still current are skipped, so rerunning an interrupted
+job resumes it.
+
+Usage:
+    python backend/scripts/precompute_preparation.py 1 2 3
+    python backend/scripts/precompute_preparation.py --all --workers 8 --llm-concurrency 6
+    python backend/scripts/precompute_preparation.py --all --dry-run --stub-delay 0.5
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from metabolic_backend import configure_logging  # noqa: E402
+from metabolic_backend.orchestrator import RetrievalPipeline  # noqa: E402
+from metabolic_backend.orchestrator.precompute import PreparationPrecomputer  # noqa: E402
+from metabolic_backend.patient_data import list_patient_ids  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("patient_ids", nargs="*", type=int, help="Patients to prepare")
+    parser.add_argument("--all", action="store_true", help="Prepare every patient in test.sqlite")
+    parser.add_argument("--workers", type=int, default=4, help="Patients processed at once")
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=4, help="LLM calls in flight across all workers"
+    )
+    parser.add_argument("--force", action="store_true", help="Regenerate current reports too")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Use a stub LLM and store nothing"
+    )
+    parser.add_argument(
+        "--stub-delay", type=float, default=0.0, help="Simulated seconds per stub LLM call"
+    )
+    args = parser.parse_args()
+
+    patient_ids = list_patient_ids() if args.all else args.patient_ids
+    if not patient_ids:
+        parser.error("pass patient IDs or --all")
+
+    configure_logging()
+    logging.getLogger().setLevel(logging.INFO)
+
+    pipeline = RetrievalPipeline()
+    try:
+        precomputer = PreparationPrecomputer(
+            pipeline,
+            workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+            dry_run=args.dry_run,
+            stub_delay=args.stub_delay,
+        )
+        stats = precomputer.run(patient_ids, force=args.force)
+    finally:
+        pipeline.close()
+
+    print(
+        f"{stats.completed} generated, {stats.skipped} skipped, {len(stats.failed)} failed "
+        f"of {stats.total} in {stats.elapsed:.1f}s ({stats.throughput:.1f} reports/min)"
+    )
+    if stats.failed:
+        print(f"failed: {' '.join(str(pid) for pid in stats.failed)}")
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
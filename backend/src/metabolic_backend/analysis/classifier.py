@@ -14,9 +14,10 @@ import re
 import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Iterable, List, Sequence
+from typing import List, Sequence
 
 from ..config import get_settings
+from .tokenizer import contains_keyword, index_terms
 
 LOGGER = logging.getLogger(__name__)
 
@@ -41,10 +42,15 @@ class QuestionAnalysisResult:
 class QuestionAnalyzer:
     """Classify counselor prompts for routing and guardrails."""
 
+    # Matched against particle-stripped tokens and their bigrams (see contains_keyword):
+    # a single syllable only matches as a whole word, so compounds such as "혈압약" are
+    # keywords of their own and also match inside longer compounds ("고혈압약")
     _DOMAIN_KEYWORDS = {
         "exercise": {"운동", "활동", "걷기", "조깅", "근력", "유산소"},
         "diet": {"식단", "음식", "칼로리", "식사", "영양", "탄수화물"},
-        "medical": {"약", "처방", "복용", "약물", "증상", "통증"},
+        "medical": {
+            "약", "처방", "복용", "약물", "증상", "통증", "혈압약", "당뇨약", "고지혈증약",
+        },
         "lifestyle": {"음주", "흡연", "스트레스", "수면", "생활"},
     }
 
@@ -111,8 +117,9 @@ class QuestionAnalyzer:
 
     # ------------------------------------------------------------------
     def _detect_domain(self, text: str, lowered: str, reasons: List[str]) -> str:
+        terms = set(index_terms(text))
         for domain, keywords in self._DOMAIN_KEYWORDS.items():
-            if self._any_keyword(text, keywords):
+            if any(contains_keyword(terms, keyword) for keyword in keywords):
                 reasons.append(f"Domain keyword match: {domain}")
                 return domain
         reasons.append("Defaulted to lifestyle domain")
@@ -151,10 +158,6 @@ class QuestionAnalyzer:
         reasons.append("No safety flags detected")
         return SafetyLevel.CLEAR
 
-    @staticmethod
-    def _any_keyword(text: str, keywords: Iterable[str]) -> bool:
-        return any(keyword in text for keyword in keywords)
-
 
 if __name__ == "__main__":  # pragma: no cover - manual smoke test
     logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
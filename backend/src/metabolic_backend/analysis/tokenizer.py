@@ -0,0 +1,78 @@
+"""Korean-aware tokenizer shared by keyword retrieval, classification and FAQ matching."""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import List, Set
+
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+_HANGUL_PATTERN = re.compile(r"^[가-힣]+$")
+
+# Postpositions (조사) checked longest first so "에서는" wins over "는".
+_PARTICLES = tuple(
+    sorted(
+        {
+            "으로써", "으로서", "에서는", "에게서", "이라고", "이라는", "에서도",
+            "으로", "에서", "에게", "한테", "까지", "부터", "처럼", "보다", "이나",
+            "이랑", "과는", "와는", "이란", "에는", "에도", "로서", "로써", "라고",
+            "은", "는", "이", "가", "을", "를", "에", "의", "도", "만", "로", "와",
+            "과", "랑", "란",
+        },
+        key=len,
+        reverse=True,
+    )
+)
+
+
+def normalize(text: str) -> str:
+    """Compose Hangul jamo, fold full-width forms and lowercase."""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def strip_particle(word: str) -> str:
+    """Remove one trailing Korean particle, keeping at least one syllable of stem."""
+    for particle in _PARTICLES:
+        if word.endswith(particle) and len(word) > len(particle):
+            return word[: -len(particle)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized words with trailing particles stripped."""
+    return [strip_particle(word) for word in _WORD_PATTERN.findall(normalize(text))]
+
+
+def char_bigrams(word: str) -> List[str]:
+    """Overlapping character bigrams of a Hangul word (compound-noun recall)."""
+    if len(word) < 3 or not _HANGUL_PATTERN.match(word):
+        return []
+    return [word[idx : idx + 2] for idx in range(len(word) - 1)]
+
+
+def index_terms(text: str) -> List[str]:
+    """Terms stored in keyword indexes: each token followed by its bigrams."""
+    terms: List[str] = []
+    for token in tokenize(text):
+        terms.append(token)
+        terms.extend(char_bigrams(token))
+    return terms
+
+
+def contains_keyword(terms: Set[str], keyword: str) -> bool:
+    """Return True when ``keyword`` occurs in a set produced by :func:`index_terms`."""
+    normalized = normalize(keyword)
+    if normalized in terms:
+        return True
+    bigrams = char_bigrams(normalized)
+    return bool(bigrams) and all(bigram in terms for bigram in bigrams)
+
+
+__all__ = [
+    "char_bigrams",
+    "contains_keyword",
+    "index_terms",
+    "normalize",
+    "strip_particle",
+    "tokenize",
+]
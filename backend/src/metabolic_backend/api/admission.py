@@ -0,0 +1,166 @@
+"""Admission control for retrieval requests, with live requests ahead of preparation.
+
+Live and preparation requests share the server's worker threads. Each mode gets its own
+bounded pool so a burst of 30-second preparation runs cannot take every slot, and live
+requests may also borrow idle preparation slots. Requests beyond capacity wait in a
+per-mode queue for up to the mode's timeout and are rejected once the queue is full or
+the timeout passes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict
+
+from ..metrics import record_count, record_latency
+
+
+class AdmissionRejected(Exception):
+    """No slot became free in time; the client should retry after ``retry_after`` seconds."""
+
+    def __init__(self, mode: str, retry_after: int) -> None:
+        super().__init__(f"{mode} capacity exhausted; retry after {retry_after}s")
+        self.mode = mode
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class _Pool:
+    limit: int
+    queue_timeout: float
+    max_queue: int
+    running: int = 0
+    # Each waiter's future resolves to the name of the pool whose slot it was handed
+    waiters: Deque[Future] = field(default_factory=deque)
+
+
+class AdmissionTicket:
+    """A held slot; ``release`` is idempotent so streaming cleanup may call it twice."""
+
+    def __init__(self, controller: "AdmissionController", pool: str) -> None:
+        self._controller = controller
+        self.pool = pool
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self.pool)
+
+
+class AdmissionController:
+    """Bounded per-mode concurrency with queueing and live-first handoff.
+
+    A freed slot goes to a queued live request first (a live request may hold a
+    preparation slot, never the reverse), then to a queued request of the slot's own
+    mode. State is guarded by a thread lock and waiters are ``concurrent.futures``
+    futures, so requests served on different event loops share one controller.
+    """
+
+    def __init__(
+        self,
+        *,
+        live_limit: int = 8,
+        preparation_limit: int = 2,
+        live_queue_timeout: float = 2.0,
+        preparation_queue_timeout: float = 30.0,
+        max_queue: int = 32,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _Pool] = {
+            "live": _Pool(max(1, live_limit), live_queue_timeout, max_queue),
+            "preparation": _Pool(
+                max(1, preparation_limit), preparation_queue_timeout, max_queue
+            ),
+        }
+
+    async def acquire(self, mode: str) -> AdmissionTicket:
+        """Wait for a slot for ``mode``; raises :class:`AdmissionRejected` when none frees."""
+        start = time.perf_counter()
+        pool = self._pools[mode]
+        with self._lock:
+            granted = self._try_admit(mode)
+            if granted is None:
+                if len(pool.waiters) >= pool.max_queue:
+                    raise self._rejection(mode)
+                waiter: Future = Future()
+                pool.waiters.append(waiter)
+
+        if granted is None:
+            try:
+                granted = await asyncio.wait_for(
+                    # Shielded so a timeout cannot cancel a slot handed over meanwhile
+                    asyncio.shield(asyncio.wrap_future(waiter)),
+                    timeout=pool.queue_timeout,
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+                with self._lock:
+                    handed_over = waiter.done()
+                    if not handed_over:
+                        pool.waiters.remove(waiter)
+                        waiter.cancel()
+                if handed_over:
+                    if isinstance(exc, asyncio.CancelledError):
+                        self._release(waiter.result())
+                        raise
+                    granted = waiter.result()
+                elif isinstance(exc, asyncio.CancelledError):
+                    raise
+                else:
+                    raise self._rejection(mode)
+
+        record_latency(f"admission_wait_{mode}", time.perf_counter() - start)
+        return AdmissionTicket(self, granted)
+
+    @asynccontextmanager
+    async def admit(self, mode: str) -> AsyncIterator[AdmissionTicket]:
+        """Hold a slot for ``mode`` for the duration of the block."""
+        ticket = await self.acquire(mode)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Current running and queued requests per mode."""
+        with self._lock:
+            return {
+                mode: {"limit": pool.limit, "running": pool.running, "queued": len(pool.waiters)}
+                for mode, pool in self._pools.items()
+            }
+
+    # ------------------------------------------------------------------
+    def _try_admit(self, mode: str) -> str | None:
+        candidates = ("live", "preparation") if mode == "live" else ("preparation",)
+        for name in candidates:
+            pool = self._pools[name]
+            # Queued requests keep their turn: nobody jumps ahead of a waiter of this mode
+            if pool.running < pool.limit and not self._pools[mode].waiters:
+                pool.running += 1
+                return name
+        return None
+
+    def _release(self, name: str) -> None:
+        with self._lock:
+            pool = self._pools[name]
+            pool.running -= 1
+            for mode in ("live", name):
+                waiters = self._pools[mode].waiters
+                if waiters:
+                    pool.running += 1
+                    waiters.popleft().set_result(name)
+                    return
+
+    def _rejection(self, mode: str) -> AdmissionRejected:
+        record_count(f"admission_rejected_{mode}")
+        return AdmissionRejected(mode, max(1, math.ceil(self._pools[mode].queue_timeout)))
+
+
+__all__ = ["AdmissionController", "AdmissionRejected", "AdmissionTicket"]
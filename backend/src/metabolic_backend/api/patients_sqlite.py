@@ -4,21 +4,13 @@ from __future__ import annotations
 
 from datetime import datetime, date
 from typing import List, Optional, Dict, Any
-from pathlib import Path
 import sqlite3
 import logging
 
 from pydantic import BaseModel, Field
 from fastapi import APIRouter, HTTPException, Query
 
-
-# ============================================================================
-# Database Paths
-# ============================================================================
-
-PROJECT_ROOT = Path(__file__).resolve().parents[4]
-SURVEY_DB = PROJECT_ROOT / "data" / "surveys" / "survey.sqlite"
-TEST_DB = PROJECT_ROOT / "data" / "tests" / "test.sqlite"
+from ..patient_data import SURVEY_DB, TEST_DB
 
 
 # ============================================================================
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
 from dataclasses import asdict, is_dataclass
 from enum import Enum
 from functools import lru_cache
@@ -15,12 +17,15 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 
 from .. import configure_logging
 from ..ingestion.pipeline import Chunk
 from ..logging_utils import log_event
-from ..metrics import latency_summary, record_latency
+from ..metrics import count_summary, latency_summary, record_latency
 from ..orchestrator import RetrievalPipeline, serialize_retrieval_output
+from ..orchestrator.precompute import default_report_store, load_report
+from .admission import AdmissionController, AdmissionRejected
 from .patients_sqlite import router as patients_router  # Use SQLite instead of PostgreSQL
 from .sessions import router as sessions_router
 
@@ -35,12 +40,23 @@ class RetrieveRequest(BaseModel):
         default="live",
         description="Execution mode: 'preparation' allows longer processing (20-30s), 'live' requires <5s response.",
     )
+    patient_id: int | None = Field(
+        default=None,
+        description="Build the patient context on the server from the patient databases; takes precedence over 'context'.",
+    )
 
 
 def create_app() -> FastAPI:
     configure_logging()
 
-    app = FastAPI(title="Metabolic Counselor Backend", version="0.1.0")
+    @asynccontextmanager
+    async def lifespan(_: FastAPI):
+        yield
+        # Release the pooled Graphiti connection held by the shared pipeline
+        if get_pipeline.cache_info().currsize:
+            get_pipeline().close()
+
+    app = FastAPI(title="Metabolic Counselor Backend", version="0.1.0", lifespan=lifespan)
 
     # Add CORS middleware to allow frontend requests
     app.add_middleware(
@@ -53,6 +69,25 @@ def create_app() -> FastAPI:
 
     disable_ingestion = os.getenv("DISABLE_INGESTION") is not None
 
+    # Live requests (5 s budget) must not queue behind bursts of 30 s preparation runs
+    admission = AdmissionController(
+        live_limit=int(os.getenv("LIVE_CONCURRENCY", "8")),
+        preparation_limit=int(os.getenv("PREPARATION_CONCURRENCY", "2")),
+        live_queue_timeout=float(os.getenv("LIVE_QUEUE_TIMEOUT_SECONDS", "2")),
+        preparation_queue_timeout=float(os.getenv("PREPARATION_QUEUE_TIMEOUT_SECONDS", "30")),
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "32")),
+    )
+
+    async def admit(mode: str):
+        try:
+            return await admission.acquire(mode)
+        except AdmissionRejected as exc:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many {mode} requests in progress; retry later.",
+                headers={"Retry-After": str(exc.retry_after)},
+            ) from exc
+
     @lru_cache(maxsize=1)
     def get_pipeline() -> RetrievalPipeline:
         if disable_ingestion:
@@ -78,20 +113,34 @@ def create_app() -> FastAPI:
             )
             return RetrievalPipeline(chunks=[fallback_chunk])
 
+    def resolve_context(pipeline: RetrievalPipeline, payload: RetrieveRequest) -> str | None:
+        if payload.patient_id is None:
+            return payload.context
+        context = pipeline.patient_context.build(payload.patient_id)
+        if context is None:
+            raise HTTPException(status_code=404, detail=f"Patient {payload.patient_id} not found")
+        return context
+
     @app.get("/healthz", tags=["system"])
     def healthcheck() -> Dict[str, Any]:
         return {"status": "ok"}
 
     @app.post("/v1/retrieve", tags=["retrieval"])
-    def retrieve(payload: RetrieveRequest) -> Dict[str, Any]:
+    async def retrieve(payload: RetrieveRequest) -> Dict[str, Any]:
         question = payload.question.strip()
         if not question:
             raise HTTPException(status_code=422, detail="Question cannot be blank.")
 
         mode = payload.mode
-        pipeline = get_pipeline()
+        # The first call builds the pipeline (chunk loading, FAQ encoding); keep it off the loop
+        pipeline = await asyncio.to_thread(get_pipeline)
         start = time.perf_counter()
-        output = pipeline.run(question, context=payload.context, mode=mode)
+        context = await asyncio.to_thread(resolve_context, pipeline, payload)
+        ticket = await admit(mode)
+        try:
+            output = await pipeline.arun(question, context=context, mode=mode)
+        finally:
+            ticket.release()
         total_duration = time.perf_counter() - start
 
         record_latency("analysis", output.timings.get("analysis", 0.0))
@@ -108,6 +157,8 @@ def create_app() -> FastAPI:
                 logging.warning("Safety analysis exceeded 2s SLA: %.3f s", output.timings["analysis"])
             if total_duration > 5.0:
                 logging.warning("Retrieval pipeline exceeded 5s live SLA: %.3f s", total_duration)
+            if output.cut_stages:
+                logging.info("Deadline cut live stages: %s", ", ".join(output.cut_stages))
         elif mode == "preparation":
             if total_duration > 30.0:
                 logging.warning("Preparation mode exceeded 30s SLA: %.3f s", total_duration)
@@ -153,29 +204,38 @@ def create_app() -> FastAPI:
         return str(obj)
 
     @app.post("/v1/retrieve/stream", tags=["retrieval"])
-    def retrieve_stream(payload: RetrieveRequest):
+    async def retrieve_stream(payload: RetrieveRequest):
         """Stream LangGraph node updates in real-time using Server-Sent Events."""
         question = payload.question.strip()
         if not question:
             raise HTTPException(status_code=422, detail="Question cannot be blank.")
 
         mode = payload.mode
-        pipeline = get_pipeline()
+        pipeline = await asyncio.to_thread(get_pipeline)
+        context = await asyncio.to_thread(resolve_context, pipeline, payload)
+        # Admitted before the response starts so a rejection can still be a 429
+        ticket = await admit(mode)
 
         async def event_generator():
             """Generate SSE events from LangGraph stream."""
             try:
                 start_total = time.perf_counter()
-                final_state = None
-
-                # Stream each node update from LangGraph
-                for chunk in pipeline.stream(question, context=payload.context, mode=mode):
-                    # chunk format: {node_name: node_output}
-                    for node_name, node_output in chunk.items():
-                        # Keep track of final state for completion event
-                        if node_name == "prep_synthesize" or (mode == "live" and node_name == "synthesize"):
-                            final_state = node_output
-                        
+                final_output = None
+
+                # Stream each node update and collect the final output from the same run
+                async for kind, item in pipeline.astream_with_result(
+                    question, context=context, mode=mode, stream_tokens=mode == "live"
+                ):
+                    if kind == "complete":
+                        final_output = item
+                        continue
+                    if kind == "token":
+                        # Incremental answer text; the complete event carries the final answer
+                        yield f"data: {json.dumps({'type': 'token', 'content': item})}\n\n"
+                        continue
+
+                    # item format: {node_name: node_output}
+                    for node_name, node_output in item.items():
                         # Make node_output JSON-serializable
                         serializable_output = make_json_serializable(node_output)
 
@@ -186,15 +246,7 @@ def create_app() -> FastAPI:
                         }
                         yield f"data: {json.dumps(event_data)}\n\n"
 
-                # Generate final output for structured data
-                if final_state:
-                    # Run pipeline to get final RetrievalOutput
-                    final_output = pipeline.run(question, context=payload.context, mode=mode)
-                    serialized_output = serialize_retrieval_output(final_output)
-                else:
-                    # Fallback: run pipeline once more to get final output
-                    final_output = pipeline.run(question, context=payload.context, mode=mode)
-                    serialized_output = serialize_retrieval_output(final_output)
+                serialized_output = serialize_retrieval_output(final_output)
 
                 # Send final completion event with structured data
                 total_duration = time.perf_counter() - start_total
@@ -212,6 +264,8 @@ def create_app() -> FastAPI:
                     "message": str(e)
                 }
                 yield f"data: {json.dumps(error_data)}\n\n"
+            finally:
+                ticket.release()
 
         return StreamingResponse(
             event_generator(),
@@ -220,12 +274,31 @@ def create_app() -> FastAPI:
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
                 "X-Accel-Buffering": "no"
-            }
+            },
+            # Also covers clients that disconnect before the generator starts
+            background=BackgroundTask(ticket.release),
         )
 
+    report_store = default_report_store()
+
+    @app.get("/v1/preparation/{patient_id}", tags=["retrieval"])
+    def precomputed_preparation(patient_id: int) -> Dict[str, Any]:
+        """Serve a preparation report built ahead of time by the batch precompute job."""
+        entry = load_report(get_pipeline(), report_store, patient_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No current preparation report for patient {patient_id}",
+            )
+        return entry
+
     @app.get("/metrics/latency", tags=["metrics"])
     def latency_metrics() -> Dict[str, Any]:
-        return {"latency": latency_summary()}
+        return {
+            "latency": latency_summary(),
+            "counts": count_summary(),
+            "admission": admission.snapshot(),
+        }
 
     # Include patient data endpoints
     app.include_router(patients_router)
@@ -1,5 +1,7 @@
 """Caching utilities for the metabolic backend."""
 
 from .faq import FAQCache
+from .preparation import PreparationCache
+from .response import ResponseCache
 
-__all__ = ["FAQCache"]
+__all__ = ["FAQCache", "PreparationCache", "ResponseCache"]
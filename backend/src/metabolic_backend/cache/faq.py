@@ -7,27 +7,44 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
 import numpy as np
 
+from ..analysis.tokenizer import tokenize
+
+
+_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+
 
 class FAQCache:
-    """FAQ caching system with semantic similarity search and TTL management."""
+    """FAQ caching system with semantic similarity search and TTL management.
+
+    Question embeddings are kept as a matrix of unit-length float32 rows aligned
+    with ``self.questions`` and persisted next to the JSON file, so mutations
+    touch single rows and startup only encodes questions missing from disk.
+
+    Lookups run on worker threads concurrently with expiry removals and new entries,
+    so every read or write of the entries, questions and matrix holds ``self._lock``;
+    only query encoding runs outside it.
+    """
 
     def __init__(self, cache_file: Path):
         self.cache_file = cache_file
+        self.embeddings_file = cache_file.with_suffix(".embeddings.npz")
         self.cache: Dict[str, Dict] = {}
         self.embeddings: Optional[np.ndarray] = None
         self.questions: List[str] = []
+        self._lock = threading.RLock()
 
         # Try to use sentence-transformers for better performance
         try:
             from sentence_transformers import SentenceTransformer
 
-            self.model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+            self.model = SentenceTransformer(_MODEL_NAME)
             self.use_sentence_transformer = True
         except ImportError:
             logging.warning(
@@ -39,21 +56,90 @@ class FAQCache:
         self._load_cache()
 
     def _load_cache(self):
-        """Load cache from file and generate embeddings."""
+        """Load cache entries and their persisted embeddings from disk."""
         if self.cache_file.exists():
             with open(self.cache_file, "r", encoding="utf-8") as f:
                 self.cache = json.load(f)
 
             logging.info(f"Loaded {len(self.cache)} FAQ entries from cache")
-
-            # Generate embeddings for questions
-            self.questions = list(self.cache.keys())
-            if self.use_sentence_transformer and self.questions:
-                self.embeddings = self.model.encode(self.questions)
-                logging.info(f"Generated embeddings for {len(self.questions)} questions")
         else:
             logging.info("No FAQ cache file found, starting with empty cache")
 
+        self.questions = list(self.cache.keys())
+        if self.use_sentence_transformer:
+            self.embeddings = self._load_embeddings(self.questions)
+
+    def _load_embeddings(self, questions: List[str]) -> Optional[np.ndarray]:
+        """Reuse persisted rows and encode only questions that have none yet."""
+        if not questions:
+            return None
+
+        stored: Dict[str, np.ndarray] = {}
+        if self.embeddings_file.exists():
+            try:
+                with np.load(self.embeddings_file, allow_pickle=False) as data:
+                    if str(data["model"]) == _MODEL_NAME:
+                        stored = dict(zip(data["questions"].tolist(), data["embeddings"]))
+            except Exception as exc:
+                logging.warning(f"Ignoring unreadable FAQ embeddings file: {exc}")
+
+        missing = [question for question in questions if question not in stored]
+        if missing:
+            stored.update(zip(missing, self._encode(missing)))
+            logging.info(f"Generated embeddings for {len(missing)} questions")
+
+        matrix = np.stack([stored[question] for question in questions]).astype(np.float32)
+        if missing or len(stored) != len(questions):
+            self._save_embeddings(matrix)
+        return matrix
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into unit-length float32 rows."""
+        vectors = np.asarray(self.model.encode(texts), dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _save_embeddings(self, matrix: Optional[np.ndarray] = None):
+        """Persist the embedding matrix next to the JSON cache."""
+        matrix = self.embeddings if matrix is None else matrix
+        if matrix is None:
+            return
+        self.embeddings_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.embeddings_file, "wb") as f:
+            np.savez(
+                f,
+                model=np.asarray(_MODEL_NAME),
+                questions=np.asarray(self.questions, dtype=str),
+                embeddings=matrix,
+            )
+
+    def _append_entries(self, questions: List[str]):
+        """Append embedding rows for newly added questions and persist them."""
+        rows = self._encode(questions) if self.use_sentence_transformer else None
+        with self._lock:
+            self.questions.extend(questions)
+            if rows is None:
+                return
+            self.embeddings = (
+                rows if self.embeddings is None else np.vstack([self.embeddings, rows])
+            )
+            self._save_embeddings()
+
+    def _remove_entries(self, questions: List[str]):
+        """Drop entries and their embedding rows, then persist both once."""
+        with self._lock:
+            doomed = set(questions)
+            keep = [idx for idx, question in enumerate(self.questions) if question not in doomed]
+            for question in doomed:
+                self.cache.pop(question, None)
+            self.questions = [self.questions[idx] for idx in keep]
+            if self.embeddings is not None:
+                self.embeddings = self.embeddings[keep]
+
+            self._save_cache()
+            if self.use_sentence_transformer:
+                self._save_embeddings()
+
     def get(self, question: str, similarity_threshold: float = 0.85) -> Optional[str]:
         """
         Get cached answer for a question if it exists and is similar enough.
@@ -75,21 +161,24 @@ class FAQCache:
 
     def _get_with_embeddings(self, question: str, similarity_threshold: float) -> Optional[str]:
         """Use semantic similarity search with embeddings."""
-        # Encode query
-        query_embedding = self.model.encode([question])[0]
-
-        # Calculate cosine similarity
-        similarities = np.dot(self.embeddings, query_embedding) / (
-            np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_embedding)
-        )
-
-        # Find most similar question
-        max_idx = np.argmax(similarities)
-        max_similarity = similarities[max_idx]
+        # Rows and query are unit length, so one mat-vec gives cosine similarity
+        query_embedding = self._encode([question])[0]
+        with self._lock:
+            if self.embeddings is None or not self.questions:
+                return None
+            similarities = self.embeddings @ query_embedding
+
+            # Find most similar question
+            max_idx = int(np.argmax(similarities))
+            max_similarity = similarities[max_idx]
+            if max_similarity < similarity_threshold:
+                return None
 
-        if max_similarity >= similarity_threshold:
             matched_question = self.questions[max_idx]
-            cached_data = self.cache[matched_question]
+            # A question added by set() gets its entry before its row
+            cached_data = self.cache.get(matched_question)
+            if cached_data is None:
+                return None
 
             # Check TTL
             if self._is_valid(cached_data):
@@ -98,25 +187,21 @@ class FAQCache:
                     f"(similarity: {max_similarity:.3f})"
                 )
                 return cached_data["answer"]
-            else:
-                logging.info(f"FAQ cache expired for: {matched_question[:50]}...")
-                # Remove expired entry
-                del self.cache[matched_question]
-                self._save_cache()
-                self._load_cache()  # Reload to update embeddings
+            logging.info(f"FAQ cache expired for: {matched_question[:50]}...")
+            # Remove expired entry
+            self._remove_entries([matched_question])
 
         return None
 
     def _get_with_string_match(self, question: str, similarity_threshold: float) -> Optional[str]:
         """Fallback to simple string matching."""
-        question_lower = question.lower().strip()
+        q_words = set(tokenize(question))
+        with self._lock:
+            entries = list(self.cache.items())
 
-        for cached_question, cached_data in self.cache.items():
-            cached_lower = cached_question.lower().strip()
-
-            # Simple Jaccard similarity
-            q_words = set(question_lower.split())
-            c_words = set(cached_lower.split())
+        for cached_question, cached_data in entries:
+            # Jaccard similarity over particle-stripped tokens
+            c_words = set(tokenize(cached_question))
 
             if not q_words or not c_words:
                 continue
@@ -134,8 +219,7 @@ class FAQCache:
                     return cached_data["answer"]
                 else:
                     # Remove expired entry
-                    del self.cache[cached_question]
-                    self._save_cache()
+                    self._remove_entries([cached_question])
 
         return None
 
@@ -155,14 +239,16 @@ class FAQCache:
             answer: The answer text
             ttl_days: Time to live in days (default: 30)
         """
-        self.cache[question] = {
-            "answer": answer,
-            "cached_at": datetime.now().isoformat(),
-            "ttl_days": ttl_days,
-        }
-
-        self._save_cache()
-        self._load_cache()  # Reload to update embeddings
+        with self._lock:
+            is_new = question not in self.cache
+            self.cache[question] = {
+                "answer": answer,
+                "cached_at": datetime.now().isoformat(),
+                "ttl_days": ttl_days,
+            }
+            self._save_cache()
+        if is_new:
+            self._append_entries([question])
 
         logging.info(f"Added FAQ entry: {question[:50]}... (TTL: {ttl_days} days)")
 
@@ -207,16 +293,17 @@ class FAQCache:
             },
         }
 
-        for question, data in defaults.items():
-            if question not in self.cache:
+        with self._lock:
+            added = [question for question in defaults if question not in self.cache]
+            for question in added:
                 self.cache[question] = {
-                    "answer": data["answer"],
+                    "answer": defaults[question]["answer"],
                     "cached_at": datetime.now().isoformat(),
-                    "ttl_days": data["ttl_days"],
+                    "ttl_days": defaults[question]["ttl_days"],
                 }
-
-        self._save_cache()
-        self._load_cache()
+            self._save_cache()
+        if added:
+            self._append_entries(added)
         logging.info(f"Populated {len(defaults)} default FAQ entries")
 
     def size(self) -> int:
@@ -225,12 +312,9 @@ class FAQCache:
 
     def clear_expired(self):
         """Remove all expired entries from cache."""
-        expired = [q for q, data in self.cache.items() if not self._is_valid(data)]
-
-        for question in expired:
-            del self.cache[question]
+        with self._lock:
+            expired = [q for q, data in self.cache.items() if not self._is_valid(data)]
 
         if expired:
-            self._save_cache()
-            self._load_cache()
+            self._remove_entries(expired)
             logging.info(f"Cleared {len(expired)} expired FAQ entries")
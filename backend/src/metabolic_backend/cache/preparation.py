@@ -0,0 +1,123 @@
+"""Persistent cache of preparation-mode results.
+
+Generating a preparation report takes several LLM calls, while the inputs (patient
+context, knowledge corpus, prompts) rarely change between two visits of the same
+patient. Entries are stored as one JSON file per key; each records the patient data
+version it was built from and is dropped as soon as that version no longer matches.
+Past ``max_entries`` the least recently written entries are swept.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class PreparationCache:
+    """File-backed store of serialized ``PreparationAnalysis`` payloads."""
+
+    def __init__(self, cache_dir: Path, max_entries: int | None = 500):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(
+        question: str, context: str | None, *, corpus_version: str, prompt_version: str
+    ) -> str:
+        """Hash the inputs a preparation report depends on.
+
+        JSON contexts are re-serialized with sorted keys so field order from the client
+        does not split otherwise identical entries.
+        """
+        try:
+            normalized = json.dumps(json.loads(context), sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            normalized = context or ""
+        material = json.dumps(
+            [question.strip(), normalized, corpus_version, prompt_version], ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, data_version: str | None = None) -> Optional[Dict[str, Any]]:
+        """Return the cached payload, or ``None`` when missing or built from older data."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logging.warning(f"Ignoring unreadable preparation cache entry {path.name}: {exc}")
+            return None
+
+        if entry.get("data_version") != data_version:
+            logging.info(f"Preparation cache entry {key[:12]} invalidated by patient data change")
+            self.invalidate(key)
+            return None
+        return entry["payload"]
+
+    def set(self, key: str, payload: Dict[str, Any], data_version: str | None = None):
+        """Store a payload atomically so concurrent readers never see a partial file."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "data_version": data_version,
+            "cached_at": datetime.now().isoformat(),
+            "payload": payload,
+        }
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = Path(f.name)
+            try:
+                json.dump(entry, f, ensure_ascii=False)
+            except BaseException:
+                f.close()
+                tmp_path.unlink(missing_ok=True)
+                raise
+        os.replace(tmp_path, self._path(key))
+        self._sweep()
+
+    def invalidate(self, key: str):
+        """Drop one entry."""
+        self._path(key).unlink(missing_ok=True)
+
+    def size(self) -> int:
+        """Get number of cached entries."""
+        if not self.cache_dir.exists():
+            return 0
+        return sum(1 for _ in self.cache_dir.glob("*.json"))
+
+    def _sweep(self):
+        """Drop the oldest entries past ``max_entries`` and temp files left by crashed writers."""
+        stale_before = time.time() - 3600
+        for tmp_path in self.cache_dir.glob("*.tmp"):
+            try:
+                if tmp_path.stat().st_mtime < stale_before:
+                    tmp_path.unlink()
+            except OSError:
+                continue
+
+        if self.max_entries is None:
+            return
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # removed by a concurrent sweep
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_entries]:
+            path.unlink(missing_ok=True)
+        logging.info(f"Swept {len(entries) - self.max_entries} preparation cache entries")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
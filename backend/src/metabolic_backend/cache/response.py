@@ -0,0 +1,144 @@
+"""Semantic cache of complete live-mode pipeline outputs.
+
+Counselors ask the same questions about many patients, and a live answer does not
+depend on the patient context. Outputs are stored against the embedding of the
+normalized question plus the corpus version they were built from, and a later
+question whose embedding is close enough (cosine similarity) reuses the stored output
+instead of paying for retrieval and synthesis again.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from ..metrics import record_count
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    corpus_version: str
+    stored_at: float
+
+
+class ResponseCache:
+    """In-memory LRU of outputs keyed by question embedding and corpus version.
+
+    Embeddings live as unit-length float32 rows of one preallocated matrix, so a lookup
+    is a single matrix-vector product. Entries expire after ``ttl_seconds`` and the least
+    recently used entry is evicted once ``max_entries`` are stored.
+    """
+
+    def __init__(
+        self,
+        *,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1000,
+    ) -> None:
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._live: Optional[np.ndarray] = None
+        # row -> entry, least recently used first
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, embedding: Sequence[float], corpus_version: str) -> Optional[Any]:
+        """Return the stored value for the most similar current question, if any."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            row = self._match(vector, corpus_version)
+            if row is None:
+                self.stats["misses"] += 1
+                record_count("response_cache_miss")
+                return None
+            self._entries.move_to_end(row)
+            self.stats["hits"] += 1
+            record_count("response_cache_hit")
+            return self._entries[row].value
+
+    def set(self, embedding: Sequence[float], corpus_version: str, value: Any) -> None:
+        """Store ``value``, replacing an entry for an equivalent question."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # First entry, or the embedding model changed: start over
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._live = np.zeros(self.max_entries, dtype=bool)
+                self._entries.clear()
+
+            row = self._match(vector, corpus_version)
+            if row is None:
+                row = self._free_row()
+            self._matrix[row] = vector
+            self._live[row] = True
+            self._entries[row] = _Entry(value, corpus_version, time.monotonic())
+            self._entries.move_to_end(row)
+
+    def size(self) -> int:
+        """Get number of cached entries."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._live is not None:
+                self._live[:] = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / total if total else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    # ------------------------------------------------------------------
+    def _match(self, vector: np.ndarray, corpus_version: str) -> Optional[int]:
+        """Best live row at or above the threshold; drops stale rows it passes over."""
+        if not self._entries or self._matrix.shape[1] != vector.shape[0]:
+            return None
+        similarities = self._matrix @ vector
+        similarities[~self._live] = -np.inf
+        candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+        now = time.monotonic()
+        for row in candidates[np.argsort(-similarities[candidates])].tolist():
+            entry = self._entries[row]
+            if entry.corpus_version != corpus_version or now - entry.stored_at > self.ttl_seconds:
+                # Answers built from another corpus or past their TTL never become valid again
+                self._drop(row)
+                self.stats["expired"] += 1
+                continue
+            return row
+        return None
+
+    def _free_row(self) -> int:
+        if len(self._entries) < self.max_entries:
+            return int(np.flatnonzero(~self._live)[0])
+        row, _ = self._entries.popitem(last=False)
+        self._live[row] = False
+        self.stats["evictions"] += 1
+        return row
+
+    def _drop(self, row: int) -> None:
+        del self._entries[row]
+        self._live[row] = False
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+__all__ = ["ResponseCache"]
@@ -38,6 +38,13 @@ class Settings:
             chroma_path = self.cache_root / "vector_store" / "chroma_db"
         self.chroma_persist_dir: Path = chroma_path
         self.chroma_collection: str = os.getenv("CHROMA_COLLECTION", "metabolic_chunks")
+        # "chroma", or an in-process index over the chunk embeddings: "exact", "ivf",
+        # or the quantized "int8" and "binary"
+        self.vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma")
+        self.vector_ivf_lists: int = int(os.getenv("VECTOR_IVF_LISTS", "0"))  # 0: sqrt(chunks)
+        self.vector_ivf_probes: int = int(os.getenv("VECTOR_IVF_PROBES", "4"))
+        # Candidates per result that "int8"/"binary" search rescores at full precision
+        self.vector_rescore_factor: int = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
 
         # Graph store configuration (Neo4j)
         self.neo4j_uri: str = os.getenv(
@@ -45,6 +52,8 @@ class Settings:
         )
         self.neo4j_user: str = os.getenv("NEO4J_USER", os.getenv("NEO4J_USER", "neo4j"))
         self.neo4j_password: str = os.getenv("NEO4J_PASSWORD", os.getenv("NEO4J_PASSWORD", "neo4j"))
+        # Max concurrent Graphiti searches sharing one long-lived Neo4j driver
+        self.graphiti_pool_size: int = int(os.getenv("GRAPHITI_POOL_SIZE", "4"))
 
         # Embedding model (aligned with OpenAI backend default)
         self.embedding_model: str = os.getenv(
@@ -52,6 +61,8 @@ class Settings:
         )
         self.embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "openai")
         self.embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "1536"))
+        # Precision of the mapped embedding matrix that retrieval rescoring reads
+        self.embedding_store_dtype: str = os.getenv("EMBEDDING_STORE_DTYPE", "float16")
 
         # Safety classifier thresholds
         self.safety_latency_budget: float = float(os.getenv("SAFETY_LATENCY_BUDGET", "2.0"))
@@ -2,16 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import List
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 from langchain_openai import OpenAIEmbeddings as _LangChainOpenAIEmbeddings
 
+from .config import get_settings
+from .metrics import record_latency
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle via ingestion package
+    from .ingestion.embedding_cache import EmbeddingCache
+
+
+def _default_cache(model: str) -> "EmbeddingCache | None":
+    if os.getenv("DISABLE_EMBEDDING_CACHE") is not None:
+        return None
+
+    from .ingestion.embedding_cache import EmbeddingCache
+
+    return EmbeddingCache(cache_dir=str(get_settings().cache_root / "embeddings"), namespace=model)
+
 
 class OpenAIEmbeddings:
-    """OpenAI embedding client backed by LangChain's implementation."""
+    """OpenAI embedding client backed by LangChain's implementation.
 
-    def __init__(self, model: str = "text-embedding-3-small", api_key: str | None = None) -> None:
+    Lookups read through an :class:`EmbeddingCache` keyed by model name and text
+    hash, so only texts that were never embedded with this model reach the API.
+    """
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        api_key: str | None = None,
+        *,
+        cache: "EmbeddingCache | None" = None,
+        use_cache: bool = True,
+    ) -> None:
         self.model = model
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
 
@@ -21,13 +50,88 @@ class OpenAIEmbeddings:
             )
 
         self._client = _LangChainOpenAIEmbeddings(model=model, openai_api_key=self.api_key)
+        self._cache = (cache or _default_cache(model)) if use_cache else None
+        self._lock = threading.Lock()
+        self._api_calls = 0
+        self._api_seconds = 0.0
 
     # ------------------------------------------------------------------
     def embed_text(self, text: str) -> List[float]:
-        return self._client.embed_query(text)
+        return self.embed_batch([text])[0]
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        return self._client.embed_documents(texts)
+        results, misses = self._lookup(texts)
+        if misses:
+            start = time.perf_counter()
+            vectors = self._client.embed_documents(misses)
+            self._record_call(time.perf_counter() - start)
+            self._store(results, misses, vectors)
+        return [results[text] for text in texts]
+
+    async def aembed_text(self, text: str) -> List[float]:
+        return (await self.aembed_batch([text]))[0]
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        # Cache reads and writes touch mapped files under file and thread locks; keep them
+        # off the event loop so concurrent requests are not stalled behind them
+        if self._cache is None:
+            results, misses = self._lookup(texts)
+        else:
+            results, misses = await asyncio.to_thread(self._lookup, texts)
+        if misses:
+            start = time.perf_counter()
+            vectors = await self._client.aembed_documents(misses)
+            self._record_call(time.perf_counter() - start)
+            if self._cache is None:
+                self._store(results, misses, vectors)
+            else:
+                await asyncio.to_thread(self._store, results, misses, vectors)
+        return [results[text] for text in texts]
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            stats: Dict[str, object] = {
+                "model": self.model,
+                "api_calls": self._api_calls,
+                "api_avg_ms": (self._api_seconds / self._api_calls * 1000.0)
+                if self._api_calls
+                else 0.0,
+            }
+            if self._cache is not None:
+                stats.update(self._cache.get_stats())
+        return stats
+
+    # ------------------------------------------------------------------
+    def _lookup(self, texts: List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        """Split ``texts`` into cached vectors and the unique texts still to embed."""
+        unique = list(dict.fromkeys(texts))
+        if self._cache is None:
+            return {}, unique
+
+        with self._lock:
+            cached = self._cache.get_many(unique)
+        results: Dict[str, List[float]] = {}
+        misses: List[str] = []
+        for text, vector in zip(unique, cached):
+            if vector is None:
+                misses.append(text)
+            else:
+                results[text] = vector.tolist()
+        return results, misses
+
+    def _store(
+        self, results: Dict[str, List[float]], texts: List[str], vectors: List[List[float]]
+    ) -> None:
+        results.update(zip(texts, vectors))
+        if self._cache is not None:
+            with self._lock:
+                self._cache.put_many(texts, vectors, metadata={"model": self.model})
+
+    def _record_call(self, duration: float) -> None:
+        record_latency("embedding_api", duration)
+        with self._lock:
+            self._api_calls += 1
+            self._api_seconds += duration
 
     # ------------------------------------------------------------------
     def get_langchain_embeddings(self) -> _LangChainOpenAIEmbeddings:
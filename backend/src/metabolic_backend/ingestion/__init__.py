@@ -1,6 +1,14 @@
 """Ingestion utilities for preparing knowledge corpora."""
 
+from .embedding_matrix import load_embedding_matrix, write_embedding_matrix
 from .models import Chunk
 from .pipeline import IngestionPipeline, IngestionResult, iter_chunks
 
-__all__ = ["Chunk", "IngestionPipeline", "IngestionResult", "iter_chunks"]
+__all__ = [
+    "Chunk",
+    "IngestionPipeline",
+    "IngestionResult",
+    "iter_chunks",
+    "load_embedding_matrix",
+    "write_embedding_matrix",
+]
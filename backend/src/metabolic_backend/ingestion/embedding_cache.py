@@ -9,27 +9,49 @@ import os
 import json
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime
 from pathlib import Path
-import pickle
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+_STORE_VERSION = 1
+_DIGEST_SIZE = 16  # MD5 digest bytes per key
+
 
 class EmbeddingCache:
     """
     Persistent embedding cache with file-based storage.
 
-    Uses MD5 hashing of text content as keys and stores embeddings
-    in JSON format for easy inspection and portability.
+    Uses MD5 hashing of text content as keys. Vectors are appended as float32
+    rows to a single ``vectors.f32`` file that is read through ``np.memmap``;
+    ``keys.bin`` holds the matching 16-byte digests in row order, so the
+    hash→row index is rebuilt from one small file on startup.
+
+    Each namespace gets its own store directory, since models differ in
+    dimension. Appends take an exclusive lock on the store and place rows at
+    the current end of the files, so several processes (or instances) can
+    share one directory; rows appended by others are picked up when
+    ``keys.bin`` has grown.
     """
 
     def __init__(
         self,
         cache_dir: Optional[str] = None,
         max_memory_size: int = 1000,
-        enable_file_cache: bool = True
+        enable_file_cache: bool = True,
+        namespace: str = "",
+        max_memory_bytes: Optional[int] = None
     ):
         """
         Initialize embedding cache.
@@ -38,6 +60,10 @@ class EmbeddingCache:
             cache_dir: Directory for persistent cache files (defaults to .cache/embeddings)
             max_memory_size: Maximum number of embeddings to keep in memory
             enable_file_cache: Whether to use persistent file-based caching
+            namespace: Prefix mixed into every key (e.g. the embedding model name)
+                so vectors from different models never collide
+            max_memory_bytes: Optional cap on vector bytes held in memory; the
+                least recently used entries are evicted past either budget
 
         Example:
             # Default cache
@@ -50,6 +76,7 @@ class EmbeddingCache:
             cache = EmbeddingCache(enable_file_cache=False)
         """
         self.enable_file_cache = enable_file_cache
+        self.namespace = namespace
 
         # Set up cache directory
         if cache_dir:
@@ -59,78 +86,136 @@ class EmbeddingCache:
             project_root = Path(__file__).parent.parent.parent.parent
             self.cache_dir = project_root / ".cache" / "embeddings"
 
-        if self.enable_file_cache:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
-            self.index_file = self.cache_dir / "index.json"
-            self._load_index()
-        else:
-            self.file_index = {}
+        # hash digest -> row in vectors file
+        self.file_index: Dict[bytes, int] = {}
+        self._file_rows = 0
+        self.dimension: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
 
-        # In-memory cache for fast access
-        self.memory_cache: Dict[str, List[float]] = {}
-        self.access_times: Dict[str, datetime] = {}
+        if self.enable_file_cache:
+            self.store_dir = self.cache_dir
+            if namespace:
+                slug = re.sub(r"[^A-Za-z0-9._-]+", "_", namespace)
+                digest = hashlib.md5(namespace.encode("utf-8")).hexdigest()[:8]
+                self.store_dir = self.cache_dir / f"{slug}-{digest}"
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            self.vectors_file = self.store_dir / "vectors.f32"
+            self.keys_file = self.store_dir / "keys.bin"
+            self.meta_file = self.store_dir / "meta.json"
+            self.lock_file = self.store_dir / "store.lock"
+            with self._store_lock():
+                self._load_index()
+
+        # In-memory LRU tier: most recently used entries at the end
+        self.memory_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
         self.max_memory_size = max_memory_size
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
 
         # Statistics
         self.stats = {
             "hits": 0,
             "misses": 0,
-            "saves": 0
+            "saves": 0,
+            "evictions": 0
         }
 
-    def _load_index(self):
-        """Load cache index from disk."""
-        if self.index_file.exists():
-            try:
-                with open(self.index_file, 'r') as f:
-                    self.file_index = json.load(f)
-                logger.info(f"Loaded embedding cache index with {len(self.file_index)} entries")
-            except Exception as e:
-                logger.warning(f"Failed to load cache index: {e}, starting fresh")
-                self.file_index = {}
-        else:
-            self.file_index = {}
+        if self.enable_file_cache:
+            self._migrate_legacy_json()
 
-    def _save_index(self):
-        """Save cache index to disk."""
-        if not self.enable_file_cache:
+    def _load_index(self):
+        """Load the hash→row index and map the vector file."""
+        if not self.meta_file.exists():
             return
 
         try:
-            with open(self.index_file, 'w') as f:
-                json.dump(self.file_index, f, indent=2)
+            with open(self.meta_file, 'r') as f:
+                meta = json.load(f)
+            if meta.get("namespace", "") != self.namespace:
+                logger.warning(
+                    f"Embedding cache in {self.store_dir} belongs to namespace "
+                    f"{meta.get('namespace')!r}, starting fresh"
+                )
+                self._reset_files()
+                return
+            self.dimension = int(meta["dimension"])
+
+            raw_keys = self.keys_file.read_bytes() if self.keys_file.exists() else b""
+            row_bytes = self.dimension * 4
+            vector_bytes = self.vectors_file.stat().st_size if self.vectors_file.exists() else 0
+            vector_rows = vector_bytes // row_bytes
+            # Vectors are written before keys, so a torn append leaves at most an
+            # unreferenced trailing vector row; cut both files back to whole rows.
+            rows = min(len(raw_keys) // _DIGEST_SIZE, vector_rows)
+            expected = ((self.vectors_file, rows * row_bytes), (self.keys_file, rows * _DIGEST_SIZE))
+            for path, size in expected:
+                if path.exists() and path.stat().st_size > size:
+                    os.truncate(path, size)
+            self.file_index = {}
+            for row in range(rows):
+                digest = raw_keys[row * _DIGEST_SIZE:(row + 1) * _DIGEST_SIZE]
+                self.file_index.setdefault(digest, row)
+            self._file_rows = rows
+            logger.info(f"Loaded embedding cache index with {len(self.file_index)} entries")
         except Exception as e:
-            logger.error(f"Failed to save cache index: {e}")
+            logger.warning(f"Failed to load cache index: {e}, starting fresh")
+            self._reset_files()
+
+    @contextmanager
+    def _store_lock(self):
+        """Hold an exclusive lock on the store files across processes."""
+        with open(self.lock_file, 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh_index(self):
+        """Index rows other writers appended since the last load."""
+        if self.dimension is not None:
+            known = self._file_rows
+            size = self.keys_file.stat().st_size if self.keys_file.exists() else 0
+            if self.meta_file.exists() and size >= known * _DIGEST_SIZE:
+                with open(self.keys_file, 'rb') as f:
+                    f.seek(known * _DIGEST_SIZE)
+                    tail = f.read((size // _DIGEST_SIZE - known) * _DIGEST_SIZE)
+                for offset in range(len(tail) // _DIGEST_SIZE):
+                    digest = tail[offset * _DIGEST_SIZE:(offset + 1) * _DIGEST_SIZE]
+                    self.file_index.setdefault(digest, known + offset)
+                self._file_rows = known + len(tail) // _DIGEST_SIZE
+                return
+            # Another instance cleared the store
+            self._vectors = None
+            self.file_index = {}
+            self._file_rows = 0
+            self.dimension = None
+        self._load_index()
+
+    def _vector_rows(self) -> np.ndarray:
+        """Return a read-only memmap covering every indexed row."""
+        rows = self._file_rows
+        if self._vectors is None or self._vectors.shape[0] < rows:
+            self._vectors = np.memmap(
+                self.vectors_file, dtype=np.float32, mode='r', shape=(rows, self.dimension)
+            )
+        return self._vectors
 
-    def _hash_text(self, text: str) -> str:
+    def _hash_text(self, text: str) -> bytes:
         """
-        Generate MD5 hash for text.
+        Generate MD5 digest for text within the cache namespace.
 
         Args:
             text: Text to hash
 
         Returns:
-            MD5 hash as hexadecimal string
+            16-byte MD5 digest
         """
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
-
-    def _get_cache_file(self, text_hash: str) -> Path:
-        """
-        Get cache file path for a hash.
-
-        Uses subdirectories based on first 2 characters of hash
-        to avoid too many files in one directory.
-
-        Args:
-            text_hash: MD5 hash of text
-
-        Returns:
-            Path to cache file
-        """
-        # Use first 2 characters as subdirectory
-        subdir = self.cache_dir / text_hash[:2]
-        subdir.mkdir(exist_ok=True)
-        return subdir / f"{text_hash}.json"
+        if self.namespace:
+            text = f"{self.namespace}\x00{text}"
+        return hashlib.md5(text.encode('utf-8')).digest()
 
     def get(self, text: str) -> Optional[List[float]]:
         """
@@ -151,41 +236,52 @@ class EmbeddingCache:
             else:
                 print("Cache miss, need to generate embedding")
         """
-        text_hash = self._hash_text(text)
-
-        # Check memory cache first
-        if text_hash in self.memory_cache:
-            self.access_times[text_hash] = datetime.now()
-            self.stats["hits"] += 1
-            logger.debug(f"Memory cache hit for hash {text_hash[:8]}...")
-            return self.memory_cache[text_hash]
+        vector = self.get_many([text])[0]
+        return None if vector is None else vector.tolist()
 
-        # Check file cache
-        if self.enable_file_cache and text_hash in self.file_index:
-            try:
-                cache_file = self._get_cache_file(text_hash)
-                if cache_file.exists():
-                    with open(cache_file, 'r') as f:
-                        data = json.load(f)
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several embeddings at once.
 
-                    embedding = data['embedding']
+        File-tier hits are returned as read-only row views of the memory map, so
+        no vector data is copied until the caller converts it.
 
-                    # Load into memory cache
-                    self._put_memory(text_hash, embedding)
+        Args:
+            texts: Texts to look up
 
-                    self.stats["hits"] += 1
-                    logger.debug(f"File cache hit for hash {text_hash[:8]}...")
-                    return embedding
-            except Exception as e:
-                logger.warning(f"Failed to load from file cache: {e}")
-                # Remove invalid entry from index
-                if text_hash in self.file_index:
-                    del self.file_index[text_hash]
-                    self._save_index()
-
-        # Cache miss
-        self.stats["misses"] += 1
-        return None
+        Returns:
+            One float32 vector (or None on a miss) per input text, in order
+        """
+        if self.enable_file_cache and self.keys_file.exists():
+            if self.keys_file.stat().st_size != self._file_rows * _DIGEST_SIZE:
+                with self._store_lock():
+                    self._refresh_index()
+
+        results: List[Optional[np.ndarray]] = []
+        for text in texts:
+            text_hash = self._hash_text(text)
+
+            # Check memory cache first
+            vector = self.memory_cache.get(text_hash)
+            if vector is not None:
+                self.memory_cache.move_to_end(text_hash)
+                self.stats["hits"] += 1
+                results.append(vector)
+                continue
+
+            # Check file cache
+            row = self.file_index.get(text_hash) if self.enable_file_cache else None
+            if row is not None:
+                vector = self._vector_rows()[row]
+                self._put_memory(text_hash, vector)
+                self.stats["hits"] += 1
+                results.append(vector)
+                continue
+
+            # Cache miss
+            self.stats["misses"] += 1
+            results.append(None)
+        return results
 
     def put(self, text: str, embedding: List[float], metadata: Optional[Dict[str, Any]] = None):
         """
@@ -205,65 +301,172 @@ class EmbeddingCache:
                 metadata={"model": "text-embedding-3-small", "dimensions": 1536}
             )
         """
-        text_hash = self._hash_text(text)
+        self.put_many([text], [embedding], metadata=metadata)
 
-        # Store in memory cache
-        self._put_memory(text_hash, embedding)
+    def put_many(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Store several embeddings with a single append to the vector file.
 
-        # Store in file cache
-        if self.enable_file_cache:
-            try:
-                cache_file = self._get_cache_file(text_hash)
-
-                # Prepare data
-                data = {
-                    "hash": text_hash,
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text,
-                    "text_length": len(text),
-                    "embedding": embedding,
-                    "embedding_dimension": len(embedding),
-                    "cached_at": datetime.now().isoformat(),
-                    "metadata": metadata or {}
-                }
-
-                # Save to file
-                with open(cache_file, 'w') as f:
-                    json.dump(data, f)
-
-                # Update index
-                self.file_index[text_hash] = {
-                    "file": str(cache_file.relative_to(self.cache_dir)),
-                    "cached_at": data["cached_at"],
-                    "text_length": data["text_length"],
-                    "dimension": data["embedding_dimension"]
-                }
-                self._save_index()
-
-                self.stats["saves"] += 1
-                logger.debug(f"Saved embedding to cache (hash: {text_hash[:8]}...)")
+        Args:
+            texts: Original texts
+            embeddings: Embedding vectors, one per text
+            metadata: Optional store-level metadata (e.g. model name) recorded
+                when the store is created; per-entry metadata is not kept
+        """
+        if not texts:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(texts):
+            raise ValueError("put_many expects one embedding vector per text")
 
-            except Exception as e:
-                logger.error(f"Failed to save to file cache: {e}")
+        hashes = [self._hash_text(text) for text in texts]
+        # Only the tail can survive the entry budget; copy rows so cached
+        # entries don't pin the caller's whole batch in memory.
+        tail = max(0, len(hashes) - self.max_memory_size)
+        for text_hash, vector in zip(hashes[tail:], matrix[tail:]):
+            self._put_memory(text_hash, vector.copy())
+
+        if not self.enable_file_cache:
+            return
+
+        try:
+            saved = self._append_hashed(hashes, matrix, metadata)
+            self.stats["saves"] += saved
+            logger.debug(f"Appended {saved} embeddings to cache")
+        except Exception as e:
+            logger.error(f"Failed to save to file cache: {e}")
+
+    def _write_meta(self, metadata: Optional[Dict[str, Any]]):
+        meta = {
+            "version": _STORE_VERSION,
+            "dtype": "float32",
+            "dimension": self.dimension,
+            "namespace": self.namespace,
+            "created_at": datetime.now().isoformat(),
+            "metadata": metadata or {},
+        }
+        with open(self.meta_file, 'w') as f:
+            json.dump(meta, f)
+
+    def _migrate_legacy_json(self):
+        """Import entries from the old one-JSON-file-per-embedding layout once.
 
-    def _put_memory(self, text_hash: str, embedding: List[float]):
+        Legacy keys were plain text hashes, so they only belong to the default
+        namespace; namespaced stores leave the legacy files for it to migrate.
         """
-        Store embedding in memory cache.
+        legacy_index = self.cache_dir / "index.json"
+        if self.namespace or not legacy_index.exists():
+            return
+
+        hashes: List[bytes] = []
+        vectors: List[List[float]] = []
+        legacy_files: List[Path] = []
+        try:
+            with open(legacy_index, 'r') as f:
+                entries = json.load(f)
+            for hex_hash, entry in entries.items():
+                legacy_file = self.cache_dir / entry.get("file", f"{hex_hash[:2]}/{hex_hash}.json")
+                legacy_files.append(legacy_file)
+                try:
+                    with open(legacy_file, 'r') as f:
+                        vectors.append(json.load(f)["embedding"])
+                    hashes.append(bytes.fromhex(hex_hash))
+                except (OSError, ValueError, KeyError):
+                    continue
+            if vectors:
+                self._append_hashed(hashes, np.asarray(vectors, dtype=np.float32))
+                logger.info(f"Migrated {len(vectors)} legacy JSON embeddings")
+        except Exception as e:
+            logger.warning(f"Failed to migrate legacy embedding cache: {e}")
+            return
+
+        # Remove only what index.json referenced, and shard directories left empty
+        legacy_index.unlink(missing_ok=True)
+        shards = set()
+        for legacy_file in legacy_files:
+            legacy_file.unlink(missing_ok=True)
+            if legacy_file.parent != self.cache_dir:
+                shards.add(legacy_file.parent)
+        for shard in shards:
+            try:
+                shard.rmdir()
+            except OSError:
+                pass
+
+    def _append_hashed(
+        self,
+        hashes: Sequence[bytes],
+        matrix: np.ndarray,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Append rows for hashes not yet on disk; returns the number written."""
+        with self._store_lock():
+            self._refresh_index()
+
+            # First occurrence wins for keys repeated within the batch
+            new_rows: Dict[bytes, int] = {}
+            for position, text_hash in enumerate(hashes):
+                if text_hash not in self.file_index and text_hash not in new_rows:
+                    new_rows[text_hash] = position
+            if not new_rows:
+                return 0
+
+            if self.dimension is not None and matrix.shape[1] != self.dimension:
+                logger.warning(
+                    f"Embedding dimension {matrix.shape[1]} does not match cache dimension "
+                    f"{self.dimension} in {self.store_dir}, starting fresh"
+                )
+                self._reset_files()
+            if self.dimension is None:
+                self.dimension = int(matrix.shape[1])
+                self._write_meta(metadata)
+
+            # Place rows after whatever is on disk now, dropping a torn trailing vector
+            start = self._file_rows
+            row_bytes = self.dimension * 4
+            if self.vectors_file.exists() and self.vectors_file.stat().st_size > start * row_bytes:
+                os.truncate(self.vectors_file, start * row_bytes)
+            with open(self.vectors_file, 'ab') as f:
+                np.ascontiguousarray(matrix[list(new_rows.values())]).tofile(f)
+            with open(self.keys_file, 'ab') as f:
+                f.write(b"".join(new_rows))
+
+            for offset, text_hash in enumerate(new_rows):
+                self.file_index[text_hash] = start + offset
+            self._file_rows = start + len(new_rows)
+            return len(new_rows)
+
+    def _put_memory(self, text_hash: bytes, embedding: np.ndarray):
+        """
+        Store embedding in the memory tier, evicting least recently used entries.
 
         Args:
             text_hash: Hash of text
             embedding: Embedding vector
         """
-        # Evict oldest entry if cache is full
-        if len(self.memory_cache) >= self.max_memory_size:
-            if self.access_times:
-                oldest_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
-                if oldest_key in self.memory_cache:
-                    del self.memory_cache[oldest_key]
-                if oldest_key in self.access_times:
-                    del self.access_times[oldest_key]
+        previous = self.memory_cache.pop(text_hash, None)
+        if previous is not None:
+            self.memory_bytes -= previous.nbytes
+
+        if self.max_memory_size <= 0 or (
+            self.max_memory_bytes is not None and embedding.nbytes > self.max_memory_bytes
+        ):
+            return
 
         self.memory_cache[text_hash] = embedding
-        self.access_times[text_hash] = datetime.now()
+        self.memory_bytes += embedding.nbytes
+
+        while len(self.memory_cache) > self.max_memory_size or (
+            self.max_memory_bytes is not None and self.memory_bytes > self.max_memory_bytes
+        ):
+            _, evicted = self.memory_cache.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+            self.stats["evictions"] += 1
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -284,9 +487,12 @@ class EmbeddingCache:
             "hits": self.stats["hits"],
             "misses": self.stats["misses"],
             "saves": self.stats["saves"],
+            "evictions": self.stats["evictions"],
             "hit_rate": hit_rate,
             "memory_entries": len(self.memory_cache),
             "max_memory_size": self.max_memory_size,
+            "memory_bytes": self.memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
             "total_file_entries": len(self.file_index) if self.enable_file_cache else 0,
             "cache_dir": str(self.cache_dir) if self.enable_file_cache else None
         }
@@ -301,7 +507,7 @@ class EmbeddingCache:
             cache.clear_memory()  # Free up memory but keep persistent cache
         """
         self.memory_cache.clear()
-        self.access_times.clear()
+        self.memory_bytes = 0
         logger.info("Cleared memory cache")
 
     def clear_all(self):
@@ -319,22 +525,23 @@ class EmbeddingCache:
         # Clear file cache
         if self.enable_file_cache:
             try:
-                # Remove all cache files
-                for hash_key in list(self.file_index.keys()):
-                    cache_file = self._get_cache_file(hash_key)
-                    if cache_file.exists():
-                        cache_file.unlink()
-
-                # Clear index
-                self.file_index = {}
-                self._save_index()
-
+                with self._store_lock():
+                    self._reset_files()
                 logger.warning("⚠️  Cleared all cache files")
             except Exception as e:
                 logger.error(f"Failed to clear file cache: {e}")
 
         # Reset stats
-        self.stats = {"hits": 0, "misses": 0, "saves": 0}
+        self.stats = {"hits": 0, "misses": 0, "saves": 0, "evictions": 0}
+
+    def _reset_files(self):
+        self._vectors = None
+        self.file_index = {}
+        self._file_rows = 0
+        self.dimension = None
+        for path in (self.vectors_file, self.keys_file, self.meta_file):
+            if path.exists():
+                path.unlink()
 
     def get_size_estimate(self) -> Dict[str, Any]:
         """
@@ -350,17 +557,12 @@ class EmbeddingCache:
         if not self.enable_file_cache:
             return {"file_count": 0, "size_mb": 0.0}
 
-        total_size = 0
-        file_count = 0
-
         try:
-            for cache_file in self.cache_dir.rglob("*.json"):
-                if cache_file != self.index_file:
-                    total_size += cache_file.stat().st_size
-                    file_count += 1
+            files = [p for p in (self.vectors_file, self.keys_file, self.meta_file) if p.exists()]
+            total_size = sum(os.path.getsize(p) for p in files)
 
             return {
-                "file_count": file_count,
+                "file_count": len(files),
                 "size_bytes": total_size,
                 "size_mb": total_size / (1024 * 1024)
             }
@@ -415,9 +617,8 @@ if __name__ == "__main__":
     ]
 
     # Save some embeddings
-    for i, text in enumerate(texts):
-        fake_embedding = [float(i)] * 1536
-        cache.put(text, fake_embedding, metadata={"model": "test"})
+    fake_embeddings = [[float(i)] * 1536 for i in range(len(texts))]
+    cache.put_many(texts, fake_embeddings, metadata={"model": "test"})
 
     # Try to retrieve
     for text in texts:
@@ -0,0 +1,129 @@
+"""Chunk embeddings as one memory-mapped matrix next to ``chunks.jsonl``.
+
+``chunks.jsonl`` keeps each embedding as a JSON list, which costs tens of kilobytes per
+chunk once parsed into Python floats. Ingestion also writes the embeddings as a single
+unit-normalized ``embeddings.npy`` (float16 by default) plus the matching chunk IDs, so
+retrieval can map the matrix read-only and share its pages across worker processes.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+CHUNKS_FILE = "chunks.jsonl"
+MATRIX_FILE = "embeddings.npy"
+IDS_FILE = "embedding_ids.json"
+
+
+def _source_fingerprint(output_root: Path) -> List[int] | None:
+    try:
+        stat = (output_root / CHUNKS_FILE).stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_embedding_matrix(
+    output_root: Path,
+    ids: Sequence[str],
+    embeddings: Sequence[Sequence[float]] | np.ndarray,
+    *,
+    dtype: str = "float16",
+) -> Path:
+    """Store unit-normalized ``embeddings`` (one row per ID) for :func:`load_embedding_matrix`.
+
+    Call after ``chunks.jsonl`` is written: the IDs file records its size and mtime so a
+    later ingestion run invalidates the matrix.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = (matrix / np.maximum(norms, 1e-12)).astype(dtype)
+
+    output_root.mkdir(parents=True, exist_ok=True)
+    path = output_root / MATRIX_FILE
+    # Write-then-rename so processes mapping the old matrix keep a consistent file
+    with tempfile.NamedTemporaryFile(dir=output_root, suffix=".npy.tmp", delete=False) as tmp:
+        np.save(tmp, matrix)
+    os.replace(tmp.name, path)
+    _write_json(
+        output_root / IDS_FILE,
+        {"ids": list(ids), "source": _source_fingerprint(output_root)},
+    )
+    return path
+
+
+def load_embedding_matrix(
+    output_root: Path, *, dtype: str = "float16"
+) -> Tuple[List[str], np.ndarray] | None:
+    """Chunk IDs and the read-only mapped matrix, or ``None`` without embeddings.
+
+    A missing or stale matrix is rebuilt from ``chunks.jsonl`` once, streaming the file
+    so no ``Chunk`` objects are created.
+    """
+    meta = _read_json(output_root / IDS_FILE)
+    fingerprint = _source_fingerprint(output_root)
+    current = (
+        meta is not None
+        and (output_root / MATRIX_FILE).exists()
+        and (fingerprint is None or meta.get("source") == fingerprint)
+    )
+    if not current:
+        if fingerprint is None:
+            return None
+        rebuilt = _rebuild_from_chunks(output_root, dtype)
+        if rebuilt is None:
+            return None
+        meta = _read_json(output_root / IDS_FILE)
+    matrix = np.load(output_root / MATRIX_FILE, mmap_mode="r")
+    if matrix.shape[0] != len(meta["ids"]):
+        # Caught between another process's matrix and IDs writes
+        LOGGER.warning("Embedding matrix and IDs disagree; rebuilding from %s", CHUNKS_FILE)
+        if fingerprint is None or _rebuild_from_chunks(output_root, dtype) is None:
+            return None
+        meta = _read_json(output_root / IDS_FILE)
+        matrix = np.load(output_root / MATRIX_FILE, mmap_mode="r")
+    return list(meta["ids"]), matrix
+
+
+def _rebuild_from_chunks(output_root: Path, dtype: str) -> Path | None:
+    ids: List[str] = []
+    rows: List[np.ndarray] = []
+    with (output_root / CHUNKS_FILE).open("r", encoding="utf-8") as fin:
+        for line in fin:
+            payload = json.loads(line)
+            embedding = payload.get("embedding")
+            if embedding:
+                ids.append(payload["chunk_id"])
+                rows.append(np.asarray(embedding, dtype=np.float32))
+    if not rows:
+        return None
+    LOGGER.info("Building embedding matrix for %s chunks from %s", len(ids), CHUNKS_FILE)
+    return write_embedding_matrix(output_root, ids, np.stack(rows), dtype=dtype)
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        with path.open("r", encoding="utf-8") as fin:
+            return json.load(fin)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".json.tmp", delete=False, encoding="utf-8"
+    ) as tmp:
+        json.dump(payload, tmp)
+    os.replace(tmp.name, path)
+
+
+__all__ = ["load_embedding_matrix", "write_embedding_matrix"]
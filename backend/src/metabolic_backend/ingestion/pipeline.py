@@ -12,6 +12,7 @@ from typing import Iterable, Iterator, List
 from ..config import get_settings
 from ..embeddings import OpenAIEmbeddings
 from .chunking import ChunkingConfig, SemanticChunker
+from .embedding_matrix import write_embedding_matrix
 from .models import Chunk
 from .stores import ChromaVectorStore, GraphitiWriter
 
@@ -46,6 +47,8 @@ class IngestionPipeline:
         self.output_root = cache_root / "vector_store"
         self.output_root.mkdir(parents=True, exist_ok=True)
 
+        self.embedding_dtype = settings.embedding_store_dtype
+
         self.chunker = SemanticChunker(chunk_config)
         self.embedding_client = embedding_client or OpenAIEmbeddings(
             model=settings.embedding_model
@@ -102,6 +105,12 @@ class IngestionPipeline:
         with output_path.open("w", encoding="utf-8") as fout:
             for chunk in chunks:
                 fout.write(json.dumps(chunk.as_record(), ensure_ascii=False) + "\n")
+        write_embedding_matrix(
+            self.output_root,
+            [chunk.chunk_id for chunk in chunks],
+            embeddings,
+            dtype=self.embedding_dtype,
+        )
 
         vector_records = 0
         if self.use_vector_store:
@@ -151,8 +160,31 @@ class IngestionPipeline:
             return path.name
 
 
+_EMBEDDING_FIELD = ', "embedding": ['
+
+
+def _strip_embedding(line: str) -> str:
+    """Drop the embedding list from a ``chunks.jsonl`` line before it is parsed.
+
+    ``Chunk.as_record`` writes the list of numbers after the text, so the first unescaped
+    ``"embedding": [`` is the field itself and the next ``]`` closes it. Lines in any
+    other shape are returned unchanged.
+    """
+    start = line.find(_EMBEDDING_FIELD)
+    if start < 0:
+        return line
+    end = line.find("]", start + len(_EMBEDDING_FIELD))
+    if end < 0:
+        return line
+    return line[:start] + line[end + 1:]
+
+
 def iter_chunks() -> Iterator[Chunk]:
-    """Utility generator yielding chunks from the current cache."""
+    """Utility generator yielding chunks from the current cache.
+
+    Embeddings are left out: retrieval reads them from the mapped embedding matrix, and
+    as Python float lists they would dominate the memory of a loaded corpus.
+    """
 
     settings = get_settings()
     cache_path = settings.cache_root / "vector_store" / "chunks.jsonl"
@@ -162,9 +194,10 @@ def iter_chunks() -> Iterator[Chunk]:
     def _load() -> Iterable[Chunk]:
         with cache_path.open("r", encoding="utf-8") as fin:
             for line in fin:
-                payload = json.loads(line)
+                payload = json.loads(_strip_embedding(line))
                 if "metadata" not in payload:
                     payload["metadata"] = {}
+                payload["embedding"] = None
                 yield Chunk(**payload)
 
     return iter(_load())
@@ -28,16 +28,25 @@ class LatencyStats:
 class LatencyMonitor:
     def __init__(self) -> None:
         self._stats: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self._counts: Dict[str, int] = defaultdict(int)
         self._lock = threading.Lock()
 
     def record(self, stage: str, duration: float) -> None:
         with self._lock:
             self._stats[stage].record(duration)
 
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
     def snapshot(self) -> Dict[str, Dict[str, float]]:
         with self._lock:
             return {stage: stats.summary() for stage, stats in self._stats.items()}
 
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
 
 monitor = LatencyMonitor()
 
@@ -49,3 +58,12 @@ def record_latency(stage: str, duration: float) -> None:
 def latency_summary() -> Dict[str, Dict[str, float]]:
     return monitor.snapshot()
 
+
+def record_count(name: str, amount: int = 1) -> None:
+    """Count an event (cache hits, coalesced requests) next to the latency stats."""
+    monitor.count(name, amount)
+
+
+def count_summary() -> Dict[str, int]:
+    return monitor.counts()
+
@@ -55,6 +55,7 @@ def serialize_retrieval_output(output: RetrievalOutput) -> Dict[str, Any]:
             "answerOverride": output.safety.answer_override,
         },
         "timings": {stage: value for stage, value in output.timings.items()},
+        "cutStages": list(output.cut_stages),
         "evidence": [
             {
                 "chunk_id": chunk.chunk_id,
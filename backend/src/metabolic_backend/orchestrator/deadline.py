@@ -0,0 +1,50 @@
+"""Per-request time budget that bounds the optional stages of live retrieval."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+# Counselors expect a live answer within this many seconds
+DEFAULT_LIVE_DEADLINE_SECONDS = 5.0
+
+# Largest fraction of the budget each cuttable stage may spend
+STAGE_SHARES: Dict[str, float] = {
+    # Embedding the question for the response cache; retrieval reuses the embedding
+    "response_cache": 0.1,
+    "rewrite": 0.15,
+    "decompose": 0.15,
+    "retrieval_graph": 0.4,
+    "subquestions": 0.4,
+}
+
+# Fraction of the budget held back so synthesis always gets to run
+SYNTHESIS_RESERVE = 0.3
+
+
+@dataclass(slots=True, frozen=True)
+class Deadline:
+    """Wall-clock budget of one live request, measured on ``time.perf_counter``."""
+
+    started_at: float
+    budget: float
+
+    @classmethod
+    def start(cls, budget: float = DEFAULT_LIVE_DEADLINE_SECONDS) -> "Deadline":
+        return cls(started_at=time.perf_counter(), budget=budget)
+
+    def remaining(self) -> float:
+        return max(0.0, self.started_at + self.budget - time.perf_counter())
+
+    def stage_end(self, stage: str) -> float:
+        """``perf_counter`` time by which ``stage`` must finish if it starts now.
+
+        A stage gets its share of the whole budget but never runs into the synthesis
+        reserve, so late stages get whatever is left before it.
+        """
+        cutoff = self.started_at + self.budget * (1.0 - SYNTHESIS_RESERVE)
+        return min(time.perf_counter() + self.budget * STAGE_SHARES[stage], cutoff)
+
+
+__all__ = ["DEFAULT_LIVE_DEADLINE_SECONDS", "Deadline", "STAGE_SHARES", "SYNTHESIS_RESERVE"]
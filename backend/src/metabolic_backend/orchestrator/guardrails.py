@@ -34,6 +34,11 @@ _ACCOUNT_PATTERN = re.compile(r"\b\d{3,4}-\d{3,4}-\d{3,4}\b")
 _NAME_TAG_PATTERN = re.compile(r"(?:이름|성명)\s*[:：]\s*[가-힣]{2,4}")
 _PATTERNS = [_EMAIL_PATTERN, _PHONE_PATTERN, _RRN_PATTERN, _ACCOUNT_PATTERN, _NAME_TAG_PATTERN]
 
+# Streamed text within this many trailing characters is never released, so a PII token that is
+# still arriving cannot leak before it becomes matchable.
+_STREAM_HOLDBACK = 64
+_WHITESPACE_PATTERN = re.compile(r"\s")
+
 
 def build_safety_envelope(analysis: QuestionAnalysisResult) -> SafetyEnvelope:
     """Map classifier output to counselor-facing guardrail messaging."""
@@ -77,6 +82,47 @@ def scrub_text(value: str) -> str:
     return scrubbed
 
 
+class StreamingScrubber:
+    """Incrementally scrub PII from streamed LLM output.
+
+    Text is released only up to a whitespace boundary outside the trailing holdback window and
+    never in the middle of a match, so the concatenated output equals ``scrub_text`` of the
+    full stream.
+    """
+
+    def __init__(self, holdback: int = _STREAM_HOLDBACK) -> None:
+        self._holdback = holdback
+        self._buffer = ""
+
+    def feed(self, text: str) -> str:
+        """Buffer ``text`` and return the scrubbed prefix that is safe to emit."""
+
+        self._buffer += text
+        limit = len(self._buffer) - self._holdback
+        if limit <= 0:
+            return ""
+
+        cut = 0
+        for match in _WHITESPACE_PATTERN.finditer(self._buffer, 0, limit):
+            cut = match.end()
+        if not cut:
+            return ""
+
+        for pattern in _PATTERNS:
+            for match in pattern.finditer(self._buffer):
+                if match.start() < cut < match.end():
+                    cut = match.start()
+
+        released, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return scrub_text(released)
+
+    def flush(self) -> str:
+        """Return the scrubbed remainder once the stream has finished."""
+
+        released, self._buffer = self._buffer, ""
+        return scrub_text(released)
+
+
 def scrub_observations(observations: Sequence) -> List:
     """Scrub PII from trace events to keep counselor timeline compliant."""
 
@@ -0,0 +1,112 @@
+"""Background event loop that lets blocking callers drive coroutines."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import AsyncIterator, Coroutine, Iterator, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Marks the end of an iterated stream in the hand-off queue
+_DONE = object()
+
+
+class LoopThread:
+    """Run coroutines for sync callers on one long-lived event loop thread.
+
+    Sync entry points submit their coroutine here and block on the result, so they share
+    the async implementation (and its connection pools, which are tied to the loop that
+    created them) instead of keeping a threaded twin. The loop starts on first use;
+    ``close`` cancels whatever is still running and stops it, and a later call starts a
+    fresh one.
+    """
+
+    def __init__(self, name: str = "loop") -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def submit(self, coro: Coroutine[object, object, T]) -> Future:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name=self.name, daemon=True
+                )
+                self._thread.start()
+            if threading.current_thread() is self._thread:
+                coro.close()
+                raise RuntimeError(f"{self.name}: blocking call from its own loop thread")
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine[object, object, T]) -> T:
+        """Run ``coro`` on the loop and block until it finishes."""
+        return self.submit(coro).result()
+
+    def iterate(self, stream: AsyncIterator[T]) -> Iterator[T]:
+        """Consume ``stream`` on the loop, yielding its items to the calling thread.
+
+        The stream runs as one task, so context set by one step is seen by the next.
+        Closing the returned iterator early cancels the task.
+        """
+        items: queue.SimpleQueue = queue.SimpleQueue()
+
+        async def pump() -> None:
+            try:
+                async for item in stream:
+                    items.put((item, None))
+            except Exception as exc:
+                items.put((_DONE, exc))
+            else:
+                items.put((_DONE, None))
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item, error = items.get()
+                if item is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        """Cancel pending work and stop the loop. Idempotent."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), loop).result(timeout=5)
+        except Exception as exc:  # pragma: no cover - best effort cleanup
+            LOGGER.debug("%s: cancelling pending tasks failed (%s)", self.name, exc)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            if not thread.is_alive():
+                loop.close()
+
+    @staticmethod
+    async def _cancel_all() -> None:
+        # Blocked callers see CancelledError instead of waiting on a stopped loop
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+__all__ = ["LoopThread"]
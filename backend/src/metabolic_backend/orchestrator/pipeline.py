@@ -3,32 +3,82 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
+import operator
 import os
 import time
-from dataclasses import dataclass, field, replace
+from dataclasses import asdict, dataclass, field, replace
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Sequence
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypedDict,
+    TypeVar,
+)
 
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
 
 from ..analysis import QuestionAnalyzer, QuestionAnalysisResult, SafetyLevel
-from ..cache import FAQCache
+from ..analysis.tokenizer import normalize, tokenize
+from ..cache import FAQCache, PreparationCache, ResponseCache
 from ..embeddings import OpenAIEmbeddings
 from ..ingestion import Chunk, IngestionPipeline, iter_chunks
+from ..patient_data import (
+    PatientContextBuilder,
+    patient_data_version,
+    patient_id_from_context,
+)
 from ..providers import get_main_llm, get_small_llm
 from langchain_core.messages import HumanMessage
+from .deadline import DEFAULT_LIVE_DEADLINE_SECONDS, Deadline
 from .guardrails import (
     SafetyEnvelope,
+    StreamingScrubber,
     append_caution_guidance,
     build_safety_envelope,
     scrub_observations,
     scrub_text,
 )
+from .loop_thread import LoopThread
+from .singleflight import SingleFlight
 from ..retrievers import GraphRetriever, VectorRetriever
 
 LOGGER = logging.getLogger(__name__)
 
+# Reciprocal-rank-fusion damping constant (Cormack et al. use 60)
+_RRF_K = 60
+
+_T = TypeVar("_T")
+
+# Part of a retrieval stage held back so a retriever that gives up on its remote store
+# can still answer from its local fallback before the stage is cut
+_FALLBACK_MARGIN_SECONDS = 0.1
+
+# Evidence chunks retrieved per expected question in preparation mode
+_ANSWER_EVIDENCE_K = 5
+_FALLBACK_ANSWER = "근거 자료를 바탕으로 생활습관 개선을 권장합니다."
+
+# Part of the preparation cache key; bump whenever the preparation prompts or the
+# PreparationAnalysis shape change so reports built by older prompts are not served
+PREP_PROMPT_VERSION = "1"
+
+# Branches of the preparation DAG and the stages each runs in sequence
+_PREP_BRANCHES: Dict[str, Tuple[str, ...]] = {
+    "patient": ("prep_patient_analysis", "prep_delivery_examples"),
+    "history": ("prep_history_analysis",),
+    "questions": ("prep_question_generation", "prep_answer_preparation"),
+}
+
 
 @dataclass(slots=True)
 class PatientStateAnalysis:
@@ -92,6 +142,56 @@ class RetrievalOutput:
     timings: Dict[str, float]
     evidence: List[Chunk] = field(default_factory=list)
     preparation_analysis: PreparationAnalysis | None = None
+    cut_stages: List[str] = field(default_factory=list)  # Stages dropped to meet the deadline
+
+
+@dataclass(slots=True)
+class _CacheSlot:
+    """Where a freshly generated output is stored once the graph finishes."""
+
+    preparation: tuple[str, str | None] | None = None  # preparation cache key, data version
+    response_key: List[float] | None = None  # question embedding for the response cache
+
+
+class PipelineState(TypedDict, total=False):
+    """LangGraph state shared by live and preparation nodes.
+
+    Nodes return only the keys they change. The list channels are ``Annotated`` with an
+    append reducer, so a node contributes just its new observations, timings and cut stages
+    instead of copying the accumulated lists.
+    """
+
+    question: str
+    context: str | None
+    mode: str
+    deadline: Deadline
+    stream_tokens: bool
+    timings: Dict[str, float]
+    observations: Annotated[List[Dict[str, str]], operator.add]
+    _timing_entries: Annotated[List[Tuple[str, float]], operator.add]
+    cut_stages: Annotated[List[str], operator.add]
+    # Live mode
+    analysis: QuestionAnalysisResult
+    safety: SafetyEnvelope
+    strategy: str
+    strategy_config: Dict[str, object]
+    rewritten_question: str
+    # Embedding of the normalized question, when the response cache lookup computed one
+    question_embedding: List[float]
+    speculation: tuple | None
+    vector_results: List[Chunk]
+    graph_results: List[Chunk]
+    subquestions: List[str]
+    evidence: List[Chunk]
+    answer: str
+    citations: List[dict]
+    # Preparation mode
+    patient_state: PatientStateAnalysis
+    consultation_pattern: ConsultationPattern | None
+    expected_questions_text: List[str]
+    expected_questions: List[ExpectedQuestion]
+    delivery_examples: List[DeliveryExample]
+    preparation_analysis: PreparationAnalysis
 
 
 class RetrievalPipeline:
@@ -111,6 +211,15 @@ class RetrievalPipeline:
         self.default_vector_top_k = int(os.getenv("VECTOR_TOP_K", "3"))
         self.graph_top_k = int(os.getenv("GRAPH_TOP_K", "5"))
         self.max_evidence = int(os.getenv("EVIDENCE_LIMIT", "5"))
+        # Concurrent small-LLM calls when answering expected questions in preparation mode
+        self.prep_llm_concurrency = int(os.getenv("PREP_LLM_CONCURRENCY", "4"))
+        # Minimum token Jaccard between raw and rewritten question for the raw-question
+        # search started alongside the rewrite to be kept; above 1 disables speculation
+        self.speculation_threshold = float(os.getenv("SPECULATION_JACCARD_THRESHOLD", "0.5"))
+        # Live-mode SLA in seconds; 0 disables deadline enforcement
+        self.live_deadline_seconds = float(
+            os.getenv("LIVE_DEADLINE_SECONDS", str(DEFAULT_LIVE_DEADLINE_SECONDS))
+        )
 
         # Initialize FAQ cache
         cache_dir = Path(os.getenv("CACHE_DIR", ".cache/backend"))
@@ -122,6 +231,33 @@ class RetrievalPipeline:
             self.faq_cache.populate_defaults()
             LOGGER.info("Initialized FAQ cache with default entries")
 
+        # Server-side patient contexts for requests that send only a patient_id
+        self.patient_context = PatientContextBuilder(
+            max_tokens=int(os.getenv("PATIENT_CONTEXT_MAX_TOKENS", "600"))
+        )
+
+        # Preparation reports survive restarts; see _preparation_cache_slot for the key
+        self.prep_cache: PreparationCache | None = None
+        if os.getenv("DISABLE_PREP_CACHE") is None:
+            self.prep_cache = PreparationCache(
+                cache_dir / "preparation",
+                max_entries=int(os.getenv("PREP_CACHE_MAX_ENTRIES", "500")),
+            )
+
+        # Concurrent identical run/arun calls share one execution
+        self._inflight: SingleFlight[RetrievalOutput] | None = None
+        if os.getenv("DISABLE_REQUEST_COALESCING") is None:
+            self._inflight = SingleFlight("request")
+
+        # Generated live answers, reused for near-identical questions; opt-in
+        self.response_cache: ResponseCache | None = None
+        if os.getenv("ENABLE_RESPONSE_CACHE") is not None:
+            self.response_cache = ResponseCache(
+                similarity_threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95")),
+                ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+                max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+            )
+
         self._chunks = list(chunks) if chunks is not None else list(iter_chunks())
         disable_ingestion = os.getenv("DISABLE_INGESTION") is not None
         if not self._chunks and not disable_ingestion:
@@ -147,6 +283,7 @@ class RetrievalPipeline:
                     metadata={"document_id": "fallback"},
                 )
             ]
+        self.corpus_version = os.getenv("CORPUS_VERSION") or self._corpus_fingerprint(self._chunks)
 
         vector_persist_dir = None
         if os.getenv("USE_VECTOR_DB") is not None and os.getenv("DISABLE_VECTOR_DB") is None:
@@ -169,28 +306,37 @@ class RetrievalPipeline:
             password=os.getenv("NEO4J_PASSWORD"),
         )
 
+        # Sync entry points (run, stream) drive the graph on this background event loop
+        self._loop = LoopThread("pipeline")
+
         self._graph = self._build_graph()
 
     # ------------------------------------------------------------------
     def _build_graph(self):
-        graph = StateGraph(dict)
-        # Existing live mode nodes
-        graph.add_node("analysis", self._node_analyze)
-        graph.add_node("safety", self._node_safety)
-        graph.add_node("rewrite", self._node_rewrite)
-        graph.add_node("decompose", self._node_decompose)
-        graph.add_node("vector", self._node_vector_retrieval)
-        graph.add_node("graph", self._node_graph_retrieval)
-        graph.add_node("merge", self._node_merge_evidence)
-        graph.add_node("synthesize", self._node_synthesize)
-
-        # NEW: Preparation mode nodes
-        graph.add_node("prep_analyze_patient", self._node_prep_analyze_patient)
-        graph.add_node("prep_analyze_history", self._node_prep_analyze_history)
-        graph.add_node("prep_generate_questions", self._node_prep_generate_questions)
-        graph.add_node("prep_prepare_answers", self._node_prep_prepare_answers)
-        graph.add_node("prep_delivery_examples", self._node_prep_delivery_examples)
-        graph.add_node("prep_synthesize", self._node_prep_synthesize)
+        nodes = {
+            # Existing live mode nodes
+            "analysis": self._node_analyze,
+            "safety": self._node_safety,
+            "rewrite": self._node_rewrite,
+            "decompose": self._node_decompose,
+            "vector": self._node_vector_retrieval,
+            "graph": self._node_graph_retrieval,
+            "hybrid": self._node_hybrid_retrieval,
+            "merge": self._node_merge_evidence,
+            "synthesize": self._node_synthesize,
+            # NEW: Preparation mode nodes
+            "prep_analyze_patient": self._node_prep_analyze_patient,
+            "prep_analyze_history": self._node_prep_analyze_history,
+            "prep_generate_questions": self._node_prep_generate_questions,
+            "prep_prepare_answers": self._node_prep_prepare_answers,
+            "prep_delivery_examples": self._node_prep_delivery_examples,
+            "prep_synthesize": self._node_prep_synthesize,
+        }
+
+        graph = StateGraph(PipelineState)
+        for name, node in nodes.items():
+            # I/O-bound nodes are coroutines; the CPU-only rest run inline on the loop
+            graph.add_node(name, self._as_async_node(node))
 
         graph.set_entry_point("analysis")
         graph.add_edge("analysis", "safety")
@@ -202,7 +348,8 @@ class RetrievalPipeline:
             {
                 "escalate": END,
                 "proceed_live": "rewrite",
-                "proceed_prep": "prep_analyze_patient",
+                "prep_patient": "prep_analyze_patient",
+                "prep_history": "prep_analyze_history",
             },
         )
 
@@ -210,7 +357,7 @@ class RetrievalPipeline:
         graph.add_conditional_edges(
             "rewrite",
             self._route_post_rewrite,
-            {"vector": "vector", "decompose": "decompose", "graph": "graph"},
+            {"vector": "vector", "decompose": "decompose", "graph": "graph", "hybrid": "hybrid"},
         )
         graph.add_conditional_edges(
             "vector",
@@ -218,70 +365,433 @@ class RetrievalPipeline:
             {"graph": "graph", "merge": "merge"},
         )
         graph.add_edge("graph", "merge")
+        graph.add_edge("hybrid", "merge")
         graph.add_edge("merge", "synthesize")
         graph.add_edge("decompose", "synthesize")
 
-        # NEW: Preparation mode flow
-        graph.add_edge("prep_analyze_patient", "prep_analyze_history")
-        graph.add_edge("prep_analyze_history", "prep_generate_questions")
+        # Preparation mode DAG: patient and history analysis run side by side, question
+        # generation joins both, delivery examples only need the patient state
+        graph.add_edge(["prep_analyze_patient", "prep_analyze_history"], "prep_generate_questions")
+        graph.add_edge("prep_analyze_patient", "prep_delivery_examples")
         graph.add_edge("prep_generate_questions", "prep_prepare_answers")
-        graph.add_edge("prep_prepare_answers", "prep_delivery_examples")
-        graph.add_edge("prep_delivery_examples", "prep_synthesize")
+        graph.add_edge(["prep_prepare_answers", "prep_delivery_examples"], "prep_synthesize")
         graph.add_edge("prep_synthesize", END)
 
         return graph.compile()
 
+    @staticmethod
+    def _as_async_node(node: Callable[[PipelineState], PipelineState]):
+        """Wrap CPU-only sync nodes so the graph never hops to a worker thread."""
+        if asyncio.iscoroutinefunction(node):
+            return node
+
+        async def _run(state: PipelineState) -> PipelineState:
+            return node(state)
+
+        _run.__name__ = getattr(node, "__name__", "node")
+        return _run
+
     # ------------------------------------------------------------------
     def run(
         self, question: str, *, context: str | None = None, mode: str = "live"
     ) -> RetrievalOutput:
+        """Blocking :meth:`arun`, executed on the pipeline's background event loop."""
+        return self._loop.run(self.arun(question, context=context, mode=mode))
+
+    def stream(
+        self, question: str, *, context: str | None = None, mode: str = "live"
+    ) -> Iterator[dict]:
+        """Blocking :meth:`astream`, executed on the pipeline's background event loop."""
+        return self._loop.iterate(self.astream(question, context=context, mode=mode))
+
+    def stream_with_result(
+        self,
+        question: str,
+        *,
+        context: str | None = None,
+        mode: str = "live",
+        stream_tokens: bool = False,
+    ) -> Iterator[tuple[str, object]]:
+        """Blocking :meth:`astream_with_result`, executed on the background event loop."""
+        return self._loop.iterate(
+            self.astream_with_result(
+                question, context=context, mode=mode, stream_tokens=stream_tokens
+            )
+        )
+
+    async def arun(
+        self, question: str, *, context: str | None = None, mode: str = "live"
+    ) -> RetrievalOutput:
+        """Run the graph for ``question`` and assemble its output.
+
+        Concurrent identical requests share one execution, and live questions may be
+        answered from the FAQ or response cache without running the graph at all.
+        """
+        if self._inflight is None:
+            return await self._arun(question, context, mode)
+        return await self._inflight.ado(
+            self._flight_key(question, context, mode),
+            partial(self._arun, question, context, mode),
+        )
+
+    async def _arun(self, question: str, context: str | None, mode: str) -> RetrievalOutput:
         start_total = time.perf_counter()
 
-        # Check FAQ cache for live mode (skip for preparation mode)
+        cached_output, slot, initial_state = await self._lookup_caches(
+            question, context, mode, start_total
+        )
+        if cached_output is not None:
+            return cached_output
+
+        state = await self._graph.ainvoke(initial_state)
+        output = self._build_output(state, mode=mode, start_total=start_total)
+        if slot is not None:
+            await asyncio.to_thread(self._store_caches, slot, output)
+        return output
+
+    async def astream(self, question: str, *, context: str | None = None, mode: str = "live"):
+        """Stream LangGraph node updates in real-time for AG-UI protocol."""
+        initial_state = self._initial_state(question, context, mode)
+
+        # LangGraph .astream() yields {node_name: node_output} for each node
+        async for chunk in self._graph.astream(initial_state):
+            yield chunk
+
+    async def astream_with_result(
+        self,
+        question: str,
+        *,
+        context: str | None = None,
+        mode: str = "live",
+        stream_tokens: bool = False,
+    ) -> AsyncIterator[tuple[str, object]]:
+        """Stream node updates and finish with the final output from the same execution.
+
+        Yields ``("update", {node_name: node_output})`` for every LangGraph step, followed by
+        exactly one ``("complete", RetrievalOutput)`` assembled from the accumulated state.
+
+        With ``stream_tokens`` enabled in live mode, scrubbed synthesis deltas are yielded as
+        ``("token", text)`` while the answer is generated. Any text the final answer adds after
+        the streamed prefix (citation references, caution guidance) is yielded as a last token,
+        so the tokens concatenate to ``RetrievalOutput.answer``.
+        """
+        start_total = time.perf_counter()
+        stream_tokens = stream_tokens and mode == "live"
+
+        cached_output, slot, initial_state = await self._lookup_caches(
+            question, context, mode, start_total
+        )
+        if cached_output is not None:
+            if stream_tokens and cached_output.answer:
+                yield "token", cached_output.answer
+            yield "complete", cached_output
+            return
+
+        stream_modes = ["updates", "values"]
+        if stream_tokens:
+            initial_state["stream_tokens"] = True
+            stream_modes.append("custom")
+
+        final_state: dict = {}
+        streamed: List[str] = []
+        async for stream_mode, chunk in self._graph.astream(
+            initial_state, stream_mode=stream_modes
+        ):
+            if stream_mode == "updates":
+                yield "update", chunk
+            elif stream_mode == "custom":
+                token = chunk.get("token") if isinstance(chunk, dict) else None
+                if token:
+                    streamed.append(token)
+                    yield "token", token
+            else:
+                # "values" carries the full state after each step; keep the latest snapshot
+                final_state = chunk
+
+        output = self._build_output(final_state, mode=mode, start_total=start_total)
+        if slot is not None:
+            await asyncio.to_thread(self._store_caches, slot, output)
+        for event in self._completion_events(output, streamed if stream_tokens else None):
+            yield event
+
+    @staticmethod
+    def _completion_events(
+        output: RetrievalOutput, streamed: List[str] | None
+    ) -> Iterator[tuple[str, object]]:
+        if streamed is not None:
+            prefix = "".join(streamed)
+            if output.answer.startswith(prefix) and len(output.answer) > len(prefix):
+                yield "token", output.answer[len(prefix):]
+        yield "complete", output
+
+    # ------------------------------------------------------------------
+    def _initial_state(self, question: str, context: str | None, mode: str) -> PipelineState:
+        state: PipelineState = {
+            "question": question,
+            "context": context,
+            "mode": mode,
+            "observations": [],
+            "timings": {},
+        }
+        if mode == "live" and self.live_deadline_seconds > 0:
+            state["deadline"] = Deadline.start(self.live_deadline_seconds)
+        return state
+
+    async def _lookup_caches(
+        self, question: str, context: str | None, mode: str, start_total: float
+    ) -> tuple[RetrievalOutput | None, _CacheSlot | None, PipelineState]:
+        """Check the FAQ and response caches (live) or the preparation cache.
+
+        Also returns the slot a fresh result should be stored under (``None`` when nothing
+        will be cached) and the initial state for running the graph on a miss.
+        """
+        # SQLite reads and cache file I/O stay off the event loop
+        cached, slot = await asyncio.to_thread(
+            self._lookup_stored_caches, question, context, mode, start_total
+        )
+        state = self._initial_state(question, context, mode)
+        if cached is None and mode == "live" and self.response_cache is not None:
+            cached, slot = await self._lookup_response_cache(state, start_total)
+        return cached, slot, state
+
+    def _lookup_stored_caches(
+        self, question: str, context: str | None, mode: str, start_total: float
+    ) -> tuple[RetrievalOutput | None, _CacheSlot | None]:
+        """Blocking lookup of the FAQ cache (live) or the preparation cache."""
         if mode == "live":
-            cached_answer = self.faq_cache.get(question, similarity_threshold=0.85)
-            if cached_answer:
-                cache_duration = time.perf_counter() - start_total
-                LOGGER.info(
-                    f"FAQ cache hit for: {question[:50]}... (took {cache_duration*1000:.1f}ms)"
-                )
+            return self._lookup_faq_cache(question, start_total), None
+        preparation = self._preparation_cache_slot(question, context, mode)
+        if preparation is None:
+            return None, None
+        return (
+            self._lookup_preparation_cache(preparation, start_total),
+            _CacheSlot(preparation=preparation),
+        )
 
-                # Return cached result with minimal processing
-                return RetrievalOutput(
-                    analysis=QuestionAnalysisResult(
-                        domain="metabolic",
-                        complexity="simple",
-                        strategy="cached",
-                        safety=SafetyLevel.CLEAR,
-                        reasoning="Cached FAQ response",
-                    ),
-                    answer=cached_answer,
-                    citations=[{
-                        "id": "cite-faq-cache",
-                        "title": "FAQ Cache",
-                        "content": cached_answer,
-                        "relevance_score": 1.0,
-                        "source": "FAQ Cache",
-                        "metadata": {"cached": True}
-                    }],
-                    observations=["FAQ cache hit - instant response"],
-                    safety=SafetyEnvelope(
-                        level=SafetyLevel.CLEAR, guidance="", scrubbed=cached_answer
-                    ),
-                    timings={"total": cache_duration, "cache_lookup": cache_duration},
-                    evidence=[],
-                )
+    def _store_caches(self, slot: _CacheSlot | None, output: RetrievalOutput) -> None:
+        if slot is None:
+            return
+        if slot.preparation is not None:
+            self._store_preparation(slot.preparation, output)
+        if slot.response_key is not None:
+            self._store_response(slot.response_key, output)
 
-        state = self._graph.invoke(
-            {
-                "question": question,
-                "context": context,
-                "mode": mode,
-                "observations": [],
-                "timings": {},
-            }
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        # Case, width and spacing variants of a question are the same request
+        return " ".join(normalize(question).split())
+
+    @classmethod
+    def _flight_key(cls, question: str, context: str | None, mode: str) -> str:
+        context_hash = hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+        return f"{mode}:{context_hash}:{cls._normalize_question(question)}"
+
+    async def _lookup_response_cache(
+        self, state: PipelineState, start_total: float
+    ) -> tuple[RetrievalOutput | None, _CacheSlot | None]:
+        """Serve the stored answer of a similar earlier question, for CLEAR questions only.
+
+        The question is analyzed first: one that needs caution or escalation must go
+        through the safety gate rather than reuse an answer written for a harmless one.
+        The analysis and the question's embedding are kept in ``state``; the embedding
+        counts against the live deadline and vector retrieval reuses it.
+        """
+        analysis = self.analyzer.analyze(state["question"], context=state.get("context"))
+        state["analysis"] = analysis
+        if analysis.safety is not SafetyLevel.CLEAR:
+            return None, None
+
+        embedding = await self._await_within_deadline(
+            state, state, "response_cache", self._embed_question(state["question"]), fallback=None
+        )
+        if embedding is None:
+            return None, None
+        state["question_embedding"] = embedding
+        cached = await asyncio.to_thread(self._cached_response, embedding, start_total)
+        return cached, _CacheSlot(response_key=embedding)
+
+    async def _embed_question(self, question: str) -> List[float] | None:
+        try:
+            return await self.vector_retriever.embed_query_async(self._normalize_question(question))
+        except Exception as exc:  # pragma: no cover - provider failures
+            LOGGER.warning("Response cache lookup skipped; embedding failed (%s)", exc)
+            return None
+
+    def _cached_response(
+        self, embedding: List[float], start_total: float
+    ) -> RetrievalOutput | None:
+        cached = self.response_cache.get(embedding, self.corpus_version)
+        if cached is None:
+            return None
+        cache_duration = time.perf_counter() - start_total
+        LOGGER.info(f"Response cache hit (took {cache_duration*1000:.1f}ms)")
+        return replace(
+            cached,
+            observations=[{
+                "role": "observation",
+                "title": "응답 캐시",
+                "content": "유사한 질문의 저장된 답변을 재사용했습니다",
+            }],
+            timings={"total": cache_duration, "cache_lookup": cache_duration},
+        )
+
+    def _store_response(self, embedding: List[float], output: RetrievalOutput) -> None:
+        # Only complete answers that needed no caution: escalations and deadline-cut
+        # answers depend on the moment and must be regenerated
+        if (
+            output.analysis.safety is not SafetyLevel.CLEAR
+            or output.cut_stages
+            or not output.answer
+        ):
+            return
+        self.response_cache.set(embedding, self.corpus_version, output)
+
+    def _lookup_faq_cache(self, question: str, start_total: float) -> RetrievalOutput | None:
+        cached_answer = self.faq_cache.get(question, similarity_threshold=0.85)
+        if not cached_answer:
+            return None
+
+        cache_duration = time.perf_counter() - start_total
+        LOGGER.info(f"FAQ cache hit for: {question[:50]}... (took {cache_duration*1000:.1f}ms)")
+
+        # Return cached result with minimal processing
+        analysis = QuestionAnalysisResult(
+            domain="metabolic",
+            complexity="simple",
+            safety=SafetyLevel.CLEAR,
+            reasons=["Cached FAQ response"],
+            latency_ms=cache_duration * 1000,
+        )
+        return RetrievalOutput(
+            analysis=analysis,
+            answer=cached_answer,
+            citations=[{
+                "id": "cite-faq-cache",
+                "title": "FAQ Cache",
+                "content": cached_answer,
+                "relevance_score": 1.0,
+                "source": "FAQ Cache",
+                "metadata": {"cached": True}
+            }],
+            observations=["FAQ cache hit - instant response"],
+            safety=build_safety_envelope(analysis),
+            timings={"total": cache_duration, "cache_lookup": cache_duration},
+            evidence=[],
+        )
+
+    @staticmethod
+    def _corpus_fingerprint(chunks: Sequence[Chunk]) -> str:
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            digest.update(chunk.chunk_id.encode("utf-8"))
+            digest.update(chunk.text.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def _preparation_cache_slot(
+        self, question: str, context: str | None, mode: str
+    ) -> tuple[str, str | None] | None:
+        """Cache key and patient data version for a preparation request.
+
+        The key covers the question, patient context, corpus and prompt version. The data
+        version fingerprints the patient's exam and survey rows, so an entry is dropped as
+        soon as those rows change even if the client still sends the old context.
+        """
+        if mode != "preparation" or self.prep_cache is None:
+            return None
+        key = self.prep_cache.make_key(
+            question,
+            context,
+            corpus_version=self.corpus_version,
+            prompt_version=PREP_PROMPT_VERSION,
+        )
+        patient_id = patient_id_from_context(context)
+        data_version = patient_data_version(patient_id) if patient_id is not None else None
+        return key, data_version
+
+    def _lookup_preparation_cache(
+        self, slot: tuple[str, str | None] | None, start_total: float
+    ) -> RetrievalOutput | None:
+        if slot is None:
+            return None
+        key, data_version = slot
+        payload = self.prep_cache.get(key, data_version)
+        if payload is None:
+            return None
+
+        try:
+            analysis_data = dict(payload["analysis"])
+            analysis_data["safety"] = SafetyLevel(analysis_data["safety"])
+            analysis = QuestionAnalysisResult(**analysis_data)
+            prep_analysis = self._preparation_from_payload(payload["preparation"])
+        except (KeyError, TypeError, ValueError) as exc:
+            LOGGER.warning("Discarding malformed preparation cache entry (%s)", exc)
+            self.prep_cache.invalidate(key)
+            return None
+
+        cache_duration = time.perf_counter() - start_total
+        LOGGER.info(f"Preparation cache hit (took {cache_duration*1000:.1f}ms)")
+        return RetrievalOutput(
+            analysis=analysis,
+            answer="",
+            citations=[],
+            observations=[{
+                "role": "observation",
+                "title": "상담 준비 완료",
+                "content": "저장된 준비 자료를 불러왔습니다",
+            }],
+            safety=build_safety_envelope(analysis),
+            timings={"total": cache_duration, "cache_lookup": cache_duration},
+            evidence=[],
+            preparation_analysis=prep_analysis,
         )
 
+    def _store_preparation(
+        self, slot: tuple[str, str | None] | None, output: RetrievalOutput
+    ) -> None:
+        if slot is None or output.preparation_analysis is None:
+            return
+        key, data_version = slot
+        analysis = output.analysis
+        payload = {
+            "analysis": {
+                "domain": analysis.domain,
+                "complexity": analysis.complexity,
+                "safety": analysis.safety.value,
+                "reasons": list(analysis.reasons),
+                "latency_ms": analysis.latency_ms,
+            },
+            "preparation": asdict(output.preparation_analysis),
+        }
+        # Embeddings are not needed to render a report and dominate the entry size
+        for expected in payload["preparation"]["expected_questions"]:
+            for chunk in expected["evidence_chunks"]:
+                chunk["embedding"] = None
+        try:
+            self.prep_cache.set(key, payload, data_version)
+        except (OSError, TypeError, ValueError) as exc:
+            LOGGER.warning("Could not store preparation cache entry (%s)", exc)
+
+    @staticmethod
+    def _preparation_from_payload(data: Dict[str, object]) -> PreparationAnalysis:
+        pattern = data.get("consultation_pattern")
+        return PreparationAnalysis(
+            patient_state=PatientStateAnalysis(**data["patient_state"]),
+            consultation_pattern=ConsultationPattern(**pattern) if pattern else None,
+            expected_questions=[
+                ExpectedQuestion(
+                    question=item["question"],
+                    recommended_answer=item["recommended_answer"],
+                    evidence_chunks=[Chunk(**chunk) for chunk in item["evidence_chunks"]],
+                    citations=list(item["citations"]),
+                )
+                for item in data["expected_questions"]
+            ],
+            delivery_examples=[DeliveryExample(**item) for item in data["delivery_examples"]],
+            warnings=list(data["warnings"]),
+            timings=dict(data["timings"]),
+        )
+
+    def _build_output(self, state: PipelineState, *, mode: str, start_total: float) -> RetrievalOutput:
         entries = state.get("_timing_entries", [])
         timings = {stage: duration for stage, duration in entries}
         timings["total"] = time.perf_counter() - start_total
@@ -324,30 +834,21 @@ class RetrievalPipeline:
             timings=timings,
             evidence=evidence,
             preparation_analysis=None,
+            cut_stages=list(state.get("cut_stages", [])),
         )
 
-    def stream(self, question: str, *, context: str | None = None, mode: str = "live"):
-        """Stream LangGraph node updates in real-time for AG-UI protocol."""
-        initial_state = {
-            "question": question,
-            "context": context,
-            "mode": mode,
-            "observations": [],
-            "timings": {},
-        }
-
-        # LangGraph .stream() yields {node_name: node_output} for each node
-        for chunk in self._graph.stream(initial_state):
-            yield chunk
-
     # ------------------------------------------------------------------
-    def _node_analyze(self, state: dict) -> dict:
+    def _node_analyze(self, state: PipelineState) -> PipelineState:
         start = time.perf_counter()
-        analysis = self.analyzer.analyze(state["question"], context=state.get("context"))
+        # The response cache lookup may already have analyzed the question
+        analysis = state.get("analysis") or self.analyzer.analyze(
+            state["question"], context=state.get("context")
+        )
         duration = time.perf_counter() - start
 
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"analysis": analysis}
+        self._append_ag_message(
+            update,
             role="reasoning",
             title="질문 분석",
             content=f"도메인: {analysis.domain}, 복잡도: {analysis.complexity}, 안전도: {analysis.safety.value}",
@@ -356,240 +857,340 @@ class RetrievalPipeline:
         # Pass mode to strategy selection
         mode = state.get("mode", "live")
         strategy = self._select_strategy(analysis, state["question"], state.get("context"), mode)
-        observations = self._append_ag_message(
-            state,
+        self._append_ag_message(
+            update,
             role="action",
             title="검색 전략 선택",
             content=f"선택된 전략: {strategy['name']} (모드: {mode})",
         )
-        self._update_timings(state, "analysis", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": analysis,
-                "observations": observations,
-                "strategy": strategy["name"],
-                "strategy_config": strategy,
-            }
-        )
-        return base
+        self._update_timings(update, "analysis", duration)
+        update["strategy"] = strategy["name"]
+        update["strategy_config"] = strategy
+        return update
 
-    def _node_safety(self, state: dict) -> dict:
+    def _node_safety(self, state: PipelineState) -> PipelineState:
         start = time.perf_counter()
         analysis: QuestionAnalysisResult = state["analysis"]
         envelope = build_safety_envelope(analysis)
         duration = time.perf_counter() - start
 
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"safety": envelope}
+        self._append_ag_message(
+            update,
             role="action",
             title="안전성 검증",
             content=f"안전 수준: {analysis.safety.value}",
         )
-        self._update_timings(state, "safety", duration)
-        base = self._base_state(state)
-        update = {
-            "analysis": analysis,
-            "safety": envelope,
-            "observations": observations,
-        }
-        base.update(update)
+        self._update_timings(update, "safety", duration)
         if analysis.safety is SafetyLevel.ESCALATE:
             update["answer"] = envelope.answer_override or ""
             update["citations"] = []
             update["evidence"] = []
-        base.update(update)
-        return base
+        return update
 
-    def _route_after_safety(self, state: dict) -> str:
+    def _route_after_safety(self, state: PipelineState) -> str | List[str]:
         envelope: SafetyEnvelope = state["safety"]
         if envelope.level is SafetyLevel.ESCALATE:
             return "escalate"
 
-        # Route based on mode
+        # Route based on mode; preparation fans out into its two independent analyses
         mode = state.get("mode", "live")
         if mode == "preparation":
-            return "proceed_prep"
+            return ["prep_patient", "prep_history"]
         return "proceed_live"
 
-    def _route_post_rewrite(self, state: dict) -> str:
+    def _route_post_rewrite(self, state: PipelineState) -> str:
         strategy = state.get("strategy")
         if strategy == "decompose":
             return "decompose"
-        if strategy == "graph":
-            return "graph"
+        if strategy in {"graph", "hybrid"}:
+            return strategy
         return "vector"
 
-    def _route_post_vector(self, state: dict) -> str:
+    def _route_post_vector(self, state: PipelineState) -> str:
         return "merge"
 
-    def _node_rewrite(self, state: dict) -> dict:
+    async def _node_rewrite(self, state: PipelineState) -> PipelineState:
         start = time.perf_counter()
         analysis: QuestionAnalysisResult = state["analysis"]
         strategy = state.get("strategy", "vector")
-        rewritten = self._rewrite_question(state["question"], analysis, strategy=strategy)
-        duration = time.perf_counter() - start
+        raw = state["question"].strip()
+        update: PipelineState = {}
+        scratch: PipelineState = {}
+        search = self._speculative_search(strategy)
+        speculative = (
+            asyncio.create_task(search(state, scratch, raw)) if search is not None else None
+        )
+        try:
+            rewritten = await self._await_within_deadline(
+                state,
+                update,
+                "rewrite",
+                self._rewrite_question(state["question"], analysis, strategy=strategy),
+                fallback=raw,
+            )
+        except BaseException:
+            if speculative is not None:
+                speculative.cancel()
+            raise
+        if speculative is None:
+            return self._rewrite_update(update, rewritten, time.perf_counter() - start)
+
+        speculation = None
+        if self._speculation_holds(raw, rewritten):
+            speculation = await speculative
+            self._merge_update(update, scratch)
+        else:
+            speculative.cancel()
+        return self._rewrite_update(
+            update, rewritten, time.perf_counter() - start, speculation=speculation
+        )
 
-        observations = self._append_ag_message(
-            state,
+    def _rewrite_update(
+        self,
+        update: PipelineState,
+        rewritten: str,
+        duration: float,
+        *,
+        speculation: tuple | None = None,
+    ) -> PipelineState:
+        self._append_ag_message(
+            update,
             role="action",
             title="질문 재작성",
             content=f"재작성된 질문: {rewritten}",
         )
-        self._update_timings(state, "rewrite", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": state.get("analysis"),
-                "safety": state.get("safety"),
-                "rewritten_question": rewritten,
-                "observations": observations,
-            }
-        )
-        return base
+        if speculation is not None:
+            self._append_ag_message(
+                update,
+                role="observation",
+                title="선행 검색",
+                content="재작성 질문이 원문과 유사하여 원문 검색 결과를 재사용합니다",
+            )
+        self._update_timings(update, "rewrite", duration)
+        update["rewritten_question"] = rewritten
+        update["speculation"] = speculation
+        return update
 
-    def _node_vector_retrieval(self, state: dict) -> dict:
+    @staticmethod
+    def _merge_update(update: PipelineState, scratch: PipelineState) -> None:
+        """Fold a scratch update into ``update``, appending to list channels."""
+        for key, value in scratch.items():
+            if isinstance(value, list):
+                update.setdefault(key, []).extend(value)
+            else:
+                update[key] = value
+
+    def _speculative_search(
+        self, strategy: str
+    ) -> Callable[[PipelineState, PipelineState, str], Awaitable[tuple]] | None:
+        """Search the strategy would run after the rewrite, or None when it is not worth racing."""
+        if not self.small_llm or self.speculation_threshold > 1.0:
+            return None
+        return {
+            "graph": self._graph_search,
+            "hybrid": self._hybrid_search,
+            "decompose": self._decompose_search,
+        }.get(strategy)
+
+    def _speculation_holds(self, raw: str, rewritten: str) -> bool:
+        """Whether results for ``raw`` can stand in for a search on ``rewritten``."""
+        raw_tokens, rewritten_tokens = set(tokenize(raw)), set(tokenize(rewritten))
+        union = raw_tokens | rewritten_tokens
+        if not union:
+            return True
+        return len(raw_tokens & rewritten_tokens) / len(union) >= self.speculation_threshold
+
+    async def _node_vector_retrieval(self, state: PipelineState) -> PipelineState:
         if state.get("strategy") != "vector":
-            observations = self._append_ag_message(
-                state,
-                role="action",
-                title="Vector 검색",
-                content="전략에 따라 건너뜀",
-            )
-            base = self._base_state(state)
-            base.update(
-                {
-                    "analysis": state.get("analysis"),
-                    "safety": state.get("safety"),
-                    "vector_results": [],
-                    "observations": observations,
-                }
-            )
-            return base
+            return self._skipped_retrieval_update("vector")
 
         query = state.get("rewritten_question") or state["question"]
         start = time.perf_counter()
         config = state.get("strategy_config", {})
         vector_k = config.get("vector_k", self.default_vector_top_k)
-        results = self.vector_retriever.retrieve(query, limit=vector_k)
-        duration = time.perf_counter() - start
+        results = await self._vector_search(state, query, vector_k)
+        return self._retrieval_update({}, "vector", results, time.perf_counter() - start)
+
+    def _vector_search(
+        self, state: PipelineState, query: str, limit: int
+    ) -> Awaitable[List[Chunk]]:
+        """Vector search for ``query``, reusing the question's embedding when it is the query."""
+        embedding = state.get("question_embedding")
+        normalized = self._normalize_question(query)
+        if embedding is not None and normalized == self._normalize_question(state["question"]):
+            return self.vector_retriever.retrieve_by_vector_async(embedding, limit=limit)
+        return self.vector_retriever.retrieve_async(query, limit=limit)
+
+    async def _node_graph_retrieval(self, state: PipelineState) -> PipelineState:
+        if state.get("strategy") != "graph":
+            return self._skipped_retrieval_update("graph")
 
-        observations = self._append_ag_message(
+        update: PipelineState = {}
+        outcome = state.get("speculation")
+        if outcome is None:
+            outcome = await self._graph_search(
+                state, update, state.get("rewritten_question") or state["question"]
+            )
+        return self._retrieval_update(update, "graph", *outcome)
+
+    async def _graph_search(
+        self, state: PipelineState, update: PipelineState, query: str
+    ) -> tuple[List[Chunk], float]:
+        start = time.perf_counter()
+        graph_k = state.get("strategy_config", {}).get("graph_k", self.graph_top_k)
+        timeout = self._fallback_timeout(self._stage_end(state, "retrieval_graph"))
+        results = await self._await_within_deadline(
             state,
-            role="action",
-            title="Vector 검색 실행",
-            content=f"{len(results)}개의 관련 문서를 찾았습니다",
+            update,
+            "retrieval_graph",
+            self.graph_retriever.retrieve_async(query, limit=graph_k, timeout=timeout),
+            fallback=[],
         )
-        self._update_timings(state, "retrieval_vector", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": state.get("analysis"),
-                "safety": state.get("safety"),
-                "vector_results": results,
-                "observations": observations,
-            }
-        )
-        return base
-
-    def _node_graph_retrieval(self, state: dict) -> dict:
-        if state.get("strategy") != "graph":
-            observations = self._append_ag_message(
-                state,
-                role="action",
-                title="Graph 검색",
-                content="전략에 따라 건너뜀",
+        return results, time.perf_counter() - start
+
+    async def _node_hybrid_retrieval(self, state: PipelineState) -> PipelineState:
+        update: PipelineState = {}
+        outcome = state.get("speculation")
+        if outcome is None:
+            outcome = await self._hybrid_search(
+                state, update, state.get("rewritten_question") or state["question"]
             )
-            base = self._base_state(state)
-            base.update(
-                {
-                    "analysis": state.get("analysis"),
-                    "safety": state.get("safety"),
-                    "graph_results": [],
-                    "observations": observations,
-                }
-            )
-            return base
+        return self._hybrid_update(update, *outcome)
 
-        query = state.get("rewritten_question") or state["question"]
+    async def _hybrid_search(
+        self, state: PipelineState, update: PipelineState, query: str
+    ) -> tuple[tuple[List[Chunk], float], tuple[List[Chunk], float], float]:
+        """Run vector and graph retrieval side by side."""
         start = time.perf_counter()
         config = state.get("strategy_config", {})
-        graph_k = config.get("graph_k", self.graph_top_k)
-        results = self.graph_retriever.retrieve(query, limit=graph_k)
-        duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
+        timeout = self._fallback_timeout(self._stage_end(state, "retrieval_graph"))
+        vector_outcome, graph_outcome = await asyncio.gather(
+            self._timed(
+                self._vector_search(
+                    state, query, config.get("vector_k", self.default_vector_top_k)
+                )
+            ),
+            self._await_within_deadline(
+                state,
+                update,
+                "retrieval_graph",
+                self._timed(
+                    self.graph_retriever.retrieve_async(
+                        query, limit=config.get("graph_k", self.graph_top_k), timeout=timeout
+                    )
+                ),
+                fallback=([], 0.0),
+            ),
+        )
+        return vector_outcome, graph_outcome, time.perf_counter() - start
+
+    def _hybrid_update(
+        self,
+        update: PipelineState,
+        vector_outcome: tuple[List[Chunk], float],
+        graph_outcome: tuple[List[Chunk], float],
+        duration: float,
+    ) -> PipelineState:
+        self._retrieval_update(update, "vector", *vector_outcome)
+        self._retrieval_update(update, "graph", *graph_outcome)
+        # Wall-clock of the fan-out, i.e. the slower retriever rather than the sum
+        self._update_timings(update, "retrieval", duration)
+        return update
+
+    @staticmethod
+    async def _timed(pending: Awaitable[List[Chunk]]) -> tuple[List[Chunk], float]:
+        start = time.perf_counter()
+        results = await pending
+        return results, time.perf_counter() - start
+
+    def _skipped_retrieval_update(self, source: str) -> PipelineState:
+        update: PipelineState = {f"{source}_results": []}
+        self._append_ag_message(
+            update,
             role="action",
-            title="Graph 검색 실행",
-            content=f"{len(results)}개의 관계 문서를 찾았습니다",
+            title="Vector 검색" if source == "vector" else "Graph 검색",
+            content="전략에 따라 건너뜀",
         )
-        self._update_timings(state, "retrieval_graph", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": state.get("analysis"),
-                "safety": state.get("safety"),
-                "graph_results": results,
-                "observations": observations,
-            }
+        return update
+
+    def _retrieval_update(
+        self, update: PipelineState, source: str, results: List[Chunk], duration: float
+    ) -> PipelineState:
+        if source == "vector":
+            title, content = "Vector 검색 실행", f"{len(results)}개의 관련 문서를 찾았습니다"
+        else:
+            title, content = "Graph 검색 실행", f"{len(results)}개의 관계 문서를 찾았습니다"
+        self._append_ag_message(
+            update,
+            role="action",
+            title=title,
+            content=content,
         )
-        return base
+        self._update_timings(update, f"retrieval_{source}", duration)
+        update[f"{source}_results"] = results
+        return update
+
+    async def _node_decompose(self, state: PipelineState) -> PipelineState:
+        update: PipelineState = {}
+        outcome = state.get("speculation")
+        if outcome is None:
+            outcome = await self._decompose_search(
+                state, update, state.get("rewritten_question") or state["question"]
+            )
+        return self._decompose_update(update, *outcome)
 
-    def _node_decompose(self, state: dict) -> dict:
+    async def _decompose_search(
+        self, state: PipelineState, update: PipelineState, question: str
+    ) -> tuple[List[str], List[Chunk], float]:
         start = time.perf_counter()
         analysis: QuestionAnalysisResult = state["analysis"]
-        question = state.get("rewritten_question") or state["question"]
-        subquestions = self._decompose_question(question, analysis)
+        subquestions = await self._await_within_deadline(
+            state,
+            update,
+            "decompose",
+            self._decompose_question(question, analysis),
+            fallback=self._parse_subquestions(question, ""),
+        )
 
         config = state.get("strategy_config", {})
         limit = config.get("sub_limit", 5)
 
-        # PARALLEL EXECUTION: Retrieve all sub-questions concurrently
-        async def _retrieve_parallel() -> List[Chunk]:
-            tasks = []
-            for subquestion in subquestions:
-                search_type = self._determine_question_type(subquestion)
-                if search_type == "graph":
-                    # Primary: graph, fallback: vector
-                    task = self._retrieve_with_fallback(
-                        subquestion, limit, primary="graph", fallback="vector"
-                    )
-                else:
-                    # Primary: vector, fallback: graph
-                    task = self._retrieve_with_fallback(
-                        subquestion, limit, primary="vector", fallback="graph"
-                    )
-                tasks.append((subquestion, search_type, task))
-
-            # Execute all tasks in parallel
-            results = await asyncio.gather(*[task for _, _, task in tasks])
-
-            # Flatten and enrich results
-            evidence: List[Chunk] = []
-            for (subquestion, search_type, _), chunks in zip(tasks, results):
-                for chunk in chunks:
-                    enriched = replace(chunk)
-                    enriched.metadata = dict(chunk.metadata)
-                    enriched.metadata["subquestion"] = subquestion
-                    enriched.metadata.setdefault("retrieval", search_type)
-                    evidence.append(enriched)
-
-            return evidence
-
-        # Run async code in sync context
-        try:
-            evidence = asyncio.run(_retrieve_parallel())
-        except RuntimeError:
-            # Event loop already running - use nest_asyncio
-            try:
-                import nest_asyncio
+        # PARALLEL EXECUTION: one batched vector search shared by every sub-question, with
+        # each sub-question's graph search and fallback running concurrently
+        end = self._stage_end(state, "subquestions")
+        vector_batch = asyncio.create_task(
+            self.vector_retriever.retrieve_many_async(subquestions, limit=limit)
+        )
 
-                nest_asyncio.apply()
-                evidence = asyncio.run(_retrieve_parallel())
-            except Exception as exc:
-                LOGGER.warning("Parallel execution failed, falling back to sequential: %s", exc)
-                evidence = self._retrieve_sequential(subquestions, limit)
+        async def vector_hits(idx: int) -> List[Chunk]:
+            # Shielded: one cut sub-question must not cancel the others' shared search
+            return (await asyncio.shield(vector_batch))[idx]
 
+        tasks = [
+            asyncio.create_task(
+                self._retrieve_with_fallback(subquestion, limit, partial(vector_hits, idx))
+            )
+            for idx, subquestion in enumerate(subquestions)
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=self._time_until(end))
+        # The batch is unused once every sub-question settled on graph hits
+        for task in [*pending, vector_batch]:
+            task.cancel()
+        if pending:
+            self._record_cut(update, "subquestions")
+        # Unfinished sub-questions contribute no evidence
+        hits_per_question = [task.result() if task in done else [] for task in tasks]
+        evidence = self._enrich_subquestion_hits(subquestions, hits_per_question)
+        return subquestions, evidence, time.perf_counter() - start
+
+    def _decompose_update(
+        self,
+        update: PipelineState,
+        subquestions: List[str],
+        evidence: List[Chunk],
+        duration: float,
+    ) -> PipelineState:
         # Deduplication (existing logic)
         deduped: List[Chunk] = []
         seen = set()
@@ -601,24 +1202,16 @@ class RetrievalPipeline:
             if len(deduped) >= self.max_evidence:
                 break
 
-        observations = self._append_ag_message(
-            state,
+        self._append_ag_message(
+            update,
             role="action",
             title="질문 분해 및 병렬 검색",
             content=f"{len(subquestions)}개의 하위 질문으로 분해, {len(deduped)}개의 증거 수집 (병렬 실행)",
         )
-        self._update_timings(state, "decompose", time.perf_counter() - start)
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": analysis,
-                "safety": state.get("safety"),
-                "observations": observations,
-                "subquestions": subquestions,
-                "evidence": deduped,
-            }
-        )
-        return base
+        self._update_timings(update, "decompose", duration)
+        update["subquestions"] = subquestions
+        update["evidence"] = deduped
+        return update
 
     def _select_strategy(
         self,
@@ -659,23 +1252,32 @@ class RetrievalPipeline:
         if complexity == "multi-hop":
             if contains_relationship or contains_connector:
                 return {"name": "graph", "graph_k": graph_k}
-            return {"name": "vector", "vector_k": vector_k_complex}
+            # No clear relational cue: query both stores at once and fuse the rankings
+            return {"name": "hybrid", "vector_k": vector_k_complex, "graph_k": graph_k}
 
         # Treat compound/long questions as complex and perform decomposition
         return {"name": "decompose", "sub_limit": sub_limit}
 
-    def _decompose_question(self, question: str, analysis: QuestionAnalysisResult) -> List[str]:
-        prompt = (
+    async def _decompose_question(
+        self, question: str, analysis: QuestionAnalysisResult
+    ) -> List[str]:
+        if self.small_llm:
+            text = await self._invoke_llm(self.small_llm, self._decompose_prompt(question))
+        else:
+            text = question  # Fallback
+        return self._parse_subquestions(question, text)
+
+    @staticmethod
+    def _decompose_prompt(question: str) -> str:
+        return (
             "복잡한 상담 질문을 2~3개의 하위 질문으로 분해하세요.\n"
             "- 각 하위 질문은 독립적으로 검색 가능해야 합니다.\n"
             "- 운동/식단/생활습관과 관련된 핵심 키워드를 유지하세요.\n"
             f"질문: {question}\n하위 질문 목록 (번호 없이 한 줄에 하나 씩):"
         )
-        if self.small_llm:
-            response = self.small_llm.invoke([HumanMessage(content=prompt)])
-            text = response.content.strip()
-        else:
-            text = question  # Fallback
+
+    @staticmethod
+    def _parse_subquestions(question: str, text: str) -> List[str]:
         candidates: List[str] = []
         for line in text.splitlines():
             normalized = line.strip("-• ").strip()
@@ -720,117 +1322,134 @@ class RetrievalPipeline:
             return "graph"
         return "vector"
 
-    def _node_merge_evidence(self, state: dict) -> dict:
+    def _node_merge_evidence(self, state: PipelineState) -> PipelineState:
+        update: PipelineState = {}
         if state.get("strategy") == "decompose" and state.get("evidence"):
-            observations = self._append_ag_message(
-                state,
+            self._append_ag_message(
+                update,
                 role="observation",
                 title="증거 병합",
                 content="분해된 질문의 증거를 재사용",
             )
-            base = self._base_state(state)
-            base.update(
-                {
-                    "analysis": state.get("analysis"),
-                    "safety": state.get("safety"),
-                    "evidence": list(state.get("evidence", [])),
-                    "observations": observations,
-                }
-            )
-            return base
+            return update
 
-        vector_results: List[Chunk] = list(state.get("vector_results", []))
-        graph_results: List[Chunk] = list(state.get("graph_results", []))
-
-        merged: List[Chunk] = []
-        seen = set()
-        combined = list(vector_results) + list(graph_results)
-        combined.sort(key=lambda item: getattr(item, "score", 0.0) or 0.0, reverse=True)
+        vector_results: List[Chunk] = state.get("vector_results", [])
+        graph_results: List[Chunk] = state.get("graph_results", [])
+        merged = self._reciprocal_rank_fusion([vector_results, graph_results])[: self.max_evidence]
 
-        for chunk in combined:
-            if chunk.chunk_id in seen:
-                continue
-            seen.add(chunk.chunk_id)
-            merged.append(chunk)
-            if len(merged) >= self.max_evidence:
-                break
-
-        observations = self._append_ag_message(
-            state,
+        self._append_ag_message(
+            update,
             role="observation",
             title="증거 병합 완료",
             content=f"Vector: {len(vector_results)}개, Graph: {len(graph_results)}개, 고유: {len(merged)}개",
         )
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": state.get("analysis"),
-                "safety": state.get("safety"),
-                "evidence": merged,
-                "observations": observations,
-            }
-        )
-        return base
+        update["evidence"] = merged
+        return update
 
-    def _node_synthesize(self, state: dict) -> dict:
+    @staticmethod
+    def _reciprocal_rank_fusion(rankings: Sequence[Sequence[Chunk]]) -> List[Chunk]:
+        """Fuse ranked lists by summing 1 / (k + rank); raw scores are not comparable."""
+        fused: Dict[str, float] = {}
+        chunks: Dict[str, Chunk] = {}
+        for ranking in rankings:
+            ranked = sorted(
+                ranking, key=lambda item: getattr(item, "score", 0.0) or 0.0, reverse=True
+            )
+            seen: set[str] = set()
+            for rank, chunk in enumerate(ranked, start=1):
+                if chunk.chunk_id in seen:
+                    continue
+                seen.add(chunk.chunk_id)
+                chunks.setdefault(chunk.chunk_id, chunk)
+                fused[chunk.chunk_id] = fused.get(chunk.chunk_id, 0.0) + 1.0 / (_RRF_K + rank)
+        order = sorted(fused, key=fused.__getitem__, reverse=True)
+        return [chunks[chunk_id] for chunk_id in order]
+
+    async def _node_synthesize(self, state: PipelineState) -> PipelineState:
         start = time.perf_counter()
         analysis: QuestionAnalysisResult = state["analysis"]
-        evidence: List[Chunk] = list(state.get("evidence", []))
-        answer, citations = self._synthesize_answer(
-            state["question"], analysis, evidence, state.get("strategy", "vector")
+        evidence: List[Chunk] = state.get("evidence", [])
+        answer, citations = await self._synthesize_answer(
+            state["question"],
+            analysis,
+            evidence,
+            state.get("strategy", "vector"),
+            on_token=self._token_writer(state),
         )
-        duration = time.perf_counter() - start
+        return self._synthesis_update(answer, citations, len(evidence), time.perf_counter() - start)
 
-        observations = self._append_ag_message(
-            state,
+    @staticmethod
+    def _token_writer(state: PipelineState) -> Callable[[str], None] | None:
+        if not state.get("stream_tokens"):
+            return None
+        writer = get_stream_writer()
+        return lambda text: writer({"token": text})
+
+    def _synthesis_update(
+        self, answer: str, citations: List[dict], evidence_count: int, duration: float
+    ) -> PipelineState:
+        # The update is streamed to the client as-is, so it must not carry unscrubbed PII
+        update: PipelineState = {"answer": scrub_text(answer), "citations": citations}
+        self._append_ag_message(
+            update,
             role="observation",
             title="답변 생성 완료",
-            content=f"증거 {len(evidence)}개를 기반으로 답변을 생성했습니다",
+            content=f"증거 {evidence_count}개를 기반으로 답변을 생성했습니다",
         )
-        self._update_timings(state, "synthesis", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "analysis": state.get("analysis"),
-                "safety": state.get("safety"),
-                "answer": answer,
-                "citations": citations,
-                "observations": observations,
-            }
-        )
-        return base
+        self._update_timings(update, "synthesis", duration)
+        return update
 
     # ------------------------------------------------------------------
-    def _rewrite_question(
+    async def _rewrite_question(
         self, question: str, analysis: QuestionAnalysisResult, *, strategy: str
     ) -> str:
         normalized = question.strip()
         if strategy == "vector":
             return normalized
 
-        prompt = (
+        if self.small_llm:
+            rewritten = await self._invoke_llm(self.small_llm, self._rewrite_prompt(normalized))
+        else:
+            rewritten = normalized  # Fallback
+        return self._clean_rewrite(normalized, rewritten)
+
+    @staticmethod
+    def _rewrite_prompt(normalized: str) -> str:
+        return (
             "아래 상담 질문을 검색에 유리하게 1문장으로 정제해 주세요."
             "\n- 핵심 키워드를 유지하고, 불필요한 감탄/수식어는 제거합니다."
             "\n- 운동/식단/생활습관과 관련된 세부 용어는 유지합니다."
             "\n질문: "
             f"{normalized}\n정제된 질문:"
         )
-        if self.small_llm:
-            response = self.small_llm.invoke([HumanMessage(content=prompt)])
-            rewritten = response.content.strip()
-        else:
-            rewritten = normalized  # Fallback
+
+    @staticmethod
+    def _clean_rewrite(normalized: str, rewritten: str) -> str:
+        rewritten = rewritten.strip()
         if not rewritten or "정제된 질문" in rewritten or "검색에 유리" in rewritten:
             rewritten = normalized
         return rewritten
 
-    def _synthesize_answer(
+    async def _synthesize_answer(
         self,
         question: str,
         analysis: QuestionAnalysisResult,
         evidence: Sequence[Chunk],
         strategy: str,
+        *,
+        on_token: Callable[[str], None] | None = None,
     ) -> tuple[str, List[dict]]:
+        if not evidence:
+            return self._no_evidence_answer(), []
+
+        prompt = self._synthesis_prompt(question, evidence, strategy)
+        if self.main_llm:
+            answer = (await self._generate_answer(prompt, on_token)).strip()
+        else:
+            answer = "LLM이 초기화되지 않아 답변을 생성할 수 없습니다."
+        return self._finalize_answer(answer, evidence), self._build_citations(evidence)
+
+    def _build_citations(self, evidence: Sequence[Chunk]) -> List[dict]:
         # Build citations as structured objects for frontend
         citations = []
         for idx, chunk in enumerate(evidence[: self.max_evidence]):
@@ -847,140 +1466,211 @@ class RetrievalPipeline:
                 }
             }
             citations.append(citation)
+        return citations
 
-        # For backward compatibility with answer text, create simple citation references
-        citation_refs = [f"[{chunk.chunk_id}]" for chunk in evidence]
+    def _synthesis_prompt(self, question: str, evidence: Sequence[Chunk], strategy: str) -> str:
         evidence_snippets = "\n".join(
             f"- ({idx+1}) {chunk.chunk_id}: {chunk.text}"
             for idx, chunk in enumerate(evidence[: self.max_evidence])
         )
+        return (
+            "당신은 대사증후군 상담사를 돕는 시스템입니다."
+            "\n다음 근거를 정리하여 2-3문장 답변을 작성하세요."
+            "\n- 구체적인 행동 권장(예: 주 5회 30분 등)을 포함하세요."
+            "\n- 의학적 판단/약물 조언은 피하고 필요한 경우 담당 의사 상담을 안내하세요."
+            "\n- 마지막 문장에 근거 번호를 괄호 형태로 첨부하세요."
+            f"\n질문: {question}"
+            f"\n질문 전략: {strategy}"
+            f"\n근거:\n{evidence_snippets}\n답변:"
+        )
 
-        if evidence:
-            prompt = (
-                "당신은 대사증후군 상담사를 돕는 시스템입니다."
-                "\n다음 근거를 정리하여 2-3문장 답변을 작성하세요."
-                "\n- 구체적인 행동 권장(예: 주 5회 30분 등)을 포함하세요."
-                "\n- 의학적 판단/약물 조언은 피하고 필요한 경우 담당 의사 상담을 안내하세요."
-                "\n- 마지막 문장에 근거 번호를 괄호 형태로 첨부하세요."
-                f"\n질문: {question}"
-                f"\n질문 전략: {strategy}"
-                f"\n근거:\n{evidence_snippets}\n답변:"
+    @staticmethod
+    def _finalize_answer(answer: str, evidence: Sequence[Chunk]) -> str:
+        if not answer:
+            answer = (
+                "근거 자료를 바탕으로 생활습관 개선을 권장드립니다. 하루 30분 내외의 중등도 운동을 주 5회 정도 "
+                "실천하고, 상담 시 근거 번호를 함께 안내해 주세요."
             )
-            if self.main_llm:
-                response = self.main_llm.invoke([HumanMessage(content=prompt)])
-                answer = response.content.strip()
-            else:
-                answer = "LLM이 초기화되지 않아 답변을 생성할 수 없습니다."
-            if not answer:
-                answer = (
-                    "근거 자료를 바탕으로 생활습관 개선을 권장드립니다. 하루 30분 내외의 중등도 운동을 주 5회 정도 "
-                    "실천하고, 상담 시 근거 번호를 함께 안내해 주세요."
-                )
-            if citation_refs and citation_refs[0] not in answer:
-                answer = f"{answer} ({', '.join(citation_refs)})"
-            return answer, citations
+        # For backward compatibility with answer text, create simple citation references
+        citation_refs = [f"[{chunk.chunk_id}]" for chunk in evidence]
+        if citation_refs and citation_refs[0] not in answer:
+            answer = f"{answer} ({', '.join(citation_refs)})"
+        return answer
 
-        message = (
+    @staticmethod
+    def _no_evidence_answer() -> str:
+        return (
             "현재 확보된 자료에서 직접적인 근거를 찾지 못했습니다. "
             "일반적인 생활습관 가이드라인을 참고하시고, 필요 시 담당 의사와 상담해 주세요."
         )
-        return message, []
+
+    async def _generate_answer(self, prompt: str, on_token: Callable[[str], None] | None) -> str:
+        """Call the main LLM, forwarding scrubbed deltas to ``on_token`` when streaming."""
+        messages = [HumanMessage(content=prompt)]
+        if on_token is None or not hasattr(self.main_llm, "astream"):
+            return (await self.main_llm.ainvoke(messages)).content
+
+        scrubber = StreamingScrubber()
+        parts: List[str] = []
+        async for chunk in self.main_llm.astream(messages):
+            self._emit_delta(chunk, parts, scrubber, on_token)
+        self._emit_remainder(scrubber, on_token)
+        return "".join(parts)
+
+    @staticmethod
+    def _emit_delta(
+        chunk, parts: List[str], scrubber: StreamingScrubber, on_token: Callable[[str], None]
+    ) -> None:
+        delta = chunk.content if isinstance(chunk.content, str) else ""
+        if not parts:
+            # Mirror the final .strip() so streamed text stays a prefix of the answer
+            delta = delta.lstrip()
+        if not delta:
+            return
+        parts.append(delta)
+        released = scrubber.feed(delta)
+        if released:
+            on_token(released)
+
+    @staticmethod
+    def _emit_remainder(scrubber: StreamingScrubber, on_token: Callable[[str], None]) -> None:
+        remainder = scrubber.flush().rstrip()
+        if remainder:
+            on_token(remainder)
+
+    @staticmethod
+    async def _invoke_llm(llm, prompt: str) -> str:
+        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        return response.content.strip()
+
+    async def _batch_llm(self, llm, prompts: Sequence[str]) -> List[str]:
+        """Run independent prompts concurrently, at most ``prep_llm_concurrency`` at a time."""
+        responses = await llm.abatch(
+            [[HumanMessage(content=prompt)] for prompt in prompts],
+            config={"max_concurrency": self.prep_llm_concurrency},
+        )
+        return [response.content.strip() for response in responses]
 
     # ------------------------------------------------------------------
     @staticmethod
-    def _append_observation(state: dict, message: str) -> List[str]:
+    def _append_observation(update: PipelineState, message: str) -> None:
         """Legacy method for backward compatibility."""
-        observations = list(state.get("observations", []))
-        observations.append(message)
-        state["observations"] = observations
-        return observations
+        update.setdefault("observations", []).append(message)
 
     @staticmethod
-    def _append_ag_message(
-        state: dict, *, role: str, title: str, content: str
-    ) -> List[Dict[str, str]]:
-        """Append structured AG-UI protocol message."""
-        observations = list(state.get("observations", []))
+    def _append_ag_message(update: PipelineState, *, role: str, title: str, content: str) -> None:
+        """Append a structured AG-UI protocol message to a node's state update."""
         ag_message = {
             "role": role,  # reasoning, action, observation
             "title": title,
             "content": content,
         }
-        observations.append(ag_message)
-        state["observations"] = observations
-        return observations
+        update.setdefault("observations", []).append(ag_message)
+
+    @staticmethod
+    def _update_timings(update: PipelineState, stage: str, duration: float) -> None:
+        update.setdefault("_timing_entries", []).append((stage, duration))
+
+    # ------------------------------------------------------------------
+    # Deadline enforcement helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _stage_end(state: PipelineState, stage: str) -> float | None:
+        deadline: Deadline | None = state.get("deadline")
+        return deadline.stage_end(stage) if deadline is not None else None
 
     @staticmethod
-    def _update_timings(state: dict, stage: str, duration: float) -> Dict[str, float]:
-        entries = list(state.get("_timing_entries", []))
-        entries.append((stage, duration))
-        state["_timing_entries"] = entries
-        return dict(entries)
+    def _time_until(end: float | None) -> float | None:
+        return max(0.0, end - time.perf_counter()) if end is not None else None
+
+    @classmethod
+    def _fallback_timeout(cls, end: float | None) -> float | None:
+        """Time a retriever may spend on its remote store, leaving room for its fallback."""
+        remaining = cls._time_until(end)
+        return max(0.0, remaining - _FALLBACK_MARGIN_SECONDS) if remaining is not None else None
+
+    def _record_cut(self, update: PipelineState, stage: str) -> None:
+        update.setdefault("cut_stages", []).append(stage)
+        self._append_ag_message(
+            update,
+            role="observation",
+            title="시간 제한",
+            content=f"응답 시간 제한으로 '{stage}' 단계를 중단했습니다",
+        )
+
+    async def _await_within_deadline(
+        self,
+        state: PipelineState,
+        update: PipelineState,
+        stage: str,
+        pending: Awaitable[_T],
+        *,
+        fallback: _T,
+    ) -> _T:
+        """Await ``pending`` until the stage's deadline, cancelling it once time runs out."""
+        try:
+            return await asyncio.wait_for(pending, self._time_until(self._stage_end(state, stage)))
+        except asyncio.TimeoutError:
+            self._record_cut(update, stage)
+            return fallback
 
     # ------------------------------------------------------------------
     # Parallel execution helper methods
     # ------------------------------------------------------------------
     async def _retrieve_with_fallback(
-        self, query: str, limit: int, *, primary: str, fallback: str
+        self,
+        subquestion: str,
+        limit: int,
+        vector_hits: Callable[[], Awaitable[List[Chunk]]],
     ) -> List[Chunk]:
-        """Retrieve with primary strategy and fallback."""
-        if primary == "graph":
-            hits = await self.graph_retriever.retrieve_async(query, limit=limit)
+        """Retrieve with the primary store for the question type, falling back to the other.
+
+        ``vector_hits`` returns this sub-question's share of the batched vector search.
+        """
+        if self._determine_question_type(subquestion) == "graph":
+            hits = await self.graph_retriever.retrieve_async(subquestion, limit=limit)
             if not hits:
-                hits = await self.vector_retriever.retrieve_async(query, limit=limit)
+                hits = list(await vector_hits())
         else:
-            hits = await self.vector_retriever.retrieve_async(query, limit=limit)
+            hits = list(await vector_hits())
             if not hits:
-                hits = await self.graph_retriever.retrieve_async(query, limit=limit)
+                hits = await self.graph_retriever.retrieve_async(subquestion, limit=limit)
 
         # Sort by score
         hits.sort(key=lambda item: getattr(item, "score", 0.0) or 0.0, reverse=True)
         return hits[:limit]
 
-    def _retrieve_sequential(self, subquestions: List[str], limit: int) -> List[Chunk]:
-        """Fallback sequential retrieval (original logic)."""
+    def _enrich_subquestion_hits(
+        self, subquestions: Sequence[str], hits_per_question: Sequence[List[Chunk]]
+    ) -> List[Chunk]:
+        """Flatten per-subquestion hits, tagging each chunk with its originating subquestion."""
         evidence: List[Chunk] = []
-        for subquestion in subquestions:
+        for subquestion, chunks in zip(subquestions, hits_per_question):
             search_type = self._determine_question_type(subquestion)
-            if search_type == "graph":
-                hits = self.graph_retriever.retrieve(subquestion, limit=limit)
-                if not hits:
-                    hits = self.vector_retriever.retrieve(subquestion, limit=limit)
-            else:
-                hits = self.vector_retriever.retrieve(subquestion, limit=limit)
-                if not hits:
-                    hits = self.graph_retriever.retrieve(subquestion, limit=limit)
-
-            hits.sort(key=lambda item: getattr(item, "score", 0.0) or 0.0, reverse=True)
-            for chunk in hits[:limit]:
+            for chunk in chunks:
                 enriched = replace(chunk)
                 enriched.metadata = dict(chunk.metadata)
                 enriched.metadata["subquestion"] = subquestion
                 enriched.metadata.setdefault("retrieval", search_type)
                 evidence.append(enriched)
-
         return evidence
 
-    @staticmethod
-    def _base_state(state: dict) -> Dict[str, object]:
-        base = dict(state)
-        base["question"] = state.get("question")
-        base["context"] = state.get("context")
-        if "_timing_entries" in state:
-            base["_timing_entries"] = list(state["_timing_entries"])
-        if "observations" in base:
-            base["observations"] = list(base["observations"])
-        return base
-
     # ------------------------------------------------------------------
     # Preparation Mode Nodes
     # ------------------------------------------------------------------
-    def _node_prep_analyze_patient(self, state: dict) -> dict:
+    async def _node_prep_analyze_patient(self, state: PipelineState) -> PipelineState:
         """Step 1: Analyze patient state from context."""
         start = time.perf_counter()
-        context = state.get("context", "")
+        prompt = self._patient_analysis_prompt(state.get("context", ""))
+        if self.main_llm:
+            summary = await self._invoke_llm(self.main_llm, prompt)
+        else:
+            summary = "환자 정보를 확인하세요."  # Fallback
+        return self._patient_analysis_update(summary, time.perf_counter() - start)
 
-        prompt = (
+    @staticmethod
+    def _patient_analysis_prompt(context: str | None) -> str:
+        return (
             "아래 환자 정보를 분석하여 현재 상태를 요약하세요.\n"
             "- 객관적 수치만 전달 (BMI, 혈압, 혈당 등)\n"
             "- 주요 관리 포인트 3-5개 도출\n"
@@ -989,42 +1679,37 @@ class RetrievalPipeline:
             "요약:"
         )
 
-        if self.main_llm:
-            response = self.main_llm.invoke([HumanMessage(content=prompt)])
-            summary = response.content.strip()
-        else:
-            summary = "환자 정보를 확인하세요."  # Fallback
-
+    def _patient_analysis_update(self, summary: str, duration: float) -> PipelineState:
         patient_state = PatientStateAnalysis(
             summary=summary,
             key_metrics={},
             concerns=[],
         )
 
-        duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"patient_state": patient_state}
+        self._append_ag_message(
+            update,
             role="action",
             title="환자 상태 분석 완료",
             content=f"현재 상태 요약 완료",
         )
 
-        self._update_timings(state, "prep_patient_analysis", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "patient_state": patient_state,
-                "observations": observations,
-            }
-        )
-        return base
+        self._update_timings(update, "prep_patient_analysis", duration)
+        return update
 
-    def _node_prep_analyze_history(self, state: dict) -> dict:
+    async def _node_prep_analyze_history(self, state: PipelineState) -> PipelineState:
         """Step 2: Analyze previous consultation patterns."""
         start = time.perf_counter()
-        context = state.get("context", "")
+        prompt = self._history_analysis_prompt(state.get("context", ""))
+        if self.main_llm:
+            analysis_text = await self._invoke_llm(self.main_llm, prompt)
+        else:
+            analysis_text = "없음"  # Fallback
+        return self._history_analysis_update(analysis_text, time.perf_counter() - start)
 
-        prompt = (
+    @staticmethod
+    def _history_analysis_prompt(context: str | None) -> str:
+        return (
             "이전 상담 기록을 분석하여 패턴을 파악하세요.\n"
             "- 다뤘던 주제들\n"
             "- 환자의 실천 여부\n"
@@ -1034,12 +1719,7 @@ class RetrievalPipeline:
             "분석:"
         )
 
-        if self.main_llm:
-            response = self.main_llm.invoke([HumanMessage(content=prompt)])
-            analysis_text = response.content.strip()
-        else:
-            analysis_text = "없음"  # Fallback
-
+    def _history_analysis_update(self, analysis_text: str, duration: float) -> PipelineState:
         if "없음" in analysis_text or not analysis_text:
             pattern = None
         else:
@@ -1049,28 +1729,29 @@ class RetrievalPipeline:
                 difficulties=[],
             )
 
-        duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"consultation_pattern": pattern}
+        self._append_ag_message(
+            update,
             role="action",
             title="상담 이력 분석 완료",
             content="이전 패턴 파악됨" if pattern else "이전 기록 없음",
         )
 
-        self._update_timings(state, "prep_history_analysis", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "consultation_pattern": pattern,
-                "observations": observations,
-            }
-        )
-        return base
+        self._update_timings(update, "prep_history_analysis", duration)
+        return update
 
-    def _node_prep_generate_questions(self, state: dict) -> dict:
+    async def _node_prep_generate_questions(self, state: PipelineState) -> PipelineState:
         """Step 3: Generate expected questions based on patient state."""
         start = time.perf_counter()
+        prompt = self._question_generation_prompt(state)
+        if self.small_llm:
+            questions_text = await self._invoke_llm(self.small_llm, prompt)
+        else:
+            questions_text = ""  # Fallback
+        return self._question_generation_update(questions_text, time.perf_counter() - start)
 
+    @staticmethod
+    def _question_generation_prompt(state: PipelineState) -> str:
         patient_state: PatientStateAnalysis = state["patient_state"]
         pattern: ConsultationPattern | None = state.get("consultation_pattern")
 
@@ -1078,7 +1759,7 @@ class RetrievalPipeline:
         if pattern:
             context_parts.append(f"이전 상담: 있음")
 
-        prompt = (
+        return (
             "아래 환자 정보를 바탕으로 이번 상담에서 나올 가능성이 높은 질문 5개를 생성하세요.\n"
             "- 운동 관련 질문\n"
             "- 식단 관련 질문\n"
@@ -1087,12 +1768,7 @@ class RetrievalPipeline:
             "예상 질문 목록 (번호 없이 한 줄에 하나씩):"
         )
 
-        if self.small_llm:
-            response = self.small_llm.invoke([HumanMessage(content=prompt)])
-            questions_text = response.content.strip()
-        else:
-            questions_text = ""  # Fallback
-
+    def _question_generation_update(self, questions_text: str, duration: float) -> PipelineState:
         expected_questions_text = []
         for line in questions_text.splitlines():
             normalized = line.strip("-• ").strip()
@@ -1101,143 +1777,85 @@ class RetrievalPipeline:
 
         expected_questions_text = expected_questions_text[:5]
 
-        duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"expected_questions_text": expected_questions_text}
+        self._append_ag_message(
+            update,
             role="action",
             title="예상 질문 생성 완료",
             content=f"{len(expected_questions_text)}개의 예상 질문 생성됨",
         )
 
-        self._update_timings(state, "prep_question_generation", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "expected_questions_text": expected_questions_text,
-                "observations": observations,
-            }
-        )
-        return base
+        self._update_timings(update, "prep_question_generation", duration)
+        return update
 
-    def _node_prep_prepare_answers(self, state: dict) -> dict:
-        """Step 4: Prepare recommended answers for expected questions (WITH PARALLEL EXECUTION)."""
+    async def _node_prep_prepare_answers(self, state: PipelineState) -> PipelineState:
+        """Step 4: Prepare recommended answers for all expected questions as one batch."""
         start = time.perf_counter()
-
-        expected_questions_text: List[str] = state.get("expected_questions_text", [])
-
-        async def _prepare_answers_parallel() -> List[ExpectedQuestion]:
-            tasks = []
-            for question_text in expected_questions_text:
-                task = self._prepare_single_answer(question_text)
-                tasks.append(task)
-
-            return await asyncio.gather(*tasks)
-
-        try:
-            expected_questions = asyncio.run(_prepare_answers_parallel())
-        except RuntimeError:
-            try:
-                import nest_asyncio
-
-                nest_asyncio.apply()
-                expected_questions = asyncio.run(_prepare_answers_parallel())
-            except Exception as exc:
-                LOGGER.warning("Parallel answer prep failed, using sequential: %s", exc)
-                expected_questions = [
-                    self._prepare_single_answer_sync(q) for q in expected_questions_text
-                ]
-
-        duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
-            role="action",
-            title="권장 답변 준비 완료",
-            content=f"{len(expected_questions)}개의 답변 준비됨 (병렬 실행)",
-        )
-
-        self._update_timings(state, "prep_answer_preparation", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "expected_questions": expected_questions,
-                "observations": observations,
-            }
+        questions: List[str] = state.get("expected_questions_text", [])
+        if not questions:
+            return self._answers_update([], time.perf_counter() - start)
+
+        needs_graph = self._answer_needs_graph(questions)
+        graph_tasks = {
+            idx: asyncio.create_task(
+                self.graph_retriever.retrieve_async(question, limit=_ANSWER_EVIDENCE_K)
+            )
+            for idx, question in enumerate(questions)
+            if needs_graph[idx]
+        }
+        vector_hits = await self.vector_retriever.retrieve_many_async(
+            questions, limit=_ANSWER_EVIDENCE_K
         )
-        return base
-
-    async def _prepare_single_answer(self, question: str) -> ExpectedQuestion:
-        """Prepare answer for a single expected question (async)."""
-        analysis = self.analyzer.analyze(question)
+        graph_hits = {idx: await task for idx, task in graph_tasks.items()}
+        evidence = self._answer_evidence(vector_hits, graph_hits)
 
-        if analysis.complexity == "simple":
-            chunks = await self.vector_retriever.retrieve_async(question, limit=5)
+        prompts = [self._answer_prompt(q, chunks) for q, chunks in zip(questions, evidence)]
+        if self.small_llm:
+            answers = await self._batch_llm(self.small_llm, prompts)
         else:
-            vector_task = self.vector_retriever.retrieve_async(question, limit=5)
-            graph_task = self.graph_retriever.retrieve_async(question, limit=5)
-            vector_chunks, graph_chunks = await asyncio.gather(vector_task, graph_task)
-            chunks = list(vector_chunks) + list(graph_chunks)
-            chunks.sort(key=lambda c: getattr(c, "score", 0.0) or 0.0, reverse=True)
-            chunks = chunks[:5]
+            answers = [_FALLBACK_ANSWER] * len(questions)
+        expected_questions = [
+            self._expected_question(question, answer, chunks)
+            for question, answer, chunks in zip(questions, answers, evidence)
+        ]
+        return self._answers_update(expected_questions, time.perf_counter() - start)
 
-        # Generate actual answer using LLM
-        evidence_snippets = "\n".join(
-            f"- ({idx+1}) {chunk.chunk_id}: {chunk.text[:200]}"
-            for idx, chunk in enumerate(chunks[:3])
-        )
-        
-        prompt = (
-            "예상 질문에 대한 권장 답변을 작성하세요.\n"
-            "- 2-3문장으로 간결하게 답변\n"
-            "- 구체적인 행동 권장 포함 (예: 하루 30분, 주 5회)\n"
-            "- 제안의 톤 유지 ('~를 권장드립니다', '~하시면 좋습니다')\n"
-            "- 의학적 판단은 피하고 일반적인 가이드라인만 제공\n\n"
-            f"예상 질문: {question}\n\n"
-            f"근거:\n{evidence_snippets}\n\n"
-            "권장 답변:"
-        )
+    def _answer_needs_graph(self, questions: Sequence[str]) -> List[bool]:
+        """Non-simple expected questions also draw on graph evidence."""
+        return [self.analyzer.analyze(question).complexity != "simple" for question in questions]
 
-        if self.small_llm:
-            response = self.small_llm.invoke([HumanMessage(content=prompt)])
-            answer = response.content.strip()
-        else:
-            answer = "근거 자료를 바탕으로 생활습관 개선을 권장합니다."  # Fallback
-        
-        # Extract citations from chunks
-        citations = []
-        for chunk in chunks[:3]:
-            doc_id = chunk.metadata.get("document_id", chunk.document_id)
-            if doc_id:
-                # Try to extract guideline name from document_id or metadata
-                guideline_name = chunk.metadata.get("guideline_name") or doc_id
-                citations.append(f"{guideline_name}" if guideline_name else chunk.chunk_id)
+    @staticmethod
+    def _answer_evidence(
+        vector_hits: Sequence[List[Chunk]], graph_hits: Dict[int, List[Chunk]]
+    ) -> List[List[Chunk]]:
+        evidence: List[List[Chunk]] = []
+        for idx, hits in enumerate(vector_hits):
+            chunks = list(hits) + list(graph_hits.get(idx, []))
+            chunks.sort(key=lambda c: getattr(c, "score", 0.0) or 0.0, reverse=True)
+            evidence.append(chunks[:_ANSWER_EVIDENCE_K])
+        return evidence
 
-        return ExpectedQuestion(
-            question=question,
-            recommended_answer=answer or "일반적인 생활습관 가이드라인을 참고하여 상담하시면 좋습니다.",
-            evidence_chunks=chunks,
-            citations=citations,
+    def _answers_update(
+        self, expected_questions: List[ExpectedQuestion], duration: float
+    ) -> PipelineState:
+        update: PipelineState = {"expected_questions": expected_questions}
+        self._append_ag_message(
+            update,
+            role="action",
+            title="권장 답변 준비 완료",
+            content=f"{len(expected_questions)}개의 답변 준비됨 (일괄 실행)",
         )
 
-    def _prepare_single_answer_sync(self, question: str) -> ExpectedQuestion:
-        """Synchronous fallback for answer preparation."""
-        analysis = self.analyzer.analyze(question)
+        self._update_timings(update, "prep_answer_preparation", duration)
+        return update
 
-        if analysis.complexity == "simple":
-            chunks = self.vector_retriever.retrieve(question, limit=5)
-        else:
-            vector_chunks = self.vector_retriever.retrieve(question, limit=5)
-            graph_chunks = self.graph_retriever.retrieve(question, limit=5)
-            chunks = list(vector_chunks) + list(graph_chunks)
-            chunks.sort(key=lambda c: getattr(c, "score", 0.0) or 0.0, reverse=True)
-            chunks = chunks[:5]
-
-        # Generate actual answer using LLM
+    @staticmethod
+    def _answer_prompt(question: str, chunks: Sequence[Chunk]) -> str:
         evidence_snippets = "\n".join(
             f"- ({idx+1}) {chunk.chunk_id}: {chunk.text[:200]}"
             for idx, chunk in enumerate(chunks[:3])
         )
-        
-        prompt = (
+        return (
             "예상 질문에 대한 권장 답변을 작성하세요.\n"
             "- 2-3문장으로 간결하게 답변\n"
             "- 구체적인 행동 권장 포함 (예: 하루 30분, 주 5회)\n"
@@ -1248,12 +1866,8 @@ class RetrievalPipeline:
             "권장 답변:"
         )
 
-        if self.small_llm:
-            response = self.small_llm.invoke([HumanMessage(content=prompt)])
-            answer = response.content.strip()
-        else:
-            answer = "근거 자료를 바탕으로 생활습관 개선을 권장합니다."  # Fallback
-        
+    @staticmethod
+    def _expected_question(question: str, answer: str, chunks: List[Chunk]) -> ExpectedQuestion:
         # Extract citations from chunks
         citations = []
         for chunk in chunks[:3]:
@@ -1270,7 +1884,7 @@ class RetrievalPipeline:
             citations=citations,
         )
 
-    def _node_prep_delivery_examples(self, state: dict) -> dict:
+    def _node_prep_delivery_examples(self, state: PipelineState) -> PipelineState:
         """Step 5: Generate delivery method examples."""
         start = time.perf_counter()
 
@@ -1286,24 +1900,18 @@ class RetrievalPipeline:
         ]
 
         duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"delivery_examples": delivery_examples}
+        self._append_ag_message(
+            update,
             role="action",
             title="전달 방식 예시 생성 완료",
             content=f"{len(delivery_examples)}개의 전달 예시 생성됨",
         )
 
-        self._update_timings(state, "prep_delivery_examples", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "delivery_examples": delivery_examples,
-                "observations": observations,
-            }
-        )
-        return base
+        self._update_timings(update, "prep_delivery_examples", duration)
+        return update
 
-    def _node_prep_synthesize(self, state: dict) -> dict:
+    def _node_prep_synthesize(self, state: PipelineState) -> PipelineState:
         """Final synthesis node for preparation mode."""
         start = time.perf_counter()
 
@@ -1311,6 +1919,9 @@ class RetrievalPipeline:
         pattern: ConsultationPattern | None = state.get("consultation_pattern")
         expected_questions: List[ExpectedQuestion] = state.get("expected_questions", [])
         delivery_examples: List[DeliveryExample] = state.get("delivery_examples", [])
+        timings = dict(state.get("_timing_entries", []))
+        branch_timings = self._prep_branch_timings(timings)
+        timings.update(branch_timings)
 
         prep_analysis = PreparationAnalysis(
             patient_state=patient_state,
@@ -1321,30 +1932,39 @@ class RetrievalPipeline:
                 "의학적 판단이 필요한 질문은 담당 의사에게 에스컬레이션하세요",
                 "약물 관련 질문은 절대 답변하지 마세요",
             ],
-            timings=dict(state.get("_timing_entries", [])),
+            timings=timings,
         )
 
         duration = time.perf_counter() - start
-        observations = self._append_ag_message(
-            state,
+        update: PipelineState = {"preparation_analysis": prep_analysis}
+        self._append_ag_message(
+            update,
             role="observation",
             title="상담 준비 완료",
             content=f"총 {len(expected_questions)}개의 예상 질문 및 답변 준비됨",
         )
 
-        self._update_timings(state, "prep_synthesis", duration)
-        base = self._base_state(state)
-        base.update(
-            {
-                "preparation_analysis": prep_analysis,
-                "observations": observations,
-            }
-        )
-        return base
+        for stage, branch_duration in branch_timings.items():
+            self._update_timings(update, stage, branch_duration)
+        self._update_timings(update, "prep_synthesis", duration)
+        return update
+
+    @staticmethod
+    def _prep_branch_timings(timings: Dict[str, float]) -> Dict[str, float]:
+        """Wall time of each preparation branch; stages within a branch run back to back."""
+        return {
+            f"prep_branch_{branch}": sum(timings.get(stage, 0.0) for stage in stages)
+            for branch, stages in _PREP_BRANCHES.items()
+        }
+
+    def close(self) -> None:
+        """Stop the background event loop and release the shared Graphiti connection."""
+        self._loop.close()
+        self.graph_retriever.close()
 
     def __del__(self) -> None:  # pragma: no cover - best effort cleanup
         try:
-            self.graph_retriever.close()
+            self.close()
         except Exception:
             pass
 
@@ -0,0 +1,243 @@
+"""Background precomputation of preparation reports for scheduled patients.
+
+Counselors open preparation mode right before a consultation. Running the preparation
+graph ahead of time (e.g. overnight for the next day's schedule) turns that wait into a
+lookup. Reports are stored per patient together with the versions they were built from,
+so a rerun skips patients whose report is still current and an interrupted job resumes
+where it stopped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from langchain_core.messages import AIMessage
+
+from ..cache import PreparationCache
+from ..patient_data import patient_data_version
+from .api import serialize_retrieval_output
+from .pipeline import PREP_PROMPT_VERSION, RetrievalPipeline
+
+LOGGER = logging.getLogger(__name__)
+
+# Same request the workspace sends when a counselor starts preparation
+PREPARATION_QUESTION = (
+    "이번 상담을 위한 준비 자료를 생성해줘. "
+    "핵심 포인트, 예상 질문과 권장 답변, 전달 방식 예시, 주의사항을 포함해서 작성해줘."
+)
+
+
+def default_report_store() -> PreparationCache:
+    """Store shared by the batch job and the API that serves its reports."""
+    cache_dir = Path(os.getenv("CACHE_DIR", ".cache/backend"))
+    # One report per patient, so the store is bounded by the roster; no sweep
+    return PreparationCache(cache_dir / "preparation_reports", max_entries=None)
+
+
+def report_version(pipeline: RetrievalPipeline, patient_id: int) -> str:
+    """Everything a stored report depends on besides the fixed question."""
+    data_version = patient_data_version(patient_id) or "no-data"
+    return f"{data_version}:{pipeline.corpus_version}:{PREP_PROMPT_VERSION}"
+
+
+def load_report(
+    pipeline: RetrievalPipeline, store: PreparationCache, patient_id: int
+) -> Dict[str, Any] | None:
+    """Return the stored report for a patient if it is still current."""
+    return store.get(str(patient_id), report_version(pipeline, patient_id))
+
+
+class StubLLM:
+    """Canned chat model for dry runs; ``delay`` simulates provider latency."""
+
+    reply = (
+        "BMI와 혈압 수치를 중심으로 생활습관 관리가 필요합니다.\n"
+        "걷기 운동은 하루에 얼마나 해야 하나요?\n"
+        "저녁 식단은 어떻게 바꾸면 좋을까요?"
+    )
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+
+    def invoke(self, messages, config=None):  # noqa: ANN001 - LangChain parity
+        if self.delay:
+            time.sleep(self.delay)
+        return AIMessage(content=self.reply)
+
+
+class BoundedLLM:
+    """Share one concurrency limit across every worker calling the wrapped model."""
+
+    def __init__(self, llm, semaphore: threading.BoundedSemaphore) -> None:
+        self._llm = llm
+        self._semaphore = semaphore
+
+    def invoke(self, messages, config=None):  # noqa: ANN001 - LangChain parity
+        with self._semaphore:
+            return self._llm.invoke(messages, config)
+
+    def batch(self, inputs, config=None):  # noqa: ANN001 - LangChain parity
+        # Fan out item by item so each call waits for a slot of the shared limit
+        workers = (config or {}).get("max_concurrency") or len(inputs) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.invoke, inputs))
+
+    # The pipeline's graph is async; the shared limit is a thread semaphore, so waiting
+    # for a slot happens on a worker thread rather than on the event loop
+    async def ainvoke(self, messages, config=None):  # noqa: ANN001 - LangChain parity
+        return await asyncio.to_thread(self.invoke, messages, config)
+
+    async def abatch(self, inputs, config=None):  # noqa: ANN001 - LangChain parity
+        return await asyncio.to_thread(self.batch, inputs, config)
+
+
+@dataclass(slots=True)
+class PrecomputeStats:
+    """Outcome of one batch run."""
+
+    total: int = 0
+    completed: int = 0
+    skipped: int = 0
+    failed: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Reports generated per minute."""
+        return self.completed / self.elapsed * 60.0 if self.elapsed else 0.0
+
+
+class PreparationPrecomputer:
+    """Run the preparation graph for many patients on a bounded worker pool.
+
+    ``workers`` patients are processed at once and at most ``llm_concurrency`` LLM
+    calls are in flight across all of them. The pipeline's LLMs are wrapped in place,
+    so give this class a pipeline of its own.
+    """
+
+    def __init__(
+        self,
+        pipeline: RetrievalPipeline,
+        store: PreparationCache | None = None,
+        *,
+        workers: int = 4,
+        llm_concurrency: int = 4,
+        dry_run: bool = False,
+        stub_delay: float = 0.0,
+    ) -> None:
+        self.pipeline = pipeline
+        self.store = store or default_report_store()
+        self.workers = max(1, workers)
+        self.dry_run = dry_run
+
+        semaphore = threading.BoundedSemaphore(max(1, llm_concurrency))
+        small_llm, main_llm = pipeline.small_llm, pipeline.main_llm
+        if dry_run:
+            small_llm = main_llm = StubLLM(stub_delay)
+            # Dry runs must not leave stub reports behind in the interactive cache either
+            pipeline.prep_cache = None
+        pipeline.small_llm = BoundedLLM(small_llm, semaphore) if small_llm else None
+        pipeline.main_llm = BoundedLLM(main_llm, semaphore) if main_llm else None
+
+    def run(
+        self,
+        patient_ids: Sequence[int],
+        *,
+        force: bool = False,
+        on_progress: Callable[[int, PrecomputeStats], None] | None = None,
+    ) -> PrecomputeStats:
+        """Generate reports for ``patient_ids``; current reports are skipped unless ``force``."""
+        stats = PrecomputeStats(total=len(patient_ids))
+        start = time.perf_counter()
+
+        pending = []
+        for patient_id in patient_ids:
+            if not force and not self.dry_run and load_report(
+                self.pipeline, self.store, patient_id
+            ) is not None:
+                stats.skipped += 1
+                continue
+            pending.append(patient_id)
+        if stats.skipped:
+            LOGGER.info("Skipping %s patients with current reports", stats.skipped)
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="precompute"
+        ) as executor:
+            futures = {executor.submit(self._process, pid): pid for pid in pending}
+            for future in as_completed(futures):
+                patient_id = futures[future]
+                try:
+                    generated = future.result()
+                except Exception as exc:  # pragma: no cover - provider failures
+                    LOGGER.warning("Preparation for patient %s failed (%s)", patient_id, exc)
+                    stats.failed.append(patient_id)
+                else:
+                    if generated:
+                        stats.completed += 1
+                    else:
+                        stats.failed.append(patient_id)
+                stats.elapsed = time.perf_counter() - start
+                done = stats.completed + len(stats.failed)
+                # Arguments are stringified by the PII scrubber, so format numbers here
+                LOGGER.info(
+                    "[%s/%s] patient %s %s (%s reports/min)",
+                    done,
+                    len(pending),
+                    patient_id,
+                    "failed" if patient_id in stats.failed else "done",
+                    f"{stats.throughput:.1f}",
+                )
+                if on_progress is not None:
+                    on_progress(patient_id, stats)
+
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _process(self, patient_id: int) -> bool:
+        # Read the version before the context so a concurrent edit makes the report stale
+        version = report_version(self.pipeline, patient_id)
+        # Same builder as interactive requests with a patient_id, so their cache keys match
+        context = self.pipeline.patient_context.build(patient_id)
+        if context is None:
+            LOGGER.warning("Patient %s not found; skipping", patient_id)
+            return False
+
+        start = time.perf_counter()
+        output = self.pipeline.run(PREPARATION_QUESTION, context=context, mode="preparation")
+        if output.preparation_analysis is None:
+            LOGGER.warning("Preparation for patient %s produced no report", patient_id)
+            return False
+        if not self.dry_run:
+            self.store.set(
+                str(patient_id),
+                {
+                    "patient_id": patient_id,
+                    "generated_at": datetime.now().isoformat(),
+                    "duration": time.perf_counter() - start,
+                    "output": serialize_retrieval_output(output),
+                },
+                version,
+            )
+        return True
+
+
+__all__ = [
+    "BoundedLLM",
+    "PREPARATION_QUESTION",
+    "PrecomputeStats",
+    "PreparationPrecomputer",
+    "StubLLM",
+    "default_report_store",
+    "load_report",
+    "report_version",
+]
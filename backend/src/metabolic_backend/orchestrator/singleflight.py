@@ -0,0 +1,93 @@
+"""Coalesce concurrent identical requests into one execution."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+from ..metrics import record_count
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time; concurrent callers share its result.
+
+    The first caller for a key (the leader) runs the call. Callers arriving while it is
+    in flight wait for the leader and get the same result or exception. Sync and async
+    callers share one table, so a ``run`` and an ``arun`` of the same request coalesce too.
+    If an async leader is cancelled, its followers retry and one of them takes over.
+    """
+
+    def __init__(self, name: str = "singleflight") -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        while True:
+            future, leader = self._claim(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except CancelledError:
+                continue
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._settle(key, future, exc)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future, leader = self._claim(key)
+            if leader:
+                break
+            try:
+                # Shield the shared future: a follower going away must not cancel the leader
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+        try:
+            result = await fn()
+        except BaseException as exc:
+            self._settle(key, future, exc)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    # ------------------------------------------------------------------
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                return future, True
+        record_count(f"{self.name}_coalesced")
+        return future, False
+
+    def _settle(
+        self, key: str, future: Future, exc: BaseException | None = None, *, result=None
+    ) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if isinstance(exc, asyncio.CancelledError):
+            # The leader was cancelled, not failed; waiting followers retry
+            future.cancel()
+        elif exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,304 @@
+"""Read-side helpers over the patient SQLite databases (test.sqlite + survey.sqlite)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List
+
+LOGGER = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+SURVEY_DB = PROJECT_ROOT / "data" / "surveys" / "survey.sqlite"
+TEST_DB = PROJECT_ROOT / "data" / "tests" / "test.sqlite"
+
+
+def patient_id_from_context(context: str | None) -> int | None:
+    """Extract ``patient_id`` from the JSON context the workspace sends, if present."""
+    if not context:
+        return None
+    try:
+        payload = json.loads(context)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    try:
+        return int(payload["patient_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def patient_data_version(
+    patient_id: int, *, test_db: Path = TEST_DB, survey_db: Path = SURVEY_DB
+) -> str | None:
+    """Fingerprint of a patient's ``health_exams`` and ``surveys`` rows.
+
+    Any insert, update or delete of those rows changes the fingerprint. Returns ``None``
+    when neither database is available.
+    """
+    digest = hashlib.sha256()
+    found = False
+    for path, query, key in (
+        (
+            test_db,
+            "SELECT * FROM health_exams WHERE patient_id = ? ORDER BY exam_id",
+            patient_id,
+        ),
+        # patient_id is TEXT in survey.sqlite
+        (
+            survey_db,
+            "SELECT * FROM surveys WHERE patient_id = ? ORDER BY survey_id",
+            str(patient_id),
+        ),
+    ):
+        if not path.exists():
+            continue
+        try:
+            conn = _connect(path)
+            try:
+                rows = [tuple(row) for row in conn.execute(query, (key,))]
+            finally:
+                conn.close()
+        except sqlite3.Error as exc:
+            LOGGER.warning("Could not read %s for patient %s (%s)", path.name, patient_id, exc)
+            continue
+        found = True
+        digest.update(path.name.encode("utf-8"))
+        digest.update(repr(rows).encode("utf-8"))
+    return digest.hexdigest() if found else None
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def list_patient_ids(*, test_db: Path = TEST_DB) -> List[int]:
+    """All patient IDs in ``test.sqlite``, ascending."""
+    conn = _connect(test_db)
+    try:
+        rows = conn.execute("SELECT patient_id FROM patients ORDER BY patient_id")
+        return [row[0] for row in rows]
+    finally:
+        conn.close()
+
+
+# Exam columns carried into the context; everything else in health_exams is bookkeeping
+_EXAM_METRICS = (
+    "bmi",
+    "weight_kg",
+    "waist_cm",
+    "systolic_mmHg",
+    "diastolic_mmHg",
+    "fbg_mg_dl",
+    "tg_mg_dl",
+    "hdl_mg_dl",
+    "ldl_mg_dl",
+)
+_TREND_EXAMS = 5
+
+# Latest survey joined with the one-row-per-survey sections, in a single query
+_SURVEY_QUERY = """
+    SELECT s.survey_id, s.visit_type, s.survey_date,
+           mc.compliant AS medication_compliant,
+           sh.current_status AS smoking, sh.daily_amount AS cigarettes_per_day,
+           ac.frequency AS alcohol_frequency, ac.amount_per_occasion AS alcohol_amount,
+           pa.sedentary_hours, pa.leisure_moderate_days, pa.leisure_vigorous_days,
+           pa.exercise_plan,
+           om.weight_change, om.weight_control_effort,
+           dh.diet_total_score, dh.breakfast_frequency,
+           mh.sleep_hours_weekday, mh.phq9_total_score
+    FROM surveys s
+    LEFT JOIN medication_compliance mc ON mc.survey_id = s.survey_id
+    LEFT JOIN smoking_history sh ON sh.survey_id = s.survey_id
+    LEFT JOIN alcohol_consumption ac ON ac.survey_id = s.survey_id
+    LEFT JOIN physical_activity pa ON pa.survey_id = s.survey_id
+    LEFT JOIN obesity_management om ON om.survey_id = s.survey_id
+    LEFT JOIN diet_habit dh ON dh.survey_id = s.survey_id
+    LEFT JOIN mental_health mh ON mh.survey_id = s.survey_id
+    WHERE s.patient_id = ?
+    ORDER BY s.survey_date DESC
+    LIMIT 1
+"""
+
+
+def _compact(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in row.items() if value is not None}
+
+
+def build_patient_context(
+    patient_id: int,
+    *,
+    max_tokens: int | None = None,
+    test_db: Path = TEST_DB,
+    survey_db: Path = SURVEY_DB,
+) -> str | None:
+    """Render a compact JSON context for one patient straight from the databases.
+
+    Carries the latest exam, per-metric trends over the last few exams and a summary of
+    the latest survey. Names, contacts and resident numbers are left out, as are empty
+    fields. When ``max_tokens`` is set, trends are shortened and then the survey and the
+    trends dropped until the context fits. Returns ``None`` for unknown patients.
+    """
+    if not test_db.exists():
+        return None
+    conn = _connect(test_db)
+    try:
+        patient = conn.execute(
+            "SELECT sex, age FROM patients WHERE patient_id = ?", (patient_id,)
+        ).fetchone()
+        if patient is None:
+            return None
+        exams = conn.execute(
+            f"""
+            SELECT exam_at, {", ".join(f'"{column}"' for column in _EXAM_METRICS)}
+            FROM health_exams
+            WHERE patient_id = ?
+            ORDER BY exam_at DESC
+            LIMIT {_TREND_EXAMS}
+            """,
+            (patient_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    payload: Dict[str, Any] = {"patient_id": patient_id, "patient": _compact(dict(patient))}
+    if exams:
+        latest = dict(exams[0])
+        latest["exam_at"] = str(latest["exam_at"])[:10]
+        payload["latest_exam"] = _compact(latest)
+        trends = {}
+        for column in _EXAM_METRICS:
+            series = [exam[column] for exam in reversed(exams) if exam[column] is not None]
+            if len(series) > 1:
+                trends[column] = series
+        if trends:
+            payload["trends"] = trends
+
+    if survey_db.exists():
+        conn = _connect(survey_db)
+        try:
+            # patient_id is TEXT in survey.sqlite
+            survey = conn.execute(_SURVEY_QUERY, (str(patient_id),)).fetchone()
+            diseases = []
+            if survey is not None:
+                diseases = conn.execute(
+                    """
+                    SELECT disease_name, taking_medication FROM disease_history
+                    WHERE survey_id = ? AND diagnosed
+                    """,
+                    (survey["survey_id"],),
+                ).fetchall()
+        finally:
+            conn.close()
+        if survey is not None:
+            summary = _compact(dict(survey))
+            summary["survey_date"] = str(summary["survey_date"])[:10]
+            if diseases:
+                summary["diseases"] = [
+                    row["disease_name"] + ("(복약)" if row["taking_medication"] else "")
+                    for row in diseases
+                ]
+            payload["survey"] = summary
+
+    return _fit_context(payload, max_tokens)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Conservative token estimate: one per non-ASCII character, one per 4 ASCII ones.
+
+    Deterministic on purpose, so the trimmed context (and the preparation cache key
+    derived from it) does not depend on which tokenizer is installed.
+    """
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def _fit_context(payload: Dict[str, Any], max_tokens: int | None) -> str:
+    """Serialize ``payload``, trimming the least essential sections past ``max_tokens``."""
+    candidates = [payload]
+    if "trends" in payload:
+        shortened = {key: [series[0], series[-1]] for key, series in payload["trends"].items()}
+        candidates.append({**payload, "trends": shortened})
+    base = candidates[-1]
+    if "survey" in base:
+        base = {key: value for key, value in base.items() if key != "survey"}
+        candidates.append(base)
+    if "trends" in base:
+        candidates.append({key: value for key, value in base.items() if key != "trends"})
+
+    for candidate in candidates:
+        context = json.dumps(candidate, ensure_ascii=False, separators=(",", ":"))
+        if max_tokens is None or _estimate_tokens(context) <= max_tokens:
+            return context
+    return context
+
+
+class PatientContextBuilder:
+    """Build patient contexts on the server, cached per patient data version.
+
+    A cached context is reused until the patient's exam or survey rows change, so
+    repeated preparation requests skip the database reads and rendering.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_tokens: int | None = 600,
+        max_entries: int = 256,
+        test_db: Path = TEST_DB,
+        survey_db: Path = SURVEY_DB,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        self.test_db = test_db
+        self.survey_db = survey_db
+        self._cache: "OrderedDict[int, tuple[str | None, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def build(self, patient_id: int) -> str | None:
+        """Return the context for ``patient_id``, or ``None`` for unknown patients."""
+        version = patient_data_version(
+            patient_id, test_db=self.test_db, survey_db=self.survey_db
+        )
+        with self._lock:
+            cached = self._cache.get(patient_id)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(patient_id)
+                self.stats["hits"] += 1
+                return cached[1]
+            self.stats["misses"] += 1
+
+        context = build_patient_context(
+            patient_id,
+            max_tokens=self.max_tokens,
+            test_db=self.test_db,
+            survey_db=self.survey_db,
+        )
+        if context is None:
+            return None
+        with self._lock:
+            self._cache[patient_id] = (version, context)
+            self._cache.move_to_end(patient_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return context
+
+
+__all__ = [
+    "PatientContextBuilder",
+    "SURVEY_DB",
+    "TEST_DB",
+    "build_patient_context",
+    "list_patient_ids",
+    "patient_data_version",
+    "patient_id_from_context",
+]
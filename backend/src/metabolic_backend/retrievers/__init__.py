@@ -2,5 +2,20 @@
 
 from .graph import GraphRetriever
 from .vector import VectorRetriever
+from .vector_index import (
+    ExactVectorIndex,
+    IVFVectorIndex,
+    QuantizedVectorIndex,
+    VectorIndex,
+    build_vector_index,
+)
 
-__all__ = ["GraphRetriever", "VectorRetriever"]
+__all__ = [
+    "ExactVectorIndex",
+    "GraphRetriever",
+    "IVFVectorIndex",
+    "QuantizedVectorIndex",
+    "VectorIndex",
+    "VectorRetriever",
+    "build_vector_index",
+]
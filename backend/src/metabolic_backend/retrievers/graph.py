@@ -5,14 +5,16 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
-import re
 from dataclasses import replace
 from typing import Iterable, List, Sequence
 
 from graphiti_core import Graphiti  # type: ignore
 
+from ..analysis.tokenizer import index_terms
 from ..config import get_settings
 from ..ingestion import Chunk, iter_chunks
+from .graphiti_pool import GraphitiClientPool
+from .keyword_index import KeywordIndex
 
 LOGGER = logging.getLogger(__name__)
 
@@ -32,6 +34,8 @@ class GraphRetriever:
         settings = get_settings()
         self._chunks = list(chunks) if chunks is not None else list(iter_chunks())
         self._chunk_index = {chunk.chunk_id: chunk for chunk in self._chunks}
+        self._keyword_index = KeywordIndex(self._analyze)
+        self._keyword_index.add_many((chunk.chunk_id, chunk.text) for chunk in self._chunks)
         self._uri = uri
         self._user = user or settings.neo4j_user
         self._password = password or settings.neo4j_password
@@ -39,7 +43,17 @@ class GraphRetriever:
         self._graphiti_ready = bool(
             Graphiti is not None and self._uri and self._user and self._password
         )
-        if not self._graphiti_ready:
+        self._pool: GraphitiClientPool | None = None
+        if self._graphiti_ready:
+            # The Neo4j connection itself is opened lazily on the first search.
+            self._pool = GraphitiClientPool(
+                self._uri,
+                self._user,
+                self._password,
+                llm_client=self._llm_client,
+                pool_size=settings.graphiti_pool_size,
+            )
+        else:
             LOGGER.debug(
                 "Graphiti search unavailable; graph retrieval will use local cache fallback."
             )
@@ -59,14 +73,16 @@ class GraphRetriever:
 
     # ------------------------------------------------------------------
     def close(self) -> None:
-        # Graphiti connections are short-lived per query; nothing to close.
-        return None
+        """Release the shared Graphiti connection; the next search reconnects."""
+        if self._pool is not None:
+            self._pool.close()
 
     # ------------------------------------------------------------------
-    def retrieve(self, query: str, *, limit: int = 3) -> List[Chunk]:
+    def retrieve(self, query: str, *, limit: int = 3, timeout: float | None = None) -> List[Chunk]:
+        """Search Graphiti, giving up on it after ``timeout`` seconds, else the keyword index."""
         if self._graphiti_ready:
             try:
-                results = self._retrieve_from_graphiti(query, limit)
+                results = self._retrieve_from_graphiti(query, limit, timeout)
                 if results:
                     return results
             except Exception as exc:  # pragma: no cover - depends on external service
@@ -74,33 +90,37 @@ class GraphRetriever:
 
         return self._retrieve_from_cache(query, limit)
 
-    async def retrieve_async(self, query: str, *, limit: int = 3) -> List[Chunk]:
+    async def retrieve_async(
+        self, query: str, *, limit: int = 3, timeout: float | None = None
+    ) -> List[Chunk]:
         """Async version of retrieve for parallel execution."""
         if self._graphiti_ready:
             try:
-                results = await self._search_graphiti(query, limit)
+                # Timing out cancels the search on the Graphiti loop, freeing its slot
+                edges = await asyncio.wait_for(
+                    self._pool.asearch(query, num_results=limit * 2), timeout
+                )
+                results = self._edges_to_chunks(edges, limit)
                 if results:
                     return results
+            except asyncio.TimeoutError:
+                LOGGER.warning("Graphiti search timed out; falling back to keyword scan.")
             except Exception as exc:  # pragma: no cover - depends on external service
                 LOGGER.warning("Graphiti search failed (%s); falling back to keyword scan.", exc)
 
-        # Fallback to cache (run in executor to avoid blocking)
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._retrieve_from_cache, query, limit)
+        # Fallback to cache (run in a worker thread to avoid blocking)
+        return await asyncio.to_thread(self._retrieve_from_cache, query, limit)
 
     # ------------------------------------------------------------------
-    async def _search_graphiti(self, query: str, limit: int) -> List[Chunk]:
-        """Internal async search method for Graphiti."""
-        assert Graphiti is not None  # for type checkers
-        if self._llm_client is not None:
-            client = Graphiti(self._uri, self._user, self._password, llm_client=self._llm_client)
-        else:
-            client = Graphiti(self._uri, self._user, self._password)
-        try:
-            edges = await client.search(query=query, num_results=limit * 2)
-        finally:
-            await client.close()
-
+    def _retrieve_from_graphiti(
+        self, query: str, limit: int, timeout: float | None = None
+    ) -> List[Chunk]:
+        """Synchronous Graphiti search through the shared client."""
+        assert self._pool is not None  # for type checkers
+        edges = self._pool.search(query, num_results=limit * 2, timeout=timeout)
+        return self._edges_to_chunks(edges, limit)
+
+    def _edges_to_chunks(self, edges: Iterable, limit: int) -> List[Chunk]:
         seen: set[str] = set()
         results: List[Chunk] = []
         for edge in edges:
@@ -125,6 +145,7 @@ class GraphRetriever:
                     )
                     self._chunks.append(base)
                     self._chunk_index[chunk_id] = base
+                    self._keyword_index.add(chunk_id, content)
                 enriched = replace(base)
                 enriched.metadata = dict(base.metadata)
                 enriched.metadata["graph_fact"] = getattr(edge, "fact", "")
@@ -136,41 +157,11 @@ class GraphRetriever:
                     return results
         return results
 
-    def _retrieve_from_graphiti(self, query: str, limit: int) -> List[Chunk]:
-        """Synchronous wrapper for Graphiti search."""
-        try:
-            return asyncio.run(self._search_graphiti(query, limit))
-        except RuntimeError as exc:
-            # Try nest_asyncio to allow nested event loops
-            try:
-                import nest_asyncio
-
-                nest_asyncio.apply()
-                return asyncio.run(self._search_graphiti(query, limit))
-            except Exception as nested_exc:
-                LOGGER.warning(
-                    "Event loop already running; skipping Graphiti search. "
-                    "Install nest_asyncio or run outside async context: %s",
-                    exc,
-                )
-                return []
-
     # ------------------------------------------------------------------
     def _retrieve_from_cache(self, query: str, limit: int) -> List[Chunk]:
-        keywords = self._extract_keywords(query)
-        if not keywords:
-            return []
-
-        scored: List[tuple[int, Chunk]] = []
-        for chunk in self._chunks:
-            lowered = chunk.text.lower()
-            score = sum(lowered.count(keyword.lower()) for keyword in keywords)
-            if score:
-                scored.append((score, chunk))
-
-        scored.sort(key=lambda item: item[0], reverse=True)
         top: List[Chunk] = []
-        for score, chunk in scored[:limit]:
+        for chunk_id, score in self._keyword_index.search(query, limit=limit):
+            chunk = self._chunk_index[chunk_id]
             enriched = replace(chunk)
             enriched.metadata = dict(chunk.metadata)
             enriched.metadata["retrieval"] = "keyword"
@@ -180,9 +171,8 @@ class GraphRetriever:
 
     # ------------------------------------------------------------------
     @staticmethod
-    def _extract_keywords(text: str) -> List[str]:
-        candidates = [token.strip() for token in re.split(r"[\\s,.;:?!]", text) if token.strip()]
-        return [token for token in candidates if len(token) > 1]
+    def _analyze(text: str) -> List[str]:
+        return index_terms(text)
 
 
 __all__ = ["GraphRetriever"]
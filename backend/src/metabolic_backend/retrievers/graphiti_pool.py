@@ -0,0 +1,185 @@
+"""Long-lived Graphiti client shared across graph retrieval calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List
+
+from graphiti_core import Graphiti  # type: ignore
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+LOGGER = logging.getLogger(__name__)
+
+# Errors that indicate the Neo4j connection (not the query) is broken.
+_CONNECTION_ERRORS = (ServiceUnavailable, SessionExpired, ConnectionError, OSError)
+
+
+class _Session:
+    """Background loop with its semaphore and client; replaced wholesale by ``close``."""
+
+    def __init__(self, pool_size: int) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="graphiti-client", daemon=True
+        )
+        # Kept until the loop stops so queued searches can always acquire it
+        self.semaphore = asyncio.Semaphore(pool_size)
+        self.pool_size = pool_size
+        # Only touched from ``loop``.
+        self.client: Graphiti | None = None
+        self.leases: Dict[Graphiti, int] = {}
+
+
+class GraphitiClientPool:
+    """Lazily connect one Graphiti client and bound the number of in-flight searches.
+
+    Graphiti's async Neo4j driver is tied to the event loop that created it, so the
+    client lives on a dedicated background loop. Sync callers block on the submitted
+    future; async callers await it without blocking their own loop.
+
+    Searches lease the current client. A client that hit a connection error is retired
+    (new searches connect afresh) but only closed once its last lease is returned, so one
+    failure does not break the other searches still awaiting it.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        user: str | None,
+        password: str | None,
+        *,
+        llm_client=None,
+        pool_size: int = 4,
+    ) -> None:
+        self._uri = uri
+        self._user = user
+        self._password = password
+        self._llm_client = llm_client
+        self._pool_size = max(1, pool_size)
+
+        self._lock = threading.Lock()
+        self._session: _Session | None = None
+
+    # ------------------------------------------------------------------
+    @property
+    def pool_size(self) -> int:
+        return self._pool_size
+
+    @property
+    def _loop(self) -> asyncio.AbstractEventLoop | None:
+        session = self._session
+        return session.loop if session is not None else None
+
+    def search(
+        self, query: str, *, num_results: int, timeout: float | None = None
+    ) -> List[Any]:
+        """Blocking search; raises ``TimeoutError`` after ``timeout`` seconds."""
+        future = self._submit(query, num_results)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Cancelling the task frees its search slot and client lease
+            future.cancel()
+            raise
+
+    async def asearch(self, query: str, *, num_results: int) -> List[Any]:
+        return await asyncio.wrap_future(self._submit(query, num_results))
+
+    def close(self) -> None:
+        """Let in-flight searches finish, then close the client and stop the loop.
+
+        Idempotent; a later search starts a fresh session.
+        """
+        with self._lock:
+            session, self._session = self._session, None
+        if session is None:
+            return
+
+        loop = session.loop
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(session), loop).result(timeout=10)
+        except Exception as exc:  # pragma: no cover - best effort cleanup
+            LOGGER.debug("Graphiti client close failed (%s)", exc)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            session.thread.join(timeout=5)
+            if not session.thread.is_alive():
+                loop.close()
+
+    # ------------------------------------------------------------------
+    def _submit(self, query: str, num_results: int) -> Future:
+        with self._lock:
+            if self._session is None:
+                session = _Session(self._pool_size)
+                session.thread.start()
+                self._session = session
+            session = self._session
+            return asyncio.run_coroutine_threadsafe(
+                self._search(session, query, num_results), session.loop
+            )
+
+    async def _search(self, session: _Session, query: str, num_results: int) -> List[Any]:
+        async with session.semaphore:
+            for attempt in range(2):
+                client = self._lease(session)
+                try:
+                    return await client.search(query=query, num_results=num_results)
+                except _CONNECTION_ERRORS as exc:
+                    # Later searches connect afresh; this one closes when its users are done
+                    if session.client is client:
+                        session.client = None
+                    if attempt:
+                        raise
+                    LOGGER.warning("Graphiti connection failed (%s); reconnecting.", exc)
+                finally:
+                    await self._release(session, client)
+        return []  # pragma: no cover - loop always returns or raises
+
+    async def _shutdown(self, session: _Session) -> None:
+        # Holding every permit means all queued and in-flight searches have finished
+        for _ in range(session.pool_size):
+            await session.semaphore.acquire()
+        client, session.client = session.client, None
+        if client is not None and not session.leases.get(client):
+            await self._disconnect(client)
+
+    def _lease(self, session: _Session) -> Graphiti:
+        if session.client is None:
+            session.client = self._connect()
+        client = session.client
+        session.leases[client] = session.leases.get(client, 0) + 1
+        return client
+
+    async def _release(self, session: _Session, client: Graphiti) -> None:
+        remaining = session.leases[client] - 1
+        if remaining:
+            session.leases[client] = remaining
+            return
+        del session.leases[client]
+        if session.client is not client:
+            await self._disconnect(client)
+
+    def _connect(self) -> Graphiti:
+        if self._llm_client is not None:
+            return Graphiti(
+                self._uri,
+                self._user,
+                self._password,
+                llm_client=self._llm_client,
+                max_coroutines=self._pool_size,
+            )
+        return Graphiti(self._uri, self._user, self._password, max_coroutines=self._pool_size)
+
+    @staticmethod
+    async def _disconnect(client: Graphiti) -> None:
+        try:
+            await client.close()
+        except Exception as exc:  # pragma: no cover - best effort cleanup
+            LOGGER.debug("Graphiti client close failed (%s)", exc)
+
+
+__all__ = ["GraphitiClientPool"]
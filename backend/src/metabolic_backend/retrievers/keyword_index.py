@@ -0,0 +1,94 @@
+"""In-memory inverted index with BM25 scoring for keyword retrieval."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+Analyzer = Callable[[str], List[str]]
+
+
+class KeywordIndex:
+    """Inverted index mapping terms to per-document term frequencies.
+
+    Queries only touch the postings of their own terms, so lookup cost grows with
+    the number of matching documents rather than with the corpus size. Adds and
+    searches may run on different threads (graph results are indexed as they arrive),
+    so both hold the index lock.
+    """
+
+    def __init__(self, analyzer: Analyzer, *, k1: float = 1.5, b: float = 0.75) -> None:
+        self._analyzer = analyzer
+        self._k1 = k1
+        self._b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._doc_lengths
+
+    def add(self, key: str, text: str) -> None:
+        """Index ``text`` under ``key``, replacing any previous entry."""
+        terms = Counter(self._analyzer(text))
+        length = sum(terms.values())
+        with self._lock:
+            if key in self._doc_lengths:
+                self._remove(key)
+            self._doc_terms[key] = tuple(terms)
+            self._doc_lengths[key] = length
+            self._total_length += length
+            for term, freq in terms.items():
+                self._postings.setdefault(term, {})[key] = freq
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        for key, text in items:
+            self.add(key, text)
+
+    def search(self, query: str, *, limit: int) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` ``(key, score)`` pairs ordered by BM25 score."""
+        if limit <= 0:
+            return []
+        query_terms = set(self._analyzer(query))
+        with self._lock:
+            scores = self._score(query_terms)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    # ------------------------------------------------------------------
+    def _score(self, query_terms: Iterable[str]) -> Dict[str, float]:
+        if not self._doc_lengths:
+            return {}
+
+        doc_count = len(self._doc_lengths)
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[str, float] = {}
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+            for key, freq in postings.items():
+                norm = self._k1 * (1.0 - self._b + self._b * self._doc_lengths[key] / avg_length)
+                scores[key] = scores.get(key, 0.0) + idf * freq * (self._k1 + 1.0) / (freq + norm)
+        return scores
+
+    def _remove(self, key: str) -> None:
+        for term in self._doc_terms.pop(key):
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(key)
+
+
+__all__ = ["KeywordIndex"]
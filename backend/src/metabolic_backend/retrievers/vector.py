@@ -1,4 +1,4 @@
-"""Vector retrieval utilities backed by a persisted Chroma store."""
+"""Vector retrieval over a persisted Chroma store or an in-process index."""
 
 from __future__ import annotations
 
@@ -7,19 +7,40 @@ import hashlib
 import json
 import logging
 import os
+from dataclasses import replace
 from pathlib import Path
-from typing import List, Sequence
+from typing import Callable, Dict, List, Sequence
+
+import chromadb
+import numpy as np
+from chromadb.errors import NotFoundError
+from langchain_core.documents import Document
 
 from ..config import get_settings
 from ..embeddings import OpenAIEmbeddings
-from ..ingestion import Chunk, iter_chunks
-from ..ingestion.stores import ChromaVectorStore
+from ..ingestion import Chunk, iter_chunks, load_embedding_matrix
+from .vector_index import VectorIndex, build_vector_index
 
 LOGGER = logging.getLogger(__name__)
 
+# Chroma reports distances in the collection's space (``l2`` is squared Euclidean). For
+# the unit-length embeddings ingestion stores, each maps back to cosine similarity, the
+# score the in-process indexes return.
+_DISTANCE_SCORES: Dict[str, Callable[[float], float]] = {
+    "cosine": lambda distance: 1.0 - distance,
+    "ip": lambda distance: 1.0 - distance,
+    "l2": lambda distance: 1.0 - distance / 2.0,
+}
+
 
 class VectorRetriever:
-    """Search chunks using vector similarity stored in Chroma."""
+    """Search chunks by vector similarity, in Chroma or an in-process index.
+
+    ``backend`` (default: the ``VECTOR_BACKEND`` setting) selects ``"chroma"`` or an
+    in-process index: ``"exact"``, ``"ivf"``, ``"int8"`` or ``"binary"``. The index is
+    built over the mapped embedding matrix that ingestion writes to ``embeddings_dir``;
+    embeddings carried by the chunks themselves are ignored.
+    """
 
     def __init__(
         self,
@@ -28,6 +49,8 @@ class VectorRetriever:
         embedding_client: OpenAIEmbeddings | None = None,
         persist_directory: str | Path | None = None,
         collection_name: str | None = None,
+        backend: str | None = None,
+        embeddings_dir: str | Path | None = None,
     ) -> None:
         self._settings = get_settings()
         self._embedding_client = embedding_client or OpenAIEmbeddings(
@@ -37,6 +60,20 @@ class VectorRetriever:
         self._chunks = list(chunks) if chunks is not None else list(iter_chunks())
         self._chunk_index = {chunk.chunk_id: chunk for chunk in self._chunks}
 
+        self.backend = backend or self._settings.vector_backend
+        self._index: VectorIndex | None = None
+        self._client: chromadb.ClientAPI | None = None
+        self._collection: chromadb.Collection | None = None
+        if self.backend != "chroma":
+            self._index = self._build_index(
+                Path(embeddings_dir).expanduser()
+                if embeddings_dir is not None
+                else self._settings.cache_root / "vector_store"
+            )
+            if self._index is None:
+                LOGGER.warning("No chunk embeddings to index; vector retrieval disabled.")
+            return
+
         default_dir = self._settings.cache_root / "vector_store" / "chroma_db"
         if persist_directory is not None:
             persist_path = Path(persist_directory).expanduser()
@@ -49,59 +86,234 @@ class VectorRetriever:
         self._collection_name = collection_name or os.getenv("CHROMA_COLLECTION", "metabolic_chunks")
 
         try:
-            self._store: ChromaVectorStore | None = ChromaVectorStore(
-                persist_directory=self._persist_directory,
-                collection_name=self._collection_name,
-                embedding_client=self._embedding_client,
-            )
+            self._client = chromadb.PersistentClient(path=str(self._persist_directory))
         except Exception as exc:  # pragma: no cover - dependency issues
             LOGGER.warning(
                 "Chroma vector store unavailable (%s); vector retrieval disabled.", exc
             )
-            self._store = None
+            self._client = None
+
+    def _build_index(self, embeddings_dir: Path) -> VectorIndex | None:
+        loaded = load_embedding_matrix(embeddings_dir, dtype=self._settings.embedding_store_dtype)
+        if loaded is None:
+            return None
+        all_ids, matrix = loaded
+        rows = [idx for idx, chunk_id in enumerate(all_ids) if chunk_id in self._chunk_index]
+        ids = [all_ids[idx] for idx in rows]
+        if len(rows) < len(all_ids):
+            # Fancy indexing copies, so only subset when the corpus was filtered
+            matrix = matrix[rows]
+        if len(ids) < len(self._chunks):
+            LOGGER.warning(
+                "%s of %s chunks have no embedding and are not indexed",
+                len(self._chunks) - len(ids),
+                len(self._chunks),
+            )
+        if not ids:
+            return None
+
+        options = {}
+        if self.backend == "ivf":
+            options = {
+                "n_lists": self._settings.vector_ivf_lists or None,
+                "n_probe": self._settings.vector_ivf_probes,
+            }
+        elif self.backend in ("int8", "binary"):
+            options = {"rescore_factor": self._settings.vector_rescore_factor}
+        return build_vector_index(ids, matrix, self.backend, **options)
 
     # ------------------------------------------------------------------
     def retrieve(self, query: str, *, limit: int = 3) -> List[Chunk]:
         if limit <= 0 or not query.strip():
             return []
 
-        if self._store is None:
-            LOGGER.debug("Chroma vector store not initialized; returning no results")
+        if self._client is None and self._index is None:
+            LOGGER.debug("Vector store not initialized; returning no results")
             return []
 
         try:
-            vectorstore = self._store.load()
-            return self._search(vectorstore, query, limit)
+            embedding = self._embedding_client.embed_text(query)
+            return self._search_by_vector(embedding, limit)
         except Exception as exc:  # pragma: no cover - defensive
             LOGGER.warning("Vector search failed (%s)", exc)
             return []
 
     async def retrieve_async(self, query: str, *, limit: int = 3) -> List[Chunk]:
-        """Async wrapper around synchronous retrieval."""
+        """Embed the query without blocking the event loop, then search."""
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: self.retrieve(query, limit=limit))
+        if limit <= 0 or not query.strip():
+            return []
+
+        if self._client is None and self._index is None:
+            LOGGER.debug("Vector store not initialized; returning no results")
+            return []
 
-    # ------------------------------------------------------------------
-    def _search(self, vectorstore, query: str, limit: int) -> List[Chunk]:
         try:
-            doc_pairs = vectorstore.similarity_search_with_relevance_scores(query, k=limit)
-            score_fn = float
-        except AttributeError:
-            doc_pairs = vectorstore.similarity_search_with_score(query, k=limit)
-            score_fn = self._distance_to_score
-
-        results: List[Chunk] = []
-        for doc, raw_score in doc_pairs:
-            chunk = self._document_to_chunk(doc)
-            chunk.metadata.setdefault("retrieval", "vector")
-            try:
-                chunk.score = score_fn(raw_score)
-            except Exception:  # pragma: no cover - defensive
-                chunk.score = 0.0
-            results.append(chunk)
+            embedding = await self.embed_query_async(query)
+            return (await self._asearch_by_vectors([embedding], limit))[0]
+        except Exception as exc:  # pragma: no cover - defensive
+            LOGGER.warning("Vector search failed (%s)", exc)
+            return []
+
+    async def embed_query_async(self, query: str) -> List[float]:
+        """Embed ``query`` the way :meth:`retrieve_async` does, for callers that reuse it."""
+        aembed = getattr(self._embedding_client, "aembed_text", None)
+        if aembed is not None:
+            return await aembed(query)
+        return await asyncio.to_thread(self._embedding_client.embed_text, query)
+
+    async def retrieve_by_vector_async(
+        self, embedding: Sequence[float], *, limit: int = 3
+    ) -> List[Chunk]:
+        """Search with an embedding from :meth:`embed_query_async` instead of a query."""
+        if limit <= 0:
+            return []
+
+        if self._client is None and self._index is None:
+            LOGGER.debug("Vector store not initialized; returning no results")
+            return []
+
+        try:
+            return (await self._asearch_by_vectors([embedding], limit))[0]
+        except Exception as exc:  # pragma: no cover - defensive
+            LOGGER.warning("Vector search failed (%s)", exc)
+            return []
+
+    def retrieve_many(self, queries: Sequence[str], *, limit: int = 3) -> List[List[Chunk]]:
+        """Search several queries with one embedding request and one index query.
+
+        Returns one result list per query, in order; blank queries get no results.
+        """
+        results: List[List[Chunk]] = [[] for _ in queries]
+        active = [idx for idx, query in enumerate(queries) if query.strip()]
+        if limit <= 0 or not active:
+            return results
+
+        if self._client is None and self._index is None:
+            LOGGER.debug("Vector store not initialized; returning no results")
+            return results
+
+        try:
+            embeddings = self._embedding_client.embed_batch([queries[idx] for idx in active])
+            for idx, hits in zip(active, self._search_by_vectors(embeddings, limit)):
+                results[idx] = hits
+        except Exception as exc:  # pragma: no cover - defensive
+            LOGGER.warning("Vector search failed (%s)", exc)
         return results
 
+    async def retrieve_many_async(
+        self, queries: Sequence[str], *, limit: int = 3
+    ) -> List[List[Chunk]]:
+        """Async counterpart of :meth:`retrieve_many`."""
+        results: List[List[Chunk]] = [[] for _ in queries]
+        active = [idx for idx, query in enumerate(queries) if query.strip()]
+        if limit <= 0 or not active:
+            return results
+
+        if self._client is None and self._index is None:
+            LOGGER.debug("Vector store not initialized; returning no results")
+            return results
+
+        try:
+            texts = [queries[idx] for idx in active]
+            aembed = getattr(self._embedding_client, "aembed_batch", None)
+            if aembed is not None:
+                embeddings = await aembed(texts)
+            else:
+                embeddings = await asyncio.to_thread(self._embedding_client.embed_batch, texts)
+            hits_per_query = await self._asearch_by_vectors(embeddings, limit)
+            for idx, hits in zip(active, hits_per_query):
+                results[idx] = hits
+        except Exception as exc:  # pragma: no cover - defensive
+            LOGGER.warning("Vector search failed (%s)", exc)
+        return results
+
+    # ------------------------------------------------------------------
+    def _search_by_vector(self, embedding: Sequence[float], limit: int) -> List[Chunk]:
+        return self._search_by_vectors([embedding], limit)[0]
+
+    async def _asearch_by_vectors(
+        self, embeddings: Sequence[Sequence[float]], limit: int
+    ) -> List[List[Chunk]]:
+        if self._index is not None:
+            # An in-process search takes microseconds; a thread hop would cost more
+            return self._search_by_vectors(embeddings, limit)
+        # Chroma's client is synchronous; keep the (local) index lookup off the loop.
+        return await asyncio.to_thread(self._search_by_vectors, embeddings, limit)
+
+    def _search_by_vectors(
+        self, embeddings: Sequence[Sequence[float]], limit: int
+    ) -> List[List[Chunk]]:
+        if self._index is not None:
+            return self._search_index(embeddings, limit)
+        collection = self._load_collection()
+        if collection is None:
+            return [[] for _ in embeddings]
+        # One collection query for all embeddings; LangChain's wrapper only takes one at a time
+        response = collection.query(
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=limit,
+            include=["documents", "metadatas", "distances"],
+        )
+        score_fn = _DISTANCE_SCORES.get(self._distance_space(collection), self._distance_to_score)
+        return [
+            [
+                self._scored_chunk(
+                    Document(page_content=text, metadata=metadata or {}), distance, score_fn
+                )
+                for text, metadata, distance in zip(texts, metadatas, distances)
+                if text is not None
+            ]
+            for texts, metadatas, distances in zip(
+                response["documents"], response["metadatas"], response["distances"]
+            )
+        ]
+
+    def _search_index(
+        self, embeddings: Sequence[Sequence[float]], limit: int
+    ) -> List[List[Chunk]]:
+        results = self._index.search(np.asarray(embeddings, dtype=np.float32), limit)
+        return [
+            [self._indexed_chunk(chunk_id, score) for chunk_id, score in hits]
+            for hits in results
+        ]
+
+    def _indexed_chunk(self, chunk_id: str, score: float) -> Chunk:
+        base = self._chunk_index[chunk_id]
+        metadata = dict(base.metadata)
+        metadata.setdefault("retrieval", "vector")
+        # Hits leave without the embedding, like Chroma results
+        return replace(base, embedding=None, score=score, metadata=metadata)
+
+    def _load_collection(self) -> chromadb.Collection | None:
+        """The ingested collection, or None until ingestion has created it."""
+        if self._collection is None:
+            try:
+                self._collection = self._client.get_collection(self._collection_name)
+            except NotFoundError:
+                LOGGER.debug("Chroma collection %s not found", self._collection_name)
+        return self._collection
+
+    @staticmethod
+    def _distance_space(collection: chromadb.Collection) -> str:
+        configuration = collection.configuration or {}
+        for index in ("hnsw", "spann"):
+            space = (configuration.get(index) or {}).get("space")
+            if space:
+                return space
+        return (collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _scored_chunk(
+        self, doc: Document, distance: float, score_fn: Callable[[float], float]
+    ) -> Chunk:
+        chunk = self._document_to_chunk(doc)
+        chunk.metadata.setdefault("retrieval", "vector")
+        try:
+            chunk.score = float(score_fn(distance))
+        except Exception:  # pragma: no cover - defensive
+            chunk.score = 0.0
+        return chunk
+
     # ------------------------------------------------------------------
     def _document_to_chunk(self, doc) -> Chunk:
         metadata = dict(getattr(doc, "metadata", {}) or {})
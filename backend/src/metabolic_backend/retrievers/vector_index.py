@@ -0,0 +1,288 @@
+"""In-process vector indexes over the chunk embeddings written by ingestion.
+
+An alternative to Chroma: ingestion already writes every chunk's embedding to a mapped
+matrix, so searching it with NumPy needs no vector database process, no LangChain
+wrapper and no metadata decoding per hit. The exact and IVF indexes score the mapped
+rows a block at a time; the quantized indexes keep only compact codes in memory and
+read full-precision rows to rescore their candidates.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Iterator, List, Protocol, Sequence, Tuple
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+# Set bits per byte value, for Hamming distances over packed sign bits
+_POPCOUNT = (
+    np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int32)
+)
+
+# Rows converted to float32 at a time, bounding the temporary copies of mapped data
+_BLOCK_ROWS = 4096
+
+# (chunk_id, cosine similarity) pairs, best first
+SearchResult = List[Tuple[str, float]]
+
+
+class VectorIndex(Protocol):
+    """Cosine top-k search over a fixed set of chunk embeddings."""
+
+    ids: List[str]
+
+    def search(self, queries: np.ndarray, limit: int) -> List[SearchResult]:
+        """Return the ``limit`` best chunks for each row of ``queries``."""
+        ...
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the ``limit`` highest scores, best first."""
+    if limit < scores.shape[0]:
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _prepare_queries(queries: np.ndarray, dim: int) -> np.ndarray:
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    if queries.shape[1] != dim:
+        raise ValueError(
+            f"query dimension {queries.shape[1]} does not match index dimension {dim}"
+        )
+    return _normalize_rows(queries)
+
+
+def _row_blocks(matrix: np.ndarray) -> Iterator[Tuple[slice, np.ndarray]]:
+    """``(rows, float32 block)`` pairs covering ``matrix`` ``_BLOCK_ROWS`` rows at a time.
+
+    Blocks of a float32 matrix are views into it, so callers must not modify them.
+    """
+    for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _BLOCK_ROWS], dtype=np.float32)
+        yield slice(start, start + len(block)), block
+
+
+class ExactVectorIndex:
+    """Brute-force cosine search over ``matrix``, typically a read-only ``np.memmap``.
+
+    The matrix is not copied: each search converts it to float32 a block at a time,
+    dividing by norms computed once up front, and ``argpartition`` selects the top ``k``
+    without sorting the whole corpus.
+    """
+
+    def __init__(self, ids: Sequence[str], matrix: np.ndarray) -> None:
+        if len(ids) != matrix.shape[0]:
+            raise ValueError("ids and matrix rows differ in length")
+        self.ids = list(ids)
+        self.matrix = matrix
+        self._norms = np.empty(matrix.shape[0], dtype=np.float32)
+        for rows, block in _row_blocks(matrix):
+            self._norms[rows] = np.maximum(np.linalg.norm(block, axis=1), 1e-12)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(self, queries: np.ndarray, limit: int) -> List[SearchResult]:
+        queries = self._prepare(queries)
+        if limit <= 0 or not self.ids:
+            return [[] for _ in queries]
+        scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        for rows, block in _row_blocks(self.matrix):
+            scores[:, rows] = (queries @ block.T) / self._norms[rows]
+        return [
+            [(self.ids[idx], float(row[idx])) for idx in _top_k(row, limit)] for row in scores
+        ]
+
+    def _prepare(self, queries: np.ndarray) -> np.ndarray:
+        return _prepare_queries(queries, self.dim)
+
+
+class IVFVectorIndex(ExactVectorIndex):
+    """Inverted-file index: chunks are partitioned by spherical k-means.
+
+    A query scores the ``n_lists`` centroids, then only the chunks in the ``n_probe``
+    closest lists. Trades a little recall for search time on corpora too large for a
+    full scan; with ``n_probe >= n_lists`` it is exact.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        matrix: np.ndarray,
+        *,
+        n_lists: int | None = None,
+        n_probe: int = 4,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(ids, matrix)
+        count = len(self.ids)
+        self.n_lists = max(1, min(n_lists or int(math.sqrt(count)) or 1, count or 1))
+        self.n_probe = max(1, n_probe)
+        self.centroids, assignments = self._train(iterations, seed)
+        self.lists = [np.flatnonzero(assignments == idx) for idx in range(self.n_lists)]
+
+    def search(self, queries: np.ndarray, limit: int) -> List[SearchResult]:
+        queries = self._prepare(queries)
+        if limit <= 0 or not self.ids:
+            return [[] for _ in queries]
+        probes = min(self.n_probe, self.n_lists)
+        results: List[SearchResult] = []
+        for query in queries:
+            nearest = _top_k(self.centroids @ query, probes)
+            # Sorted rows read the mapped matrix front to back
+            candidates = np.sort(np.concatenate([self.lists[idx] for idx in nearest]))
+            scores = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+            scores /= self._norms[candidates]
+            results.append(
+                [
+                    (self.ids[candidates[idx]], float(scores[idx]))
+                    for idx in _top_k(scores, limit)
+                ]
+            )
+        return results
+
+    def _train(self, iterations: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.ids:
+            return np.zeros((0, self.dim), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        start = np.sort(rng.choice(len(self.ids), size=self.n_lists, replace=False))
+        centroids = np.asarray(self.matrix[start], dtype=np.float32) / self._norms[start, None]
+        assignments = np.zeros(len(self.ids), dtype=np.int64)
+        for _ in range(iterations):
+            sums = np.zeros_like(centroids)
+            for rows, block in _row_blocks(self.matrix):
+                block = block / self._norms[rows, None]
+                assignments[rows] = np.argmax(block @ centroids.T, axis=1)
+                np.add.at(sums, assignments[rows], block)
+            # An emptied list keeps its previous centroid
+            filled = np.bincount(assignments, minlength=self.n_lists) > 0
+            centroids[filled] = sums[filled]
+            centroids = _normalize_rows(centroids)
+        for rows, block in _row_blocks(self.matrix):
+            assignments[rows] = np.argmax(block @ centroids.T, axis=1)
+        return centroids, assignments
+
+
+class QuantizedVectorIndex:
+    """Candidate search over quantized codes, rescored against full-precision rows.
+
+    ``"int8"`` keeps each unit row as int8 codes with a per-row scale (a quarter of
+    float32); ``"binary"`` keeps only the sign bits (1/32) and ranks by Hamming
+    distance. The ``limit * rescore_factor`` best candidates are rescored exactly
+    against ``originals``, typically a read-only ``np.memmap`` of float16 rows, so only
+    their pages are touched and recall matches the exact index in practice.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        originals: np.ndarray,
+        *,
+        quantization: str = "int8",
+        rescore_factor: int = 4,
+    ) -> None:
+        if len(ids) != originals.shape[0]:
+            raise ValueError("ids and matrix rows differ in length")
+        if quantization not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.ids = list(ids)
+        self.originals = originals
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+
+        count, dim = originals.shape
+        self._norms = np.empty(count, dtype=np.float32)
+        if quantization == "int8":
+            self._codes = np.empty((count, dim), dtype=np.int8)
+            self._scales = np.empty(count, dtype=np.float32)
+        else:
+            self._codes = np.empty((count, (dim + 7) // 8), dtype=np.uint8)
+        for rows, block in _row_blocks(originals):
+            self._norms[rows] = np.maximum(np.linalg.norm(block, axis=1), 1e-12)
+            block = block / self._norms[rows, None]
+            if quantization == "int8":
+                scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+                self._codes[rows] = np.rint(block / scales[:, None]).astype(np.int8)
+                self._scales[rows] = scales
+            else:
+                self._codes[rows] = np.packbits(block > 0, axis=1)
+
+    @property
+    def dim(self) -> int:
+        return self.originals.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the in-RAM codes (the originals stay mapped)."""
+        extra = self._scales.nbytes if self.quantization == "int8" else 0
+        return self._codes.nbytes + self._norms.nbytes + extra
+
+    def search(self, queries: np.ndarray, limit: int) -> List[SearchResult]:
+        queries = _prepare_queries(queries, self.dim)
+        if limit <= 0 or not self.ids:
+            return [[] for _ in queries]
+        approximate = self._approximate_scores(queries)
+        shortlist = min(len(self.ids), limit * self.rescore_factor)
+        results: List[SearchResult] = []
+        for query, scores in zip(queries, approximate):
+            # Sorted rows read the mapped matrix front to back
+            rows = np.sort(_top_k(scores, shortlist))
+            exact = np.asarray(self.originals[rows], dtype=np.float32) @ query
+            exact /= self._norms[rows]
+            results.append(
+                [(self.ids[rows[idx]], float(exact[idx])) for idx in _top_k(exact, limit)]
+            )
+        return results
+
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        if self.quantization == "binary":
+            bits = np.packbits(queries > 0, axis=1)
+            # Fewer differing signs rank higher
+            return np.stack(
+                [-_POPCOUNT[np.bitwise_xor(self._codes, row)].sum(axis=1) for row in bits]
+            ).astype(np.float32)
+        scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        for start in range(0, len(self.ids), _BLOCK_ROWS):
+            codes = self._codes[start:start + _BLOCK_ROWS]
+            scales = self._scales[start:start + _BLOCK_ROWS]
+            scores[:, start:start + len(codes)] = (queries @ codes.T.astype(np.float32)) * scales
+        return scores
+
+
+def build_vector_index(
+    ids: Sequence[str], matrix: np.ndarray, kind: str = "exact", **options
+) -> ExactVectorIndex | QuantizedVectorIndex:
+    """Index ``matrix`` rows; ``kind`` is ``"exact"``, ``"ivf"``, ``"int8"`` or ``"binary"``.
+
+    ``options`` go to the index class: ``n_lists``/``n_probe`` for IVF and
+    ``rescore_factor`` for the quantized kinds.
+    """
+    if kind == "exact":
+        return ExactVectorIndex(ids, matrix)
+    if kind == "ivf":
+        return IVFVectorIndex(ids, matrix, **options)
+    if kind in ("int8", "binary"):
+        return QuantizedVectorIndex(ids, matrix, quantization=kind, **options)
+    raise ValueError(f"Unknown vector index kind: {kind}")
+
+
+__all__ = [
+    "ExactVectorIndex",
+    "IVFVectorIndex",
+    "QuantizedVectorIndex",
+    "SearchResult",
+    "VectorIndex",
+    "build_vector_index",
+]
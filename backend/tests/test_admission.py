@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+
+from metabolic_backend.api.admission import AdmissionController, AdmissionRejected
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def test_live_borrows_idle_preparation_slots_but_not_the_reverse(self) -> None:
+        controller = AdmissionController(
+            live_limit=1, preparation_limit=1, preparation_queue_timeout=0.05
+        )
+
+        async def scenario():
+            live = await controller.acquire("live")
+            borrowed = await controller.acquire("live")
+            with self.assertRaises(AdmissionRejected):
+                await controller.acquire("preparation")
+            return live.pool, borrowed.pool
+
+        self.assertEqual(asyncio.run(scenario()), ("live", "preparation"))
+
+    def test_queued_request_is_rejected_after_timeout(self) -> None:
+        controller = AdmissionController(live_limit=1, preparation_limit=1, live_queue_timeout=0.05)
+
+        async def scenario():
+            await controller.acquire("live")
+            await controller.acquire("live")
+            await controller.acquire("live")
+
+        with self.assertRaises(AdmissionRejected) as caught:
+            asyncio.run(scenario())
+        self.assertEqual(caught.exception.retry_after, 1)
+        self.assertEqual(controller.snapshot()["live"]["queued"], 0)
+
+    def test_full_queue_rejects_immediately(self) -> None:
+        controller = AdmissionController(preparation_limit=1, max_queue=0)
+
+        async def scenario():
+            await controller.acquire("preparation")
+            await controller.acquire("preparation")
+
+        with self.assertRaises(AdmissionRejected):
+            asyncio.run(scenario())
+
+    def test_freed_preparation_slot_goes_to_queued_live_request_first(self) -> None:
+        controller = AdmissionController(live_limit=1, preparation_limit=1)
+        order = []
+
+        async def waiter(mode):
+            ticket = await controller.acquire(mode)
+            order.append((mode, ticket.pool))
+
+        async def scenario():
+            await controller.acquire("live")
+            preparation = await controller.acquire("preparation")
+            queued = [
+                asyncio.ensure_future(waiter("preparation")),
+                asyncio.ensure_future(waiter("live")),
+            ]
+            await asyncio.sleep(0.01)
+            self.assertEqual(controller.snapshot()["preparation"]["queued"], 1)
+            self.assertEqual(controller.snapshot()["live"]["queued"], 1)
+
+            preparation.release()
+            preparation.release()  # idempotent
+            await asyncio.sleep(0.01)
+            self.assertEqual(order, [("live", "preparation")])
+            for task in queued:
+                task.cancel()
+
+        asyncio.run(scenario())
+        self.assertEqual(controller.snapshot()["preparation"]["running"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
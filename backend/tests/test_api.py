@@ -1,5 +1,7 @@
+import json
 import os
 import unittest
+from unittest import mock
 
 os.environ["DISABLE_INGESTION"] = "1"
 os.environ.setdefault("DISABLE_VECTOR_DB", "1")
@@ -9,6 +11,7 @@ os.environ.setdefault("EMBEDDING_BACKEND", "offline")
 from fastapi.testclient import TestClient
 
 from metabolic_backend.api import create_app
+from metabolic_backend.api.admission import AdmissionRejected
 
 
 class APITestCase(unittest.TestCase):
@@ -36,6 +39,50 @@ class APITestCase(unittest.TestCase):
         response = self.client.post("/v1/retrieve", json={"question": "   "})
         self.assertEqual(response.status_code, 422)
 
+    def test_retrieve_stream_runs_pipeline_once(self) -> None:
+        with mock.patch(
+            "metabolic_backend.orchestrator.pipeline.RetrievalPipeline.run",
+            side_effect=AssertionError("stream must not re-run the pipeline"),
+        ):
+            response = self.client.post(
+                "/v1/retrieve/stream", json={"question": "약을 조절해도 될까요?"}
+            )
+        self.assertEqual(response.status_code, 200)
+        events = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        self.assertIn("node_update", {event["type"] for event in events})
+        complete = events[-1]
+        self.assertEqual(complete["type"], "complete")
+        self.assertEqual(complete["output"]["safety"]["level"], "escalate")
+        self.assertIn("total", complete["output"]["timings"])
+
+    def test_missing_precomputed_preparation_is_404(self) -> None:
+        response = self.client.get("/v1/preparation/987654")
+        self.assertEqual(response.status_code, 404)
+
+    def test_retrieve_builds_context_from_patient_id(self) -> None:
+        with mock.patch(
+            "metabolic_backend.orchestrator.pipeline.RetrievalPipeline.arun",
+            side_effect=AssertionError("stop after context resolution"),
+        ) as arun, mock.patch(
+            "metabolic_backend.patient_data.PatientContextBuilder.build",
+            side_effect=lambda pid: json.dumps({"patient_id": pid}) if pid == 1 else None,
+        ):
+            missing = self.client.post(
+                "/v1/retrieve", json={"question": "준비", "mode": "preparation", "patient_id": 2}
+            )
+            with self.assertRaises(AssertionError):
+                self.client.post(
+                    "/v1/retrieve",
+                    json={"question": "준비", "mode": "preparation", "patient_id": 1},
+                )
+
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(arun.call_args.kwargs["context"], '{"patient_id": 1}')
+
     def test_latency_metrics_endpoint(self) -> None:
         self.client.post("/v1/retrieve", json={"question": "약을 조절해도 될까요?"})
         metrics = self.client.get("/metrics/latency")
@@ -44,6 +91,20 @@ class APITestCase(unittest.TestCase):
         self.assertIn("latency", payload)
         self.assertIn("total", payload["latency"])
         self.assertGreaterEqual(payload["latency"]["total"]["count"], 1)
+        self.assertIn("admission_wait_live", payload["latency"])
+        self.assertEqual(payload["admission"]["live"]["running"], 0)
+
+    def test_exhausted_capacity_is_429_with_retry_after(self) -> None:
+        with mock.patch(
+            "metabolic_backend.api.admission.AdmissionController.acquire",
+            side_effect=AdmissionRejected("preparation", 30),
+        ):
+            for path in ("/v1/retrieve", "/v1/retrieve/stream"):
+                response = self.client.post(
+                    path, json={"question": "상담 준비", "mode": "preparation"}
+                )
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response.headers["Retry-After"], "30")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from metabolic_backend.ingestion.embedding_cache import EmbeddingCache
+
+
+class EmbeddingCacheStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+
+    def test_put_many_round_trips_through_memmap(self) -> None:
+        cache = EmbeddingCache(cache_dir=str(self.cache_dir))
+        cache.put_many(["a", "b", "a"], [[1.0, 2.0], [3.0, 4.0], [9.0, 9.0]])
+
+        reloaded = EmbeddingCache(cache_dir=str(self.cache_dir))
+        vectors = reloaded.get_many(["b", "a", "missing"])
+
+        self.assertEqual(reloaded.get_stats()["total_file_entries"], 2)
+        np.testing.assert_array_equal(vectors[0], [3.0, 4.0])
+        np.testing.assert_array_equal(vectors[1], [1.0, 2.0])
+        self.assertIsNone(vectors[2])
+        self.assertIsInstance(vectors[0].base, np.memmap)
+        self.assertEqual((self.cache_dir / "vectors.f32").stat().st_size, 2 * 2 * 4)
+
+    def test_ignores_torn_trailing_row(self) -> None:
+        cache = EmbeddingCache(cache_dir=str(self.cache_dir))
+        cache.put_many(["a"], [[1.0, 2.0]])
+        with open(self.cache_dir / "vectors.f32", "ab") as handle:
+            np.asarray([5.0, 6.0], dtype=np.float32).tofile(handle)
+
+        reloaded = EmbeddingCache(cache_dir=str(self.cache_dir))
+        reloaded.put("b", [7.0, 8.0])
+
+        self.assertEqual(reloaded.get("a"), [1.0, 2.0])
+        self.assertEqual(EmbeddingCache(cache_dir=str(self.cache_dir)).get("b"), [7.0, 8.0])
+
+    def test_instances_sharing_a_directory_append_after_each_other(self) -> None:
+        first = EmbeddingCache(cache_dir=str(self.cache_dir))
+        second = EmbeddingCache(cache_dir=str(self.cache_dir))
+        first.put_many(["x"], [[1.0, 1.0]])
+        second.put_many(["y"], [[2.0, 2.0]])
+        first.put_many(["z"], [[3.0, 3.0]])
+
+        self.assertEqual(second.get("y"), [2.0, 2.0])
+        self.assertEqual(second.get("x"), [1.0, 1.0])
+        self.assertEqual(first.get("y"), [2.0, 2.0])
+        reloaded = EmbeddingCache(cache_dir=str(self.cache_dir))
+        self.assertEqual(
+            [reloaded.get(text) for text in "xyz"], [[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]]
+        )
+
+    def test_namespaces_with_different_dimensions_keep_separate_stores(self) -> None:
+        small = EmbeddingCache(cache_dir=str(self.cache_dir), namespace="model-a")
+        large = EmbeddingCache(cache_dir=str(self.cache_dir), namespace="model-b")
+        small.put("a", [1.0, 2.0])
+        large.put("a", [1.0, 2.0, 3.0])
+
+        self.assertEqual(
+            EmbeddingCache(cache_dir=str(self.cache_dir), namespace="model-a").get("a"), [1.0, 2.0]
+        )
+        self.assertEqual(
+            EmbeddingCache(cache_dir=str(self.cache_dir), namespace="model-b").get("a"), [1.0, 2.0, 3.0]
+        )
+
+    def test_dimension_change_starts_a_fresh_store(self) -> None:
+        cache = EmbeddingCache(cache_dir=str(self.cache_dir))
+        cache.put("a", [1.0, 2.0])
+        cache.put("b", [1.0, 2.0, 3.0])
+
+        reloaded = EmbeddingCache(cache_dir=str(self.cache_dir))
+        self.assertIsNone(reloaded.get("a"))
+        self.assertEqual(reloaded.get("b"), [1.0, 2.0, 3.0])
+
+    def test_memory_tier_evicts_least_recently_used(self) -> None:
+        cache = EmbeddingCache(
+            enable_file_cache=False, max_memory_size=3, max_memory_bytes=2 * 2 * 4
+        )
+        cache.put_many(["a", "b"], [[1.0, 1.0], [2.0, 2.0]])
+        cache.get("a")
+        cache.put("c", [3.0, 3.0])
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), [1.0, 1.0])
+        stats = cache.get_stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["memory_entries"], 2)
+        self.assertEqual(stats["memory_bytes"], 16)
+
+    def _write_legacy(self, text: str) -> Path:
+        text_hash = hashlib.md5(text.encode("utf-8")).hexdigest()
+        shard = self.cache_dir / text_hash[:2]
+        shard.mkdir(parents=True)
+        (shard / f"{text_hash}.json").write_text(json.dumps({"embedding": [0.5, 0.25]}))
+        (self.cache_dir / "index.json").write_text(
+            json.dumps({text_hash: {"file": f"{text_hash[:2]}/{text_hash}.json"}})
+        )
+        return shard
+
+    def test_migrates_legacy_json_layout(self) -> None:
+        shard = self._write_legacy("걷기")
+        unrelated = self.cache_dir / "zz"
+        unrelated.mkdir()
+
+        cache = EmbeddingCache(cache_dir=str(self.cache_dir))
+
+        self.assertEqual(cache.get("걷기"), [0.5, 0.25])
+        self.assertFalse((self.cache_dir / "index.json").exists())
+        self.assertFalse(shard.exists())
+        self.assertTrue(unrelated.exists())
+
+    def test_namespaced_cache_leaves_legacy_layout_alone(self) -> None:
+        shard = self._write_legacy("걷기")
+
+        EmbeddingCache(cache_dir=str(self.cache_dir), namespace="text-embedding-3-small")
+
+        self.assertTrue((self.cache_dir / "index.json").exists())
+        self.assertTrue(shard.exists())
+        # The default namespace can still migrate them afterwards
+        self.assertEqual(EmbeddingCache(cache_dir=str(self.cache_dir)).get("걷기"), [0.5, 0.25])
+
+
+if __name__ == "__main__":
+    unittest.main()
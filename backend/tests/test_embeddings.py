@@ -0,0 +1,80 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+
+from metabolic_backend.embeddings import OpenAIEmbeddings
+from metabolic_backend.ingestion.embedding_cache import EmbeddingCache
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.calls: list = []
+
+    def embed_documents(self, texts):  # noqa: ANN001 - LangChain parity
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    async def aembed_documents(self, texts):  # noqa: ANN001 - LangChain parity
+        return self.embed_documents(texts)
+
+
+class CachedEmbeddingsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        self.embeddings = self._make("text-embedding-3-small")
+
+    def _make(self, model: str) -> OpenAIEmbeddings:
+        cache = EmbeddingCache(cache_dir=self.cache_dir, namespace=model)
+        embeddings = OpenAIEmbeddings(model=model, api_key="sk-test", cache=cache)
+        embeddings._client = _FakeClient()
+        return embeddings
+
+    def test_batch_sends_only_misses_and_keeps_order(self) -> None:
+        self.embeddings.embed_text("걷기")
+
+        vectors = self.embeddings.embed_batch(["식단", "걷기", "식단", "수면 관리"])
+
+        self.assertEqual(vectors, [[2.0, 1.0], [2.0, 1.0], [2.0, 1.0], [5.0, 1.0]])
+        self.assertEqual(self.embeddings._client.calls, [["걷기"], ["식단", "수면 관리"]])
+        stats = self.embeddings.get_stats()
+        self.assertEqual(stats["api_calls"], 2)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_async_path_reads_through_persisted_cache(self) -> None:
+        self.embeddings.embed_text("걷기")
+
+        warm = self._make("text-embedding-3-small")
+        asyncio.run(warm.aembed_text("걷기"))
+        other_model = self._make("text-embedding-3-large")
+        other_model.embed_text("걷기")
+
+        self.assertEqual(warm._client.calls, [])
+        self.assertEqual(other_model._client.calls, [["걷기"]])
+
+    def test_async_cache_io_runs_off_the_event_loop(self) -> None:
+        cache = self.embeddings._cache
+        threads: list = []
+        for name in ("get_many", "put_many"):
+            original = getattr(cache, name)
+
+            def recording(*args, _original=original, **kwargs):  # noqa: ANN002, ANN003
+                threads.append(threading.get_ident())
+                return _original(*args, **kwargs)
+
+            setattr(cache, name, recording)
+
+        async def embed() -> int:
+            await self.embeddings.aembed_text("걷기")
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(embed())
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from metabolic_backend.cache import FAQCache
+
+
+class _FakeSentenceTransformer:
+    calls: list = []
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def encode(self, texts):  # noqa: ANN001 - SentenceTransformer parity
+        _FakeSentenceTransformer.calls.append(list(texts))
+        return np.array([[len(text), text.count("운동") + 1.0, 1.0] for text in texts])
+
+
+class FAQCacheEmbeddingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _FakeSentenceTransformer.calls = []
+        module = types.ModuleType("sentence_transformers")
+        module.SentenceTransformer = _FakeSentenceTransformer
+        patcher = mock.patch.dict(sys.modules, {"sentence_transformers": module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_file = Path(tmp.name) / "faq_cache.json"
+
+    def test_mutations_update_rows_without_reencoding(self) -> None:
+        cache = FAQCache(self.cache_file)
+        cache.populate_defaults()
+        cache.set("새 질문?", "답변")
+
+        self.assertEqual(cache.embeddings.shape[0], len(cache.questions))
+        self.assertEqual(_FakeSentenceTransformer.calls[-1], ["새 질문?"])
+        np.testing.assert_allclose(np.linalg.norm(cache.embeddings, axis=1), 1.0, rtol=1e-6)
+        self.assertIsNotNone(cache.get("운동은 얼마나 해야 하나요?"))
+
+        cache.cache["새 질문?"]["cached_at"] = "2000-01-01T00:00:00"
+        cache.clear_expired()
+        self.assertNotIn("새 질문?", cache.questions)
+        self.assertEqual(cache.embeddings.shape[0], len(cache.questions))
+
+    def test_lookups_race_safely_with_expiry_and_inserts(self) -> None:
+        cache = FAQCache(self.cache_file)
+        cache.populate_defaults()
+        errors: list = []
+
+        def churn() -> None:
+            for idx in range(50):
+                question = f"임시 질문 {idx}?"
+                cache.set(question, "답변")
+                cache.cache[question]["cached_at"] = "2000-01-01T00:00:00"
+                cache.clear_expired()
+
+        def lookups() -> None:
+            try:
+                for _ in range(200):
+                    cache.get("임시 질문 1?", similarity_threshold=0.0)
+            except Exception as exc:  # pragma: no cover - the failure being tested
+                errors.append(exc)
+
+        workers = [threading.Thread(target=churn)] + [
+            threading.Thread(target=lookups) for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.embeddings.shape[0], len(cache.questions))
+        self.assertEqual(set(cache.questions), set(cache.cache))
+
+    def test_startup_reuses_persisted_embeddings(self) -> None:
+        FAQCache(self.cache_file).populate_defaults()
+        encoded = len(_FakeSentenceTransformer.calls)
+
+        reloaded = FAQCache(self.cache_file)
+
+        self.assertEqual(len(_FakeSentenceTransformer.calls), encoded)
+        self.assertEqual(reloaded.embeddings.shape[0], reloaded.size())
+
+
+if __name__ == "__main__":
+    unittest.main()
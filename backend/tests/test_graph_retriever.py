@@ -0,0 +1,207 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from neo4j.exceptions import ServiceUnavailable
+
+from metabolic_backend.ingestion.models import Chunk
+from metabolic_backend.retrievers import graph as graph_module
+from metabolic_backend.retrievers import graphiti_pool
+
+
+class _FakeGraphiti:
+    instances: list = []
+    failures: int = 0
+    delay: float = 0.0
+
+    def __init__(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003 - Graphiti parity
+        self.kwargs = kwargs
+        self.closed = False
+        self.searches = 0
+        _FakeGraphiti.instances.append(self)
+
+    async def search(self, query: str, num_results: int):
+        if _FakeGraphiti.failures:
+            _FakeGraphiti.failures -= 1
+            raise ServiceUnavailable("connection reset")
+        if _FakeGraphiti.delay:
+            await asyncio.sleep(_FakeGraphiti.delay)
+        if self.closed:
+            raise ServiceUnavailable("driver closed")
+        self.searches += 1
+        episode = SimpleNamespace(name="doc:0")
+        return [SimpleNamespace(episodes=[episode], fact=query, uuid="edge-1", score=0.9)]
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class KeywordFallbackTests(unittest.TestCase):
+    def setUp(self) -> None:
+        texts = ["운동, 걷기, 운동", "식단, 채소, 통곡물", "수면, 운동"]
+        self.retriever = graph_module.GraphRetriever(
+            chunks=[
+                Chunk(
+                    chunk_id=f"doc:{idx}",
+                    document_id="doc",
+                    section_path=[],
+                    source_path="doc.md",
+                    text=text,
+                    token_count=3,
+                )
+                for idx, text in enumerate(texts)
+            ]
+        )
+
+    def test_ranks_chunks_by_bm25(self) -> None:
+        results = self.retriever.retrieve("운동", limit=5)
+
+        self.assertEqual([chunk.chunk_id for chunk in results], ["doc:0", "doc:2"])
+        self.assertGreater(results[0].score, results[1].score)
+        self.assertEqual(results[0].metadata["retrieval"], "keyword")
+
+    def test_matches_across_korean_particles(self) -> None:
+        results = self.retriever.retrieve("채소는 얼마나 먹나요?", limit=1)
+
+        self.assertEqual(results[0].chunk_id, "doc:1")
+
+    def test_searches_while_graphiti_episodes_are_indexed(self) -> None:
+        episodes = [
+            SimpleNamespace(name=f"graph:{idx}", body=f"운동, 근력{idx}", group_id="graphiti")
+            for idx in range(2000)
+        ]
+
+        def index_episodes() -> None:
+            for episode in episodes:
+                self.retriever._edges_to_chunks([SimpleNamespace(episodes=[episode])], limit=1)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            writer = executor.submit(index_episodes)
+            while not writer.done():
+                self.retriever.retrieve("운동", limit=3)
+            writer.result()
+
+        self.assertEqual(len(self.retriever.retrieve("근력1999", limit=1)), 1)
+
+    def test_indexes_appended_graphiti_episodes(self) -> None:
+        episode = SimpleNamespace(name="graph:new", body="근력, 스트레칭", group_id="graphiti")
+        self.retriever._edges_to_chunks([SimpleNamespace(episodes=[episode])], limit=1)
+
+        results = self.retriever.retrieve("스트레칭", limit=1)
+
+        self.assertEqual(results[0].chunk_id, "graph:new")
+
+
+class GraphitiClientPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _FakeGraphiti.instances = []
+        _FakeGraphiti.failures = 0
+        _FakeGraphiti.delay = 0.0
+        patcher = mock.patch.object(graphiti_pool, "Graphiti", _FakeGraphiti)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        chunk = Chunk(
+            chunk_id="doc:0",
+            document_id="doc",
+            section_path=["운동"],
+            source_path="doc.md",
+            text="주 5회 30분 걷기를 권장합니다.",
+            token_count=6,
+        )
+        self.retriever = graph_module.GraphRetriever(
+            chunks=[chunk], uri="bolt://graph:7687", user="neo4j", password="secret"
+        )
+        self.addCleanup(self.retriever.close)
+
+    def test_searches_share_one_lazily_created_client(self) -> None:
+        self.assertEqual(_FakeGraphiti.instances, [])
+
+        self.retriever.retrieve("걷기", limit=1)
+        asyncio.run(self.retriever.retrieve_async("혈당", limit=1))
+
+        self.assertEqual(len(_FakeGraphiti.instances), 1)
+        client = _FakeGraphiti.instances[0]
+        self.assertEqual(client.searches, 2)
+        self.assertEqual(client.kwargs["max_coroutines"], self.retriever._pool.pool_size)
+
+    def test_reconnects_after_connection_failure(self) -> None:
+        self.retriever.retrieve("걷기", limit=1)
+        _FakeGraphiti.failures = 1
+
+        results = self.retriever.retrieve("걷기", limit=1)
+
+        self.assertEqual(results[0].metadata["retrieval"], "graphiti")
+        first, second = _FakeGraphiti.instances
+        self.assertTrue(first.closed)
+        self.assertEqual(second.searches, 1)
+
+    def test_close_releases_client(self) -> None:
+        self.retriever.retrieve("걷기", limit=1)
+
+        self.retriever.close()
+
+        self.assertTrue(_FakeGraphiti.instances[0].closed)
+        self.assertIsNone(self.retriever._pool._loop)
+
+    def test_connection_failure_spares_searches_on_the_same_client(self) -> None:
+        pool = self.retriever._pool
+        _FakeGraphiti.delay = 0.2
+        slow = pool._submit("걷기", 1)
+        time.sleep(0.05)
+        _FakeGraphiti.delay = 0.0
+        _FakeGraphiti.failures = 1
+
+        pool.search("혈당", num_results=1)
+
+        first, second = _FakeGraphiti.instances
+        self.assertFalse(first.closed)
+        self.assertEqual(len(slow.result(timeout=5)), 1)
+        self.assertTrue(first.closed)
+        self.assertEqual((first.searches, second.searches), (1, 1))
+
+    def test_timed_out_search_frees_its_slot(self) -> None:
+        pool = graphiti_pool.GraphitiClientPool(
+            "bolt://graph:7687", "neo4j", "secret", pool_size=1
+        )
+        self.addCleanup(pool.close)
+        _FakeGraphiti.delay = 1.0
+
+        with self.assertRaises(TimeoutError):
+            pool.search("걷기", num_results=1, timeout=0.05)
+        _FakeGraphiti.delay = 0.0
+        start = time.perf_counter()
+        pool.search("혈당", num_results=1)
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_slow_graphiti_search_falls_back_to_keywords(self) -> None:
+        _FakeGraphiti.delay = 1.0
+        start = time.perf_counter()
+
+        results = [
+            self.retriever.retrieve("걷기", limit=1, timeout=0.05),
+            asyncio.run(self.retriever.retrieve_async("걷기", limit=1, timeout=0.05)),
+        ]
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        for hits in results:
+            self.assertEqual(hits[0].metadata["retrieval"], "keyword")
+
+    def test_close_waits_for_in_flight_searches(self) -> None:
+        pool = self.retriever._pool
+        _FakeGraphiti.delay = 0.2
+        slow = pool._submit("걷기", 1)
+        time.sleep(0.05)
+
+        pool.close()
+
+        self.assertEqual(len(slow.result(timeout=0)), 1)
+        self.assertTrue(_FakeGraphiti.instances[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
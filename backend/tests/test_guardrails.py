@@ -2,6 +2,7 @@ import unittest
 
 from metabolic_backend.analysis.classifier import QuestionAnalysisResult, SafetyLevel
 from metabolic_backend.orchestrator.guardrails import (
+    StreamingScrubber,
     append_caution_guidance,
     build_safety_envelope,
     scrub_text,
@@ -39,6 +40,16 @@ class GuardrailTests(unittest.TestCase):
         self.assertNotIn("010-1234-5678", scrubbed)
         self.assertIn("[REDACTED]", scrubbed)
 
+    def test_streaming_scrubber_masks_pii_split_across_chunks(self) -> None:
+        raw = "상담 문의는 honggildong@example.com 또는 010-1234-5678 으로 주세요. " * 3
+        scrubber = StreamingScrubber()
+        released = [scrubber.feed(raw[idx : idx + 3]) for idx in range(0, len(raw), 3)]
+        released.append(scrubber.flush())
+        streamed = "".join(released)
+        self.assertEqual(streamed, scrub_text(raw))
+        self.assertNotIn("010-1234", streamed)
+        self.assertTrue(any(released[:-1]), "Scrubber should release text before the flush.")
+
     def test_serialize_retrieval_output(self) -> None:
         analysis = self._analysis(SafetyLevel.CLEAR)
         envelope = build_safety_envelope(analysis)
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from metabolic_backend.orchestrator.loop_thread import LoopThread
+
+
+class LoopThreadTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loop = LoopThread("test-loop")
+        self.addCleanup(self.loop.close)
+
+    def test_blocking_callers_share_one_loop(self) -> None:
+        async def current():
+            await asyncio.sleep(0.05)
+            return asyncio.get_running_loop(), threading.current_thread().name
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: self.loop.run(current()), range(4)))
+
+        self.assertEqual(len({loop for loop, _ in results}), 1)
+        self.assertEqual({name for _, name in results}, {"test-loop"})
+
+    def test_iterate_yields_items_and_raises_errors(self) -> None:
+        async def numbers():
+            for value in range(3):
+                yield value
+            raise ValueError("boom")
+
+        items = []
+        with self.assertRaises(ValueError):
+            for item in self.loop.iterate(numbers()):
+                items.append(item)
+
+        self.assertEqual(items, [0, 1, 2])
+
+    def test_closing_iteration_early_closes_the_stream(self) -> None:
+        closed = threading.Event()
+
+        async def endless():
+            try:
+                while True:
+                    yield 1
+                    await asyncio.sleep(0.01)
+            finally:
+                closed.set()
+
+        stream = self.loop.iterate(endless())
+        self.assertEqual(next(stream), 1)
+        stream.close()
+
+        self.assertTrue(closed.wait(timeout=1))
+
+    def test_close_cancels_pending_calls_and_loop_restarts(self) -> None:
+        future = self.loop.submit(asyncio.sleep(10))
+
+        self.loop.close()
+
+        with self.assertRaises(CancelledError):
+            future.result(timeout=1)
+
+        async def answer():
+            return 42
+
+        self.assertEqual(self.loop.run(answer()), 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,6 +99,9 @@ class RetrievalPipelineIntegrationTest(unittest.TestCase):
             def invoke(self, messages):  # noqa: ANN001 - LangChain parity
                 return AIMessage(content=self._reply)
 
+            async def ainvoke(self, messages):  # noqa: ANN001 - LangChain parity
+                return AIMessage(content=self._reply)
+
         cls.small_llm = _StubLLM(
             "하위 질문 1: 걷기 운동 권장 시간은?\n하위 질문 2: 걷기 운동과 혈당의 관계는?"
         )
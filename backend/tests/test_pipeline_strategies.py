@@ -0,0 +1,848 @@
+"""Unit tests for the LangGraph pipeline: live-mode strategies and preparation flow."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from metabolic_backend.analysis import QuestionAnalysisResult, SafetyLevel
+from metabolic_backend.cache import PreparationCache, ResponseCache
+from metabolic_backend.ingestion.models import Chunk
+from metabolic_backend.orchestrator import pipeline as pipeline_module
+from metabolic_backend.orchestrator import precompute as precompute_module
+from metabolic_backend.orchestrator.deadline import Deadline
+
+
+class _StubLLM:
+    def __init__(self, reply: str) -> None:
+        self._reply = reply
+
+    def invoke(self, messages):  # noqa: ANN001 - LangChain parity
+        return AIMessage(content=self._reply)
+
+    async def ainvoke(self, messages):  # noqa: ANN001 - LangChain parity
+        return AIMessage(content=self._reply)
+
+    def batch(self, inputs, config=None):  # noqa: ANN001 - LangChain parity
+        return [self.invoke(messages) for messages in inputs]
+
+    async def abatch(self, inputs, config=None):  # noqa: ANN001 - LangChain parity
+        return [await self.ainvoke(messages) for messages in inputs]
+
+
+class _StubEmbeddings:
+    def __init__(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003 - parity
+        pass
+
+    def embed_text(self, text: str):
+        return [0.1, 0.2, 0.3]
+
+    def embed_batch(self, texts):  # noqa: ANN001 - parity
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+
+def _chunk(chunk_id: str, score: float) -> Chunk:
+    return Chunk(
+        chunk_id=chunk_id,
+        document_id=chunk_id.split(":")[0],
+        section_path=[],
+        source_path="doc.md",
+        text=f"{chunk_id} 걷기 운동",
+        token_count=3,
+        score=score,
+    )
+
+
+def make_pipeline(
+    reply: str = "걷기 운동이 혈당 관리에 도움이 됩니다.",
+) -> pipeline_module.RetrievalPipeline:
+    env = {
+        "DISABLE_INGESTION": "1",
+        "DISABLE_VECTOR_DB": "1",
+        "DISABLE_GRAPH_DB": "1",
+        "CACHE_DIR": tempfile.mkdtemp(),
+    }
+    with mock.patch.dict(os.environ, env), mock.patch.object(
+        pipeline_module, "get_small_llm", return_value=_StubLLM("걷기 운동 효과")
+    ), mock.patch.object(
+        pipeline_module, "get_main_llm", return_value=_StubLLM(reply)
+    ), mock.patch.object(
+        pipeline_module, "OpenAIEmbeddings", _StubEmbeddings
+    ):
+        return pipeline_module.RetrievalPipeline(chunks=[_chunk("doc:0", 1.0)])
+
+
+class HybridStrategyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+
+    def test_multi_hop_without_relationship_cue_selects_hybrid(self) -> None:
+        analysis = QuestionAnalysisResult(
+            domain="exercise",
+            complexity="multi-hop",
+            safety=SafetyLevel.CLEAR,
+            reasons=[],
+            latency_ms=0.0,
+        )
+
+        strategy = self.pipeline._select_strategy(analysis, "만약 걷기를 하면 좋아지나요?", None)
+
+        self.assertEqual(strategy["name"], "hybrid")
+
+    def test_reciprocal_rank_fusion_rewards_agreement(self) -> None:
+        vector = [_chunk("v:1", 0.9), _chunk("shared:1", 0.8), _chunk("v:2", 0.7)]
+        graph = [_chunk("g:1", 12.0), _chunk("shared:1", 3.0)]
+
+        fused = self.pipeline._reciprocal_rank_fusion([vector, graph])
+
+        self.assertEqual(fused[0].chunk_id, "shared:1")
+        self.assertEqual(len(fused), 4)
+
+    def test_hybrid_runs_retrievers_concurrently(self) -> None:
+        async def aslow(results):
+            await asyncio.sleep(0.2)
+            return list(results)
+
+        vector_hits = [_chunk("v:1", 0.9)]
+        graph_hits = [_chunk("g:1", 5.0)]
+        retrievers = (self.pipeline.vector_retriever, self.pipeline.graph_retriever)
+        for retriever, hits in zip(retrievers, (vector_hits, graph_hits)):
+            patcher = mock.patch.object(
+                retriever,
+                "retrieve_async",
+                lambda query, *, limit, timeout=None, hits=hits: aslow(hits),
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        state = {
+            "question": "만약 걷기를 하면 좋아지나요?",
+            "strategy": "hybrid",
+            "strategy_config": {"vector_k": 3, "graph_k": 3},
+            "observations": [],
+            "_timing_entries": [],
+        }
+        result = asyncio.run(self.pipeline._node_hybrid_retrieval(dict(state)))
+
+        timings = dict(result["_timing_entries"])
+        self.assertGreaterEqual(timings["retrieval_vector"], 0.2)
+        self.assertGreaterEqual(timings["retrieval_graph"], 0.2)
+        self.assertLess(timings["retrieval"], 0.35)
+        self.assertEqual([c.chunk_id for c in result["graph_results"]], ["g:1"])
+
+
+class _SlowLLM(_StubLLM):
+    def __init__(self, reply: str, delay: float) -> None:
+        super().__init__(reply)
+        self._delay = delay
+
+    def invoke(self, messages):  # noqa: ANN001 - LangChain parity
+        time.sleep(self._delay)
+        return super().invoke(messages)
+
+    async def ainvoke(self, messages):  # noqa: ANN001 - LangChain parity
+        await asyncio.sleep(self._delay)
+        return await super().ainvoke(messages)
+
+
+class DeadlineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.pipeline.live_deadline_seconds = 1.0
+
+    def _slow_graph(self, delay: float) -> None:
+        async def retrieve_async(query, *, limit, timeout=None):  # noqa: ANN001 - retriever parity
+            await asyncio.sleep(delay)
+            return [_chunk("g:1", 5.0)]
+
+        patcher = mock.patch.object(self.pipeline.graph_retriever, "retrieve_async", retrieve_async)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_slow_graph_search_is_cut_at_its_share(self) -> None:
+        self._slow_graph(1.0)
+        state = {
+            "question": "걷기와 혈당의 관계는?",
+            "strategy": "graph",
+            "strategy_config": {"graph_k": 3},
+            "observations": [],
+            "_timing_entries": [],
+        }
+
+        start = time.perf_counter()
+        result = asyncio.run(
+            self.pipeline._node_graph_retrieval(dict(state, deadline=Deadline.start(1.0)))
+        )
+
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(result["graph_results"], [])
+        self.assertEqual(result["cut_stages"], ["retrieval_graph"])
+
+    def test_graph_search_falls_back_before_its_stage_is_cut(self) -> None:
+        timeouts: list = []
+
+        async def retrieve_async(query, *, limit, timeout=None):  # noqa: ANN001 - parity
+            # Graphiti gives up at ``timeout``, then the keyword index answers
+            timeouts.append(timeout)
+            await asyncio.sleep(timeout)
+            return [_chunk("keyword:1", 2.0)]
+
+        state = {
+            "question": "걷기와 혈당의 관계는?",
+            "strategy": "graph",
+            "strategy_config": {"graph_k": 3},
+            "observations": [],
+            "_timing_entries": [],
+        }
+        with mock.patch.object(self.pipeline.graph_retriever, "retrieve_async", retrieve_async):
+            result = asyncio.run(
+                self.pipeline._node_graph_retrieval(dict(state, deadline=Deadline.start(1.0)))
+            )
+
+        (timeout,) = timeouts
+        self.assertNotIn("cut_stages", result)
+        self.assertEqual([c.chunk_id for c in result["graph_results"]], ["keyword:1"])
+        self.assertLess(timeout, 0.4)
+
+    def test_answer_is_synthesized_after_rewrite_is_cut(self) -> None:
+        self.pipeline.small_llm = _SlowLLM("걷기 운동 효과", delay=1.0)
+        graph_strategy = {"name": "graph", "graph_k": 3}
+
+        with mock.patch.object(self.pipeline, "_select_strategy", return_value=graph_strategy):
+            outputs = [
+                self.pipeline.run("걷기가 혈당에 좋은가요?"),
+                asyncio.run(self.pipeline.arun("걷기가 혈당에 좋은가요?")),
+            ]
+
+        for output in outputs:
+            self.assertEqual(output.cut_stages, ["rewrite"])
+            self.assertTrue(output.answer)
+            self.assertTrue(output.evidence)
+            self.assertLess(output.timings["rewrite"], 0.3)
+
+    def test_preparation_mode_has_no_deadline(self) -> None:
+        state = self.pipeline._initial_state("질문", None, "preparation")
+
+        self.assertNotIn("deadline", state)
+
+
+class SpeculativeRetrievalTests(unittest.TestCase):
+    question = "걷기와 혈당의 관계는?"
+
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.queries: list = []
+
+        async def retrieve_async(query, *, limit, timeout=None):  # noqa: ANN001 - retriever parity
+            self.queries.append(query)
+            await asyncio.sleep(0.2)
+            return [_chunk("g:1", 5.0)]
+
+        patcher = mock.patch.object(self.pipeline.graph_retriever, "retrieve_async", retrieve_async)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run_graph_route(self, rewrite: str) -> tuple:
+        self.pipeline.small_llm = _SlowLLM(rewrite, delay=0.2)
+        state = {
+            "question": self.question,
+            "analysis": None,
+            "strategy": "graph",
+            "strategy_config": {"graph_k": 3},
+            "observations": [],
+            "_timing_entries": [],
+        }
+        start = time.perf_counter()
+        rewritten = asyncio.run(self.pipeline._node_rewrite(dict(state)))
+        retrieved = asyncio.run(self.pipeline._node_graph_retrieval({**state, **rewritten}))
+        return {**rewritten, **retrieved}, time.perf_counter() - start, list(self.queries)
+
+    def test_similar_rewrite_reuses_raw_question_results(self) -> None:
+        result, elapsed, queries = self._run_graph_route("걷기와 혈당 관계")
+
+        self.assertEqual(queries, [self.question])
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual([c.chunk_id for c in result["graph_results"]], ["g:1"])
+
+    def test_divergent_rewrite_searches_again(self) -> None:
+        result, _, queries = self._run_graph_route("유산소 운동 후 식후 혈당 변화")
+
+        self.assertEqual(queries[-1], "유산소 운동 후 식후 혈당 변화")
+        self.assertIsNone(result["speculation"])
+
+    def test_discarded_speculation_leaves_no_cut_behind(self) -> None:
+        async def retrieve_async(query, *, limit, timeout=None):  # noqa: ANN001 - retriever parity
+            await asyncio.sleep(1.5)
+            return [_chunk("g:1", 5.0)]
+
+        self.pipeline.small_llm = _SlowLLM("유산소 운동 후 식후 혈당 변화", delay=0.2)
+        state = {
+            "question": self.question,
+            "analysis": None,
+            "strategy": "graph",
+            "strategy_config": {"graph_k": 3},
+            "observations": [],
+            "_timing_entries": [],
+        }
+        with mock.patch.object(self.pipeline.graph_retriever, "retrieve_async", retrieve_async):
+            result = asyncio.run(
+                self.pipeline._node_rewrite(dict(state, deadline=Deadline.start(2.0)))
+            )
+
+        self.assertIsNone(result["speculation"])
+        self.assertNotIn("retrieval_graph", result.get("cut_stages", []))
+        titles = [message["title"] for message in result["observations"]]
+        self.assertNotIn("시간 제한", titles)
+
+
+    def test_rewrite_is_not_held_up_by_a_slow_speculative_search(self) -> None:
+        async def retrieve_async(query, *, limit, timeout=None):  # noqa: ANN001 - retriever parity
+            await asyncio.sleep(0.6)
+            return [_chunk("g:1", 5.0)]
+
+        # The rewrite diverges and lands inside its 0.3s share long before the search ends
+        self.pipeline.small_llm = _SlowLLM("유산소 운동 후 식후 혈당 변화", delay=0.1)
+        state = {
+            "question": self.question,
+            "analysis": None,
+            "strategy": "graph",
+            "strategy_config": {"graph_k": 3},
+            "observations": [],
+            "_timing_entries": [],
+        }
+        with mock.patch.object(self.pipeline.graph_retriever, "retrieve_async", retrieve_async):
+            start = time.perf_counter()
+            result = asyncio.run(
+                self.pipeline._node_rewrite(dict(state, deadline=Deadline.start(2.0)))
+            )
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(result["rewritten_question"], "유산소 운동 후 식후 혈당 변화")
+        self.assertNotIn("rewrite", result.get("cut_stages", []))
+        self.assertIsNone(result["speculation"])
+
+class StateDeltaTests(unittest.TestCase):
+    def test_stream_updates_carry_only_new_observations(self) -> None:
+        pipeline = make_pipeline()
+        self.addCleanup(pipeline.close)
+
+        updates, output = [], None
+        for kind, item in pipeline.stream_with_result("걷기 운동은 얼마나 해야 하나요?"):
+            if kind == "update":
+                updates.extend(item.values())
+            elif kind == "complete":
+                output = item
+
+        streamed = [message for update in updates for message in update.get("observations", [])]
+        self.assertEqual(streamed, output.observations)
+        self.assertNotIn("question", updates[-1])
+        stages = [stage for update in updates for stage, _ in update.get("_timing_entries", [])]
+        self.assertEqual(len(stages), len(set(stages)))
+
+
+class _StreamingLLM(_StubLLM):
+    def stream(self, messages):  # noqa: ANN001 - LangChain parity
+        for idx in range(0, len(self._reply), 3):
+            yield AIMessageChunk(content=self._reply[idx:idx + 3])
+
+    async def astream(self, messages):  # noqa: ANN001 - LangChain parity
+        for chunk in self.stream(messages):
+            yield chunk
+
+
+class StreamTokenTests(unittest.TestCase):
+    question = "걷기 운동이 혈당에 좋은가요?"
+
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.pipeline.main_llm = _StreamingLLM("걷기를 권장합니다. 문의는 010-1234-5678 로 하세요.")
+
+        async def retrieve_async(query, *, limit):  # noqa: ANN001 - retriever parity
+            return [_chunk("v:1", 0.9)]
+
+        patcher = mock.patch.multiple(
+            self.pipeline.vector_retriever,
+            retrieve=lambda query, *, limit: [_chunk("v:1", 0.9)],
+            retrieve_async=retrieve_async,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _collect(self, events) -> tuple:
+        tokens, answers, output = [], [], None
+        for kind, item in events:
+            if kind == "token":
+                tokens.append(item)
+            elif kind == "update":
+                answers.extend(node["answer"] for node in item.values() if "answer" in node)
+            else:
+                output = item
+        return tokens, answers, output
+
+    def test_streamed_tokens_and_node_updates_are_scrubbed(self) -> None:
+        async def drain():
+            return [
+                event
+                async for event in self.pipeline.astream_with_result(
+                    self.question, stream_tokens=True
+                )
+            ]
+
+        for events in (
+            list(self.pipeline.stream_with_result(self.question, stream_tokens=True)),
+            asyncio.run(drain()),
+        ):
+            tokens, answers, output = self._collect(events)
+
+            self.assertGreater(len(tokens), 1)
+            self.assertEqual("".join(tokens), output.answer)
+            self.assertTrue(answers)
+            for text in [*tokens, *answers, output.answer]:
+                self.assertNotIn("010-1234-5678", text)
+            self.assertIn("[REDACTED]", output.answer)
+
+
+class AsyncCacheLookupTests(unittest.TestCase):
+    def test_cache_lookups_run_off_the_event_loop(self) -> None:
+        pipeline = make_pipeline()
+        self.addCleanup(pipeline.close)
+        threads = []
+
+        def lookup(question, start_total):  # noqa: ANN001 - method parity
+            threads.append(threading.current_thread())
+            return None
+
+        async def run_both():
+            with mock.patch.object(pipeline, "_lookup_faq_cache", side_effect=lookup):
+                await pipeline.arun("걷기 운동이 혈당에 좋은가요?")
+                async for _ in pipeline.astream_with_result("걷기 운동이 혈당에 좋은가요?"):
+                    pass
+
+        asyncio.run(run_both())
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+class PreparationDagTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.pipeline.main_llm = _SlowLLM("BMI 31, 혈압 경계", delay=0.2)
+        # Both runs use the same context; the second would be served from the cache
+        self.pipeline.prep_cache = None
+
+    def test_patient_and_history_analysis_run_in_parallel(self) -> None:
+        outputs = [
+            self.pipeline.run("상담 준비", context="BMI 31", mode="preparation"),
+            asyncio.run(self.pipeline.arun("상담 준비", context="BMI 31", mode="preparation")),
+        ]
+
+        for output in outputs:
+            timings = output.timings
+            self.assertGreaterEqual(timings["prep_patient_analysis"], 0.2)
+            self.assertGreaterEqual(timings["prep_history_analysis"], 0.2)
+            self.assertLess(timings["total"], 0.38)
+            prep = output.preparation_analysis
+            self.assertIsNotNone(prep.consultation_pattern)
+            self.assertEqual(len(prep.delivery_examples), 1)
+            self.assertAlmostEqual(
+                prep.timings["prep_branch_patient"],
+                timings["prep_patient_analysis"] + timings["prep_delivery_examples"],
+            )
+            self.assertIn("prep_branch_history", prep.timings)
+            self.assertIn("prep_branch_questions", prep.timings)
+
+
+class PreparationCacheTests(unittest.TestCase):
+    context = '{"patient_id": 7, "latest_exam": {"bmi": 31}}'
+
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.data_version = "v1"
+        patcher = mock.patch.object(
+            pipeline_module, "patient_data_version", side_effect=lambda _: self.data_version
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_preparation_is_served_from_cache(self) -> None:
+        first = self.pipeline.run("상담 준비", context=self.context, mode="preparation")
+        self.pipeline.main_llm = _SlowLLM("다른 결과", delay=1.0)
+
+        start = time.perf_counter()
+        cached = asyncio.run(
+            self.pipeline.arun("상담 준비", context=self.context, mode="preparation")
+        )
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn("cache_lookup", cached.timings)
+        self.assertEqual(
+            cached.preparation_analysis.patient_state, first.preparation_analysis.patient_state
+        )
+        self.assertEqual(
+            [q.question for q in cached.preparation_analysis.expected_questions],
+            [q.question for q in first.preparation_analysis.expected_questions],
+        )
+
+    def test_patient_data_change_invalidates_entry(self) -> None:
+        self.pipeline.run("상담 준비", context=self.context, mode="preparation")
+        self.data_version = "v2"
+
+        events = list(
+            self.pipeline.stream_with_result("상담 준비", context=self.context, mode="preparation")
+        )
+
+        self.assertTrue(any(kind == "update" for kind, _ in events))
+        self.assertNotIn("cache_lookup", events[-1][1].timings)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.pipeline.response_cache = ResponseCache()
+
+    def test_repeated_live_question_is_served_from_cache(self) -> None:
+        first = self.pipeline.run("저녁 식단은 어떻게 바꾸면 좋을까요?")
+        self.pipeline.main_llm = _SlowLLM("다른 답변", delay=1.0)
+
+        start = time.perf_counter()
+        cached = asyncio.run(self.pipeline.arun("저녁  식단은 어떻게 바꾸면 좋을까요"))
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn("cache_lookup", cached.timings)
+        self.assertEqual(cached.answer, first.answer)
+        self.assertEqual(self.pipeline.response_cache.get_stats()["hits"], 1)
+
+    def test_answers_needing_caution_are_not_stored(self) -> None:
+        output = self.pipeline.run("검사 수치가 높게 나왔는데 운동을 해도 되나요?")
+
+        self.assertIsNot(output.analysis.safety, SafetyLevel.CLEAR)
+        self.assertEqual(self.pipeline.response_cache.size(), 0)
+
+    def test_question_needing_caution_is_not_served_a_cached_answer(self) -> None:
+        # The stub embeds every question alike, so the lookup would match the stored one
+        self.pipeline.run("저녁 식단은 어떻게 바꾸면 좋을까요?")
+
+        output = self.pipeline.run("검사 수치가 높게 나왔는데 운동을 해도 되나요?")
+
+        self.assertIsNot(output.analysis.safety, SafetyLevel.CLEAR)
+        self.assertNotIn("cache_lookup", output.timings)
+        self.assertEqual(self.pipeline.response_cache.get_stats()["hits"], 0)
+
+    def test_vector_retrieval_reuses_the_cache_key_embedding(self) -> None:
+        embed = mock.Mock(wraps=self.pipeline.embedding_client.embed_text)
+        by_vector = mock.AsyncMock(return_value=[_chunk("v:1", 0.9)])
+        by_query = mock.AsyncMock(return_value=[])
+        with mock.patch.object(self.pipeline.embedding_client, "embed_text", embed), \
+                mock.patch.multiple(
+                    self.pipeline.vector_retriever,
+                    retrieve_by_vector_async=by_vector,
+                    retrieve_async=by_query,
+                ):
+            output = self.pipeline.run("저녁 식단은 어떻게 바꾸면 좋을까요?")
+
+        self.assertEqual([c.chunk_id for c in output.evidence], ["v:1"])
+        embed.assert_called_once_with("저녁 식단은 어떻게 바꾸면 좋을까요?")
+        by_vector.assert_awaited_once_with([0.1, 0.2, 0.3], limit=mock.ANY)
+        by_query.assert_not_awaited()
+
+    def test_slow_cache_key_embedding_is_cut_at_its_share(self) -> None:
+        self.pipeline.live_deadline_seconds = 1.0
+
+        def slow_embed(text):  # noqa: ANN001 - parity
+            time.sleep(0.5)
+            return [0.1, 0.2, 0.3]
+
+        with mock.patch.object(self.pipeline.embedding_client, "embed_text", slow_embed):
+            output = self.pipeline.run("저녁 식단은 어떻게 바꾸면 좋을까요?")
+
+        self.assertEqual(output.cut_stages, ["response_cache"])
+        self.assertTrue(output.answer)
+        self.assertEqual(self.pipeline.response_cache.size(), 0)
+
+
+class _SlowCountingLLM(_SlowLLM):
+    def __init__(self, reply: str, delay: float) -> None:
+        super().__init__(reply, delay)
+        self.calls = 0
+
+    def invoke(self, messages):  # noqa: ANN001 - LangChain parity
+        self.calls += 1
+        return super().invoke(messages)
+
+    async def ainvoke(self, messages):  # noqa: ANN001 - LangChain parity
+        self.calls += 1
+        return await super().ainvoke(messages)
+
+
+class CoalescingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.llm = _SlowCountingLLM("걷기 운동이 도움이 됩니다.", delay=0.3)
+        self.pipeline.main_llm = self.llm
+
+        async def retrieve_async(query, *, limit):  # noqa: ANN001 - retriever parity
+            return [_chunk("v:1", 0.9)]
+
+        patcher = mock.patch.multiple(
+            self.pipeline.vector_retriever,
+            retrieve=lambda query, *, limit: [_chunk("v:1", 0.9)],
+            retrieve_async=retrieve_async,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_duplicates_share_one_run(self) -> None:
+        question = "걷기 운동은 혈당에 어떤 도움이 되나요?"
+
+        async def ask_all():
+            return await asyncio.gather(
+                self.pipeline.arun(question),
+                self.pipeline.arun(" 걷기 운동은  혈당에 어떤 도움이 되나요? "),
+                self.pipeline.arun(question),
+            )
+
+        outputs = asyncio.run(ask_all())
+
+        self.assertEqual(self.llm.calls, 1)
+        self.assertTrue(all(output is outputs[0] for output in outputs))
+
+    def test_different_contexts_run_separately(self) -> None:
+        question = "걷기 운동은 혈당에 어떤 도움이 되나요?"
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(self.pipeline.run, question, context=context)
+                for context in ('{"patient_id": 1}', '{"patient_id": 2}')
+            ]
+            outputs = [future.result() for future in futures]
+
+        self.assertEqual(self.llm.calls, 2)
+        self.assertIsNot(outputs[0], outputs[1])
+
+
+class DecomposeBatchTests(unittest.TestCase):
+    subquestions = ["걷기는 얼마나 해야 하나요?", "식단과 혈압의 관계는?", "수면은 몇 시간이 좋나요?"]
+
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.pipeline.small_llm = _StubLLM("\n".join(self.subquestions))
+        self.searches: list = []
+        self.graph_searches: list = []
+
+        def retrieve_many(queries, *, limit):  # noqa: ANN001 - retriever parity
+            self.searches.append(list(queries))
+            return [[_chunk(f"v:{idx}", 0.5)] for idx, _ in enumerate(queries)]
+
+        async def retrieve_many_async(queries, *, limit):  # noqa: ANN001 - retriever parity
+            return retrieve_many(queries, limit=limit)
+
+        def graph_retrieve(query, *, limit, timeout=None):  # noqa: ANN001 - retriever parity
+            self.graph_searches.append(query)
+            return []
+
+        async def graph_retrieve_async(query, *, limit):  # noqa: ANN001 - retriever parity
+            return graph_retrieve(query, limit=limit)
+
+        unbatched = AssertionError("sub-questions must share the batched vector search")
+        for patcher in (
+            mock.patch.multiple(
+                self.pipeline.vector_retriever,
+                retrieve=mock.Mock(side_effect=unbatched),
+                retrieve_async=mock.Mock(side_effect=unbatched),
+                retrieve_many=retrieve_many,
+                retrieve_many_async=retrieve_many_async,
+            ),
+            mock.patch.multiple(
+                self.pipeline.graph_retriever,
+                retrieve=graph_retrieve,
+                retrieve_async=graph_retrieve_async,
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_subquestions_share_one_vector_search(self) -> None:
+        analysis = QuestionAnalysisResult(
+            domain="lifestyle",
+            complexity="multi-hop",
+            safety=SafetyLevel.CLEAR,
+            reasons=[],
+            latency_ms=0.0,
+        )
+        state = {"analysis": analysis, "strategy_config": {"sub_limit": 3}}
+        question = "걷기와 식단, 수면을 같이 관리하려면?"
+
+        subquestions, evidence, _ = asyncio.run(
+            self.pipeline._decompose_search(state, {}, question)
+        )
+
+        self.assertEqual(subquestions, self.subquestions)
+        self.assertEqual(self.searches, [self.subquestions])
+        # Only the relationship sub-question tries the graph first
+        self.assertEqual(self.graph_searches, ["식단과 혈압의 관계는?"])
+        self.assertEqual(
+            [(c.chunk_id, c.metadata["subquestion"]) for c in evidence],
+            [(f"v:{idx}", sub) for idx, sub in enumerate(self.subquestions)],
+        )
+
+
+class _CountingLLM(_StubLLM):
+    def __init__(self, reply: str) -> None:
+        super().__init__(reply)
+        self.calls: list = []
+
+    def invoke(self, messages):  # noqa: ANN001 - LangChain parity
+        self.calls.append("invoke")
+        return super().invoke(messages)
+
+    async def ainvoke(self, messages):  # noqa: ANN001 - LangChain parity
+        self.calls.append("invoke")
+        return await super().ainvoke(messages)
+
+    def batch(self, inputs, config=None):  # noqa: ANN001 - LangChain parity
+        self.calls.append(("batch", len(inputs), config["max_concurrency"]))
+        return [AIMessage(content=self._reply) for _ in inputs]
+
+    async def abatch(self, inputs, config=None):  # noqa: ANN001 - LangChain parity
+        self.calls.append(("batch", len(inputs), config["max_concurrency"]))
+        return [AIMessage(content=self._reply) for _ in inputs]
+
+
+class PreparedAnswerBatchTests(unittest.TestCase):
+    questions = ["걷기는 얼마나 해야 하나요?", "식단과 혈압의 관계는?", "수면이 혈당에 영향을 주나요?"]
+
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.pipeline.prep_llm_concurrency = 2
+        self.searches: list = []
+
+        def retrieve_many(queries, *, limit):  # noqa: ANN001 - retriever parity
+            self.searches.append(list(queries))
+            return [[_chunk(f"v:{idx}", 0.5)] for idx, _ in enumerate(queries)]
+
+        async def retrieve_many_async(queries, *, limit):  # noqa: ANN001 - retriever parity
+            return retrieve_many(queries, limit=limit)
+
+        patcher = mock.patch.multiple(
+            self.pipeline.vector_retriever,
+            retrieve_many=retrieve_many,
+            retrieve_many_async=retrieve_many_async,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_answers_use_one_vector_search_and_one_llm_batch(self) -> None:
+        self.pipeline.small_llm = _CountingLLM("주 150분 걷기를 권합니다.")
+
+        result = asyncio.run(
+            self.pipeline._node_prep_prepare_answers(
+                {"expected_questions_text": list(self.questions)}
+            )
+        )
+
+        self.assertEqual(self.searches, [self.questions])
+        self.assertEqual(self.pipeline.small_llm.calls, [("batch", 3, 2)])
+        answered = result["expected_questions"]
+        self.assertEqual([q.question for q in answered], self.questions)
+        self.assertEqual(answered[1].recommended_answer, "주 150분 걷기를 권합니다.")
+
+    def test_no_questions_skips_retrieval(self) -> None:
+        result = asyncio.run(
+            self.pipeline._node_prep_prepare_answers({"expected_questions_text": []})
+        )
+
+        self.assertEqual(result["expected_questions"], [])
+        self.assertEqual(self.searches, [])
+
+
+class _InFlightLLM(_StubLLM):
+    def __init__(self, reply: str) -> None:
+        super().__init__(reply)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def invoke(self, messages, config=None):  # noqa: ANN001 - LangChain parity
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return super().invoke(messages)
+
+
+class PrecomputeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = make_pipeline()
+        self.addCleanup(self.pipeline.close)
+        self.llm = _InFlightLLM("걷기 운동은 얼마나 해야 하나요?\n식단은 어떻게 바꾸나요?")
+        self.pipeline.small_llm = self.pipeline.main_llm = self.llm
+        self.pipeline.prep_cache = None
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = PreparationCache(Path(tmp.name) / "reports")
+        self.versions = {pid: "v1" for pid in range(1, 5)}
+        for target, name, fake in (
+            (
+                self.pipeline.patient_context,
+                "build",
+                lambda pid: json.dumps({"patient_id": pid, "bmi": 30}),
+            ),
+            (precompute_module, "patient_data_version", lambda pid: self.versions[pid]),
+        ):
+            patcher = mock.patch.object(target, name, side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_batch_is_bounded_and_resumable(self) -> None:
+        precomputer = precompute_module.PreparationPrecomputer(
+            self.pipeline, self.store, workers=4, llm_concurrency=2
+        )
+
+        first = precomputer.run([1, 2, 3, 4])
+        self.versions[2] = "v2"
+        second = precomputer.run([1, 2, 3, 4])
+
+        self.assertEqual((first.completed, first.skipped, first.failed), (4, 0, []))
+        self.assertLessEqual(self.llm.peak, 2)
+        self.assertEqual((second.completed, second.skipped), (1, 3))
+        report = precompute_module.load_report(self.pipeline, self.store, 1)
+        self.assertEqual(report["patient_id"], 1)
+        self.assertTrue(report["output"]["preparationAnalysis"]["expectedQuestions"])
+
+    def test_dry_run_uses_stub_llm_and_stores_nothing(self) -> None:
+        precomputer = precompute_module.PreparationPrecomputer(
+            self.pipeline, self.store, dry_run=True
+        )
+
+        stats = precomputer.run([1, 2])
+
+        self.assertEqual(stats.completed, 2)
+        self.assertEqual(self.llm.peak, 0)
+        self.assertEqual(self.store.size(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from metabolic_backend.cache import PreparationCache
+from metabolic_backend.patient_data import (
+    SURVEY_DB,
+    TEST_DB,
+    PatientContextBuilder,
+    build_patient_context,
+    patient_data_version,
+    patient_id_from_context,
+)
+
+
+def _empty_copy(source: Path, target: Path) -> None:
+    """Create ``target`` with the schema of ``source`` and no rows."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        for (sql,) in src.execute("SELECT sql FROM sqlite_master WHERE type = 'table'"):
+            dst.execute(sql)
+
+
+class PreparationCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.cache = PreparationCache(self.root / "preparation")
+
+    def test_key_ignores_context_field_order(self) -> None:
+        versions = {"corpus_version": "c1", "prompt_version": "1"}
+        first = self.cache.make_key("준비", '{"patient_id": 1, "bmi": 31}', **versions)
+        second = self.cache.make_key("준비", '{"bmi": 31, "patient_id": 1}', **versions)
+        bumped = self.cache.make_key(
+            "준비", '{"patient_id": 1, "bmi": 31}', corpus_version="c1", prompt_version="2"
+        )
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, bumped)
+
+    def test_entry_is_dropped_when_data_version_changes(self) -> None:
+        self.cache.set("k", {"value": 1}, data_version="v1")
+
+        self.assertEqual(self.cache.get("k", "v1"), {"value": 1})
+        self.assertIsNone(self.cache.get("k", "v2"))
+        self.assertEqual(self.cache.size(), 0)
+
+    def test_concurrent_writers_do_not_share_a_temp_file(self) -> None:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda idx: self.cache.set("k", {"value": idx}), range(64)))
+
+        self.assertIn(self.cache.get("k")["value"], range(64))
+        self.assertEqual(list(self.cache.cache_dir.glob("*.tmp")), [])
+
+    def test_sweeps_oldest_entries_past_the_cap(self) -> None:
+        cache = PreparationCache(self.root / "capped", max_entries=2)
+        for idx, key in enumerate(("a", "b", "c")):
+            cache.set(key, {"value": key})
+            os.utime(cache._path(key), (1000 + idx, 1000 + idx))
+        cache.set("d", {"value": "d"})
+
+        self.assertEqual(cache.size(), 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("d"), {"value": "d"})
+
+    def test_patient_data_version_tracks_exam_and_survey_rows(self) -> None:
+        test_db, survey_db = self.root / "test.sqlite", self.root / "survey.sqlite"
+        with sqlite3.connect(test_db) as conn:
+            conn.execute("CREATE TABLE health_exams (exam_id INTEGER, patient_id INTEGER, bmi FLOAT)")
+            conn.execute("INSERT INTO health_exams VALUES (1, 7, 31.0)")
+        with sqlite3.connect(survey_db) as conn:
+            conn.execute("CREATE TABLE surveys (survey_id TEXT, patient_id TEXT, visit_type TEXT)")
+            conn.execute("INSERT INTO surveys VALUES ('s1', '7', '초진')")
+
+        def version() -> str | None:
+            return patient_data_version(7, test_db=test_db, survey_db=survey_db)
+
+        original = version()
+        with sqlite3.connect(test_db) as conn:
+            conn.execute("UPDATE health_exams SET bmi = 29.5 WHERE exam_id = 1")
+        after_exam = version()
+        with sqlite3.connect(survey_db) as conn:
+            conn.execute("INSERT INTO surveys VALUES ('s2', '7', '재진')")
+
+        self.assertIsNotNone(original)
+        self.assertNotEqual(original, after_exam)
+        self.assertNotEqual(after_exam, version())
+        self.assertIsNone(patient_data_version(7, test_db=self.root / "a", survey_db=self.root / "b"))
+
+    def test_patient_id_is_read_from_json_context(self) -> None:
+        self.assertEqual(patient_id_from_context('{"patient_id": "12", "patient": {}}'), 12)
+        self.assertIsNone(patient_id_from_context("BMI 31"))
+        self.assertIsNone(patient_id_from_context(None))
+
+
+
+class PatientContextTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        self.dbs = {"test_db": root / "test.sqlite", "survey_db": root / "survey.sqlite"}
+        _empty_copy(TEST_DB, self.dbs["test_db"])
+        _empty_copy(SURVEY_DB, self.dbs["survey_db"])
+        with sqlite3.connect(self.dbs["test_db"]) as conn:
+            conn.execute(
+                "INSERT INTO patients (patient_id, name, sex, age, rrn_masked) "
+                "VALUES (7, '홍길동', '남', 54, '700101-1******')"
+            )
+            for exam_id, exam_at, bmi, fbg in (
+                (1, "2025-01-10", 31.2, 131.0),
+                (2, "2025-04-10", 30.4, None),
+                (3, "2025-07-10", 29.8, 118.0),
+            ):
+                conn.execute(
+                    "INSERT INTO health_exams (exam_id, patient_id, exam_at, bmi, fbg_mg_dl) "
+                    "VALUES (?, 7, ?, ?, ?)",
+                    (exam_id, exam_at, bmi, fbg),
+                )
+        with sqlite3.connect(self.dbs["survey_db"]) as conn:
+            conn.execute(
+                "INSERT INTO surveys (survey_id, patient_id, patient_name, contact, visit_type, "
+                "survey_date, created_at) VALUES ('s1', '7', '홍길동', '010-1234-5678', "
+                "'first', '2025-07-01', '2025-07-01')"
+            )
+            conn.execute(
+                "INSERT INTO disease_history (id, survey_id, disease_code, disease_name, "
+                "diagnosed, taking_medication) VALUES (1, 's1', 'HTN', '고혈압', 1, 1)"
+            )
+            conn.execute(
+                "INSERT INTO mental_health (survey_id, sleep_hours_weekday, phq9_total_score) "
+                "VALUES ('s1', 6, 4)"
+            )
+
+    def test_context_carries_latest_exam_trends_and_survey(self) -> None:
+        context = json.loads(build_patient_context(7, **self.dbs))
+
+        self.assertEqual(patient_id_from_context(json.dumps(context)), 7)
+        self.assertEqual(context["patient"], {"sex": "남", "age": 54})
+        self.assertEqual(
+            context["latest_exam"], {"exam_at": "2025-07-10", "bmi": 29.8, "fbg_mg_dl": 118.0}
+        )
+        self.assertEqual(
+            context["trends"], {"bmi": [31.2, 30.4, 29.8], "fbg_mg_dl": [131.0, 118.0]}
+        )
+        self.assertEqual(context["survey"]["diseases"], ["고혈압(복약)"])
+        self.assertEqual(context["survey"]["phq9_total_score"], 4)
+        rendered = json.dumps(context, ensure_ascii=False)
+        self.assertNotIn("홍길동", rendered)
+        self.assertNotIn("010-1234-5678", rendered)
+        self.assertIsNone(build_patient_context(8, **self.dbs))
+
+    def test_token_budget_trims_trends_then_survey(self) -> None:
+        full = build_patient_context(7, **self.dbs)
+        rendered = build_patient_context(7, max_tokens=60, **self.dbs)
+        trimmed = json.loads(rendered)
+
+        self.assertLess(len(rendered), len(full))
+        self.assertIn("latest_exam", trimmed)
+        self.assertNotIn("survey", trimmed)
+
+    def test_builder_reuses_context_until_patient_data_changes(self) -> None:
+        builder = PatientContextBuilder(**self.dbs)
+
+        first = builder.build(7)
+        self.assertIs(builder.build(7), first)
+        with sqlite3.connect(self.dbs["test_db"]) as conn:
+            conn.execute("UPDATE health_exams SET bmi = 28.9 WHERE exam_id = 3")
+        updated = builder.build(7)
+
+        self.assertEqual(builder.stats, {"hits": 1, "misses": 2})
+        self.assertIn('"bmi":28.9', updated)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+from metabolic_backend.cache import ResponseCache
+from metabolic_backend.cache import response as response_module
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_similar_question_hits_and_distant_one_misses(self) -> None:
+        cache = ResponseCache(similarity_threshold=0.95)
+        cache.set([1.0, 0.0, 0.0], "corpus-1", "answer")
+
+        self.assertEqual(cache.get([0.99, 0.05, 0.0], "corpus-1"), "answer")
+        self.assertIsNone(cache.get([0.0, 1.0, 0.0], "corpus-1"))
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        self.assertEqual(cache.get_stats()["misses"], 1)
+
+    def test_entries_from_another_corpus_are_dropped(self) -> None:
+        cache = ResponseCache()
+        cache.set([1.0, 0.0], "corpus-1", "answer")
+
+        self.assertIsNone(cache.get([1.0, 0.0], "corpus-2"))
+        self.assertEqual(cache.size(), 0)
+
+    def test_entries_expire_after_ttl(self) -> None:
+        cache = ResponseCache(ttl_seconds=10.0)
+        with mock.patch.object(response_module.time, "monotonic", return_value=100.0):
+            cache.set([1.0, 0.0], "corpus-1", "answer")
+        with mock.patch.object(response_module.time, "monotonic", return_value=111.0):
+            self.assertIsNone(cache.get([1.0, 0.0], "corpus-1"))
+        self.assertEqual(cache.get_stats()["expired"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = ResponseCache(max_entries=2)
+        cache.set([1.0, 0.0, 0.0], "corpus-1", "a")
+        cache.set([0.0, 1.0, 0.0], "corpus-1", "b")
+        cache.get([1.0, 0.0, 0.0], "corpus-1")
+
+        cache.set([0.0, 0.0, 1.0], "corpus-1", "c")
+
+        self.assertEqual(cache.size(), 2)
+        self.assertEqual(cache.get([1.0, 0.0, 0.0], "corpus-1"), "a")
+        self.assertIsNone(cache.get([0.0, 1.0, 0.0], "corpus-1"))
+        self.assertEqual(cache.get([0.0, 0.0, 1.0], "corpus-1"), "c")
+
+    def test_equivalent_question_replaces_its_entry(self) -> None:
+        cache = ResponseCache()
+        cache.set([1.0, 0.0], "corpus-1", "old")
+        cache.set([1.0, 0.01], "corpus-1", "new")
+
+        self.assertEqual(cache.size(), 1)
+        self.assertEqual(cache.get([1.0, 0.0], "corpus-1"), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from metabolic_backend.metrics import count_summary
+from metabolic_backend.orchestrator.singleflight import SingleFlight
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_sync_callers_share_result_and_exception(self) -> None:
+        flight = SingleFlight("test_sync")
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(timeout=5)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(flight.do, "key", slow) for _ in range(3)]
+            while flight.in_flight() == 0 or count_summary().get("test_sync_coalesced", 0) < 2:
+                time.sleep(0.01)
+            release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_follower_takes_over_when_leader_is_cancelled(self) -> None:
+        flight = SingleFlight("test_cancel")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return len(calls)
+
+        async def scenario():
+            leader = asyncio.ensure_future(flight.ado("key", work))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(flight.ado("key", work))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(scenario()), 2)
+
+    def test_cancelled_follower_leaves_leader_running(self) -> None:
+        flight = SingleFlight("test_follower")
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def scenario():
+            leader = asyncio.ensure_future(flight.ado("key", work))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(flight.ado("key", work))
+            await asyncio.sleep(0.01)
+            follower.cancel()
+            return await leader
+
+        self.assertEqual(asyncio.run(scenario()), "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
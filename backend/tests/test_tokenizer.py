@@ -0,0 +1,37 @@
+import unittest
+
+from metabolic_backend.analysis.classifier import QuestionAnalyzer
+from metabolic_backend.analysis.tokenizer import contains_keyword, index_terms, tokenize
+
+
+class TokenizerTests(unittest.TestCase):
+    def test_strips_particles_and_normalizes(self) -> None:
+        self.assertEqual(tokenize("운동은"), tokenize("운동을"))
+        self.assertEqual(tokenize("ＢＭＩ가 높아요"), ["bmi", "높아요"])
+
+    def test_bigrams_match_compound_nouns(self) -> None:
+        terms = set(index_terms("유산소운동을 주 5회 하세요"))
+
+        self.assertTrue(contains_keyword(terms, "운동"))
+        self.assertTrue(contains_keyword(terms, "유산소"))
+        self.assertFalse(contains_keyword(terms, "근력"))
+
+    def test_classifier_domain_ignores_partial_syllable_hits(self) -> None:
+        analyzer = QuestionAnalyzer()
+
+        self.assertEqual(analyzer.analyze("식단을 바꾸고 싶어요").domain, "diet")
+        self.assertEqual(analyzer.analyze("약속이 많아 바빠요").domain, "lifestyle")
+
+    def test_classifier_domain_matches_medication_compounds(self) -> None:
+        analyzer = QuestionAnalyzer()
+
+        self.assertEqual(analyzer.analyze("혈압약을 먹는데 커피를 마셔도 되나요").domain, "medical")
+        self.assertEqual(analyzer.analyze("당뇨약 먹는 시간이 궁금해요").domain, "medical")
+        self.assertEqual(analyzer.analyze("고혈압약은 아침에 먹나요").domain, "medical")
+        self.assertEqual(analyzer.analyze("다음 예약은 언제 잡을까요").domain, "lifestyle")
+        self.assertEqual(analyzer.analyze("재계약 때문에 스트레스가 심해요").domain, "lifestyle")
+        self.assertEqual(analyzer.analyze("상담 내용을 요약해 주세요").domain, "lifestyle")
+
+
+if __name__ == "__main__":
+    unittest.main()
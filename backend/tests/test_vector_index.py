@@ -0,0 +1,302 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import chromadb
+import numpy as np
+
+from metabolic_backend.config import get_settings
+from metabolic_backend.ingestion import iter_chunks, load_embedding_matrix, write_embedding_matrix
+from metabolic_backend.ingestion.models import Chunk
+from metabolic_backend.ingestion.pipeline import _strip_embedding
+from metabolic_backend.retrievers import (
+    ExactVectorIndex,
+    IVFVectorIndex,
+    QuantizedVectorIndex,
+    VectorRetriever,
+    build_vector_index,
+)
+
+
+def _chunk(chunk_id: str, embedding) -> Chunk:  # noqa: ANN001 - test helper
+    return Chunk(
+        chunk_id=chunk_id,
+        document_id="doc",
+        section_path=[],
+        source_path="doc.md",
+        text=chunk_id,
+        token_count=1,
+        embedding=list(embedding) if embedding is not None else None,
+        metadata={"document_id": "doc"},
+    )
+
+
+class _AxisEmbeddings:
+    """Embeds "axis:N" as the N-th unit vector of a 4-dim space."""
+
+    def embed_text(self, text: str):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):  # noqa: ANN001 - parity
+        return [np.eye(4)[int(text.split(":")[1])].tolist() for text in texts]
+
+    async def aembed_batch(self, texts):  # noqa: ANN001 - parity
+        return self.embed_batch(texts)
+
+
+class VectorIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(7)
+        self.ids = [f"c:{idx}" for idx in range(500)]
+        self.matrix = rng.normal(size=(500, 16)).astype(np.float32)
+        self.queries = rng.normal(size=(8, 16)).astype(np.float32)
+
+    def _expected(self, limit: int):
+        unit = self.matrix / np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        queries = self.queries / np.linalg.norm(self.queries, axis=1, keepdims=True)
+        scores = queries @ unit.T
+        return [[self.ids[idx] for idx in np.argsort(-row)[:limit]] for row in scores]
+
+    def test_exact_index_matches_full_sort(self) -> None:
+        index = ExactVectorIndex(self.ids, self.matrix)
+
+        results = index.search(self.queries, 5)
+
+        self.assertEqual([[cid for cid, _ in hits] for hits in results], self._expected(5))
+        for hits in results:
+            scores = [score for _, score in hits]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            self.assertLessEqual(scores[0], 1.0 + 1e-6)
+
+    def test_ivf_probing_every_list_is_exact(self) -> None:
+        index = IVFVectorIndex(self.ids, self.matrix, n_lists=10, n_probe=10)
+
+        results = index.search(self.queries, 5)
+
+        self.assertEqual([[cid for cid, _ in hits] for hits in results], self._expected(5))
+        self.assertEqual(sum(len(members) for members in index.lists), len(self.ids))
+
+    def test_exact_and_ivf_score_a_mapped_matrix_in_blocks(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = Path(tmp.name) / "matrix.npy"
+        np.save(path, self.matrix.astype(np.float16))
+        mapped = np.load(path, mmap_mode="r")
+
+        with mock.patch("metabolic_backend.retrievers.vector_index._BLOCK_ROWS", 64):
+            exact = ExactVectorIndex(self.ids, mapped)
+            ivf = IVFVectorIndex(self.ids, mapped, n_lists=10, n_probe=10)
+            results = [index.search(self.queries, 5) for index in (exact, ivf)]
+
+        self.assertIs(exact.matrix, mapped)
+        for found in results:
+            self.assertEqual([[cid for cid, _ in hits] for hits in found], self._expected(5))
+        self.assertEqual(sum(len(members) for members in ivf.lists), len(self.ids))
+
+    def test_limit_beyond_corpus_returns_everything(self) -> None:
+        index = ExactVectorIndex(self.ids[:3], self.matrix[:3])
+
+        self.assertEqual(len(index.search(self.queries[:1], 10)[0]), 3)
+
+    def test_int8_rescoring_matches_exact_search(self) -> None:
+        index = build_vector_index(self.ids, self.matrix.astype(np.float16), "int8")
+
+        results = index.search(self.queries, 5)
+
+        self.assertIsInstance(index, QuantizedVectorIndex)
+        self.assertEqual([[cid for cid, _ in hits] for hits in results], self._expected(5))
+        exact = ExactVectorIndex(self.ids, self.matrix).search(self.queries, 5)
+        for hits, expected in zip(results, exact):
+            for (_, score), (_, exact_score) in zip(hits, expected):
+                self.assertAlmostEqual(score, exact_score, places=2)
+        self.assertLess(index.nbytes, self.matrix.nbytes // 2)
+
+    def test_binary_candidates_are_rescored(self) -> None:
+        # 16 sign bits rank coarsely, so rescore a wide shortlist
+        index = QuantizedVectorIndex(
+            self.ids, self.matrix, quantization="binary", rescore_factor=40
+        )
+
+        results = index.search(self.queries, 5)
+
+        found = [[cid for cid, _ in hits] for hits in results]
+        recall = np.mean(
+            [len(set(hits) & set(truth)) / 5 for hits, truth in zip(found, self._expected(5))]
+        )
+        self.assertGreaterEqual(recall, 0.9)
+        for hits in results:
+            scores = [score for _, score in hits]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_unknown_kind_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            build_vector_index(self.ids, self.matrix, "pq")
+
+
+class EmbeddingMatrixTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def _write_chunks(self, chunks) -> None:  # noqa: ANN001 - test helper
+        with (self.root / "chunks.jsonl").open("w", encoding="utf-8") as fout:
+            for chunk in chunks:
+                fout.write(json.dumps(chunk.as_record()) + "\n")
+
+    def test_written_matrix_is_mapped_and_unit_normalized(self) -> None:
+        self._write_chunks([_chunk("a", [3.0, 4.0]), _chunk("b", [0.0, 2.0])])
+        write_embedding_matrix(self.root, ["a", "b"], [[3.0, 4.0], [0.0, 2.0]])
+
+        ids, matrix = load_embedding_matrix(self.root)
+
+        self.assertEqual(ids, ["a", "b"])
+        self.assertIsInstance(matrix, np.memmap)
+        self.assertEqual(matrix.dtype, np.float16)
+        np.testing.assert_allclose(matrix, [[0.6, 0.8], [0.0, 1.0]], atol=1e-3)
+
+    def test_stale_or_missing_matrix_is_rebuilt_from_chunks(self) -> None:
+        self.assertIsNone(load_embedding_matrix(self.root))
+
+        self._write_chunks([_chunk("a", [1.0, 0.0]), _chunk("b", None)])
+        ids, _ = load_embedding_matrix(self.root)
+        self.assertEqual(ids, ["a"])
+
+        # A new ingestion run rewrote chunks.jsonl without the matrix
+        self._write_chunks([_chunk("c", [0.0, 1.0]), _chunk("d", [1.0, 1.0])])
+        os.utime(self.root / "chunks.jsonl", ns=(0, 0))
+        ids, matrix = load_embedding_matrix(self.root)
+        self.assertEqual(ids, ["c", "d"])
+        self.assertEqual(matrix.shape, (2, 2))
+
+    def test_iter_chunks_drops_embeddings(self) -> None:
+        tricky = _chunk("b", [0.0, 1.0])
+        tricky.text = 'quoted ", "embedding": [1] text'
+        self._write_chunks([_chunk("a", [1.0, 0.0]), tricky])
+        vector_store = self.root / "vector_store"
+        vector_store.mkdir()
+        (self.root / "chunks.jsonl").rename(vector_store / "chunks.jsonl")
+        get_settings.cache_clear()
+        self.addCleanup(get_settings.cache_clear)
+
+        with mock.patch.dict(os.environ, {"CACHE_ROOT": str(self.root)}):
+            get_settings.cache_clear()
+            chunks = list(iter_chunks())
+
+        self.assertEqual([chunk.chunk_id for chunk in chunks], ["a", "b"])
+        self.assertIsNone(chunks[0].embedding)
+        self.assertEqual(chunks[1].text, 'quoted ", "embedding": [1] text')
+
+    def test_iter_chunks_does_not_parse_embeddings(self) -> None:
+        self._write_chunks([_chunk("a", [1.0, 0.0])])
+        line = (self.root / "chunks.jsonl").read_text(encoding="utf-8")
+
+        stripped = _strip_embedding(line)
+
+        self.assertNotIn("1.0", stripped)
+        self.assertEqual(json.loads(stripped)["chunk_id"], "a")
+
+
+class IndexedVectorRetrieverTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        write_embedding_matrix(self.root, [f"doc:{idx}" for idx in range(4)], np.eye(4))
+        # Chunk embeddings are ignored; the index reads the mapped matrix
+        chunks = [_chunk(f"doc:{idx}", np.eye(4)[3 - idx]) for idx in range(4)]
+        self.retriever = VectorRetriever(
+            chunks=chunks,
+            embedding_client=_AxisEmbeddings(),
+            backend="exact",
+            embeddings_dir=self.root,
+        )
+
+    def test_searches_without_chroma(self) -> None:
+        self.assertIsNone(self.retriever._client)
+        self.assertIsInstance(self.retriever._index.matrix, np.memmap)
+
+        hits = self.retriever.retrieve("axis:2", limit=2)
+
+        self.assertEqual(hits[0].chunk_id, "doc:2")
+        self.assertAlmostEqual(hits[0].score, 1.0, places=5)
+        self.assertIsNone(hits[0].embedding)
+        self.assertEqual(hits[0].metadata["retrieval"], "vector")
+
+    def test_index_reads_embeddings_from_mapped_matrix(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        write_embedding_matrix(root, [f"doc:{idx}" for idx in range(4)], np.eye(4))
+        # Only two chunks survive a corpus filter; the others are not indexed
+        chunks = [_chunk("doc:1", None), _chunk("doc:3", None)]
+
+        retriever = VectorRetriever(
+            chunks=chunks,
+            embedding_client=_AxisEmbeddings(),
+            backend="int8",
+            embeddings_dir=root,
+        )
+
+        self.assertEqual(retriever._index.ids, ["doc:1", "doc:3"])
+        hits = retriever.retrieve("axis:3", limit=1)
+        self.assertEqual(hits[0].chunk_id, "doc:3")
+        self.assertAlmostEqual(hits[0].score, 1.0, places=3)
+
+    def test_batched_async_search(self) -> None:
+        results = asyncio.run(
+            self.retriever.retrieve_many_async(["axis:1", "", "axis:3"], limit=1)
+        )
+
+        self.assertEqual(
+            [[c.chunk_id for c in hits] for hits in results], [["doc:1"], [], ["doc:3"]]
+        )
+
+
+class ChromaVectorRetrieverTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.persist_dir = Path(tmp.name)
+        self.chunks = [_chunk(f"doc:{idx}", None) for idx in range(2)]
+
+    def _retriever(self, collection: str) -> VectorRetriever:
+        return VectorRetriever(
+            chunks=self.chunks,
+            embedding_client=_AxisEmbeddings(),
+            persist_directory=self.persist_dir,
+            collection_name=collection,
+            backend="chroma",
+        )
+
+    def _ingest(self, collection: str, space: str) -> None:
+        client = chromadb.PersistentClient(path=str(self.persist_dir))
+        client.create_collection(collection, metadata={"hnsw:space": space}).upsert(
+            ids=["doc:0", "doc:1"],
+            documents=["doc:0", "doc:1"],
+            metadatas=[{"chunk_id": "doc:0"}, {"chunk_id": "doc:1"}],
+            embeddings=[[1.0, 0.0, 0.0, 0.0], [0.6, 0.8, 0.0, 0.0]],
+        )
+
+    def test_scores_are_cosine_similarity_in_every_space(self) -> None:
+        for space in ("cosine", "l2", "ip"):
+            self._ingest(f"chunks-{space}", space)
+
+            hits = self._retriever(f"chunks-{space}").retrieve("axis:0", limit=2)
+
+            self.assertEqual([c.chunk_id for c in hits], ["doc:0", "doc:1"])
+            self.assertAlmostEqual(hits[0].score, 1.0, places=5)
+            self.assertAlmostEqual(hits[1].score, 0.6, places=5)
+
+    def test_missing_collection_returns_no_results(self) -> None:
+        retriever = self._retriever("not-ingested")
+
+        self.assertEqual(retriever.retrieve_many(["axis:0", "axis:1"], limit=2), [[], []])
+
+
+if __name__ == "__main__":
+    unittest.main()
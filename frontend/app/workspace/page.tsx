@@ -416,20 +416,13 @@ export default function WorkspacePage() {
     setPreparationAnalysis(null);
 
     try {
-      // Prepare context with full patient data
-      const context = JSON.stringify({
-        patient_id: patientId,
-        patient: patientData.patient,
-        latest_exam: patientData.latestExam,
-        survey: patientData.survey,
-      });
-
       const response = await fetch(`${backendBaseUrl}/v1/retrieve/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           question: "이번 상담을 위한 준비 자료를 생성해줘. 핵심 포인트, 예상 질문과 권장 답변, 전달 방식 예시, 주의사항을 포함해서 작성해줘.",
-          context: context,
+          // The backend builds the patient context (exams, trends, survey) itself
+          patient_id: Number(patientId),
           mode: "preparation",
         }),
       });
@@ -10,7 +10,8 @@ export type AGUIMessage = {
 
 export type StreamEvent =
   | { type: "node_update"; node: string; data: any }
-  | { type: "complete"; total_duration: number }
+  | { type: "token"; content: string }
+  | { type: "complete"; total_duration: number; output?: any }
   | { type: "error"; message: string };
 
 export type StreamingState = {
@@ -101,13 +102,21 @@ export function useStreamingRetrieval(backendUrl: string) {
                 setState((prev) => ({
                   ...prev,
                   messages: [...prev.messages, ...newMessages],
-                  answer: nodeData.answer || prev.answer,
+                  // Streamed tokens already hold the answer; keep them over node snapshots
+                  answer: prev.answer || nodeData.answer || "",
                   citations: nodeData.citations || prev.citations,
                   safety: nodeData.safety || prev.safety,
                 }));
+              } else if (event.type === "token") {
+                // Incremental synthesis output; the complete event carries the final answer
+                setState((prev) => ({
+                  ...prev,
+                  answer: prev.answer + event.content,
+                }));
               } else if (event.type === "complete") {
                 setState((prev) => ({
                   ...prev,
+                  answer: event.output?.answer ?? prev.answer,
                   isStreaming: false,
                 }));
               } else if (event.type === "error") {